@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+テストの共通設定（src/yakugaku-251212 のモジュールと src の確認スクリプトをimportできるようにする）
+
+実行: python -m pytest src/tests
+"""
+
+import os
+import sys
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, os.path.join(SRC_DIR, "yakugaku-251212"))
+
+TEMPLATES_DIR = os.path.join(SRC_DIR, "templates")
+
+
+def list_templates():
+    """templates内のテンプレートのファイル名"""
+    return sorted(f for f in os.listdir(TEMPLATES_DIR) if f.endswith(".html"))
+
+
+def read_template(filename):
+    with open(os.path.join(TEMPLATES_DIR, filename), "r", encoding="utf-8") as f:
+        return f.read()
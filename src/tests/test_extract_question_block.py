@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+new2.extract_question_block（文字列のまま切り出す）が、以前のBeautifulSoupでの抽出と同じ結果になるか
+
+以前の抽出はhtml.parserで解析して直列化した文字列なので、切り出した部分も同じ方法で直列化して比較する。
+"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from conftest import list_templates, read_template
+from new2 import extract_question_block
+
+
+def extract_with_soup(html_content):
+    """以前のcreate_index_htmlの抽出（question-block、なければbodyの中身）"""
+    body = BeautifulSoup(html_content, "html.parser").find("body")
+    if body is None:
+        return None
+    question_block = body.find("div", class_="question-block")
+    return str(question_block) if question_block else body.decode_contents()
+
+
+def serialize(fragment):
+    return BeautifulSoup(fragment, "html.parser").decode()
+
+
+@pytest.mark.parametrize("filename", list_templates())
+def test_same_as_soup_extraction(filename):
+    html_content = read_template(filename)
+    assert serialize(extract_question_block(html_content)) == extract_with_soup(html_content)
+
+
+@pytest.mark.parametrize("html_content", [
+    # 終了タグが足りない（</body>の直前までがブロック。末尾の改行も含む）
+    '<body><div class="question-block"><div>本文</div>\n</body>',
+    # コメントとscript・styleの中の「<div」は数えない
+    '<body><div class="question-block"><!-- <div> --><script>"<div>"</script>'
+    '<style>/* <div> */</style><p>本文</p></div><p>外</p></body>',
+    # question-blockがない
+    '<body><p>本文</p></body>',
+])
+def test_edge_cases(html_content):
+    assert serialize(extract_question_block(html_content)) == extract_with_soup(html_content)
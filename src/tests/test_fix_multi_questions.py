@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+fix_multi_questions: 不足の判定はpost_contentの問題番号で行い、問題は問題番号順の位置に追加する
+"""
+
+import pytest
+from bs4 import BeautifulSoup, Tag
+
+from conftest import list_templates, read_template
+from fix_multi_questions import (
+    extract_missing_question, get_missing_numbers, get_question_heading_number, insert_question,
+)
+from question_store import parse_template_filename
+
+MULTI_TEMPLATES = [f for f in list_templates() if len(parse_template_filename(f)[1]) > 1]
+
+
+def get_post_content(html_content):
+    return BeautifulSoup(html_content, "html.parser").find("div", class_="post_content")
+
+
+def get_children(post_content):
+    """post_content直下の要素（要素の間の改行は比較しない）"""
+    return [str(element) for element in post_content.children if isinstance(element, Tag)]
+
+
+def remove_question(post_content, question_number):
+    """post_contentから1問分（見出しから次の見出しの前まで）を取り除き、取り除いた部分のHTMLを返す"""
+    question_html = extract_missing_question(str(post_content), question_number)
+    removing = False
+    for element in list(post_content.children):
+        number = get_question_heading_number(element)
+        if number is not None:
+            removing = number == question_number
+        if removing:
+            element.extract()
+    return question_html
+
+
+def test_title_does_not_count_as_present():
+    html_content = (
+        '<title>第110回 問297</title><div class="question-title"><a href="https://example.com/">問296-297</a></div>'
+        '<div class="post_content"><p>問296</p><ol><li>a</li></ol></div>'
+    )
+    assert get_missing_numbers(html_content, "110-296_297.html") == {297}
+
+
+@pytest.mark.parametrize("filename", MULTI_TEMPLATES)
+def test_reinserted_question_is_restored(filename):
+    html_content = read_template(filename)
+    question_numbers = parse_template_filename(filename)[1]
+    if get_missing_numbers(html_content, filename):
+        pytest.skip("問題が足りないテンプレート")
+    for question_number in question_numbers:
+        soup = BeautifulSoup(html_content, "html.parser")
+        post_content = soup.find("div", class_="post_content")
+        question_html = remove_question(post_content, question_number)
+        if question_html is None:
+            continue
+        assert question_number in get_missing_numbers(str(soup), filename)
+
+        insert_question(post_content, question_number, question_html)
+        assert get_children(post_content) == get_children(get_post_content(html_content))
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+image_mirror.localize_images: 縮小版は<picture>の<source>に入れ、imgは元の形式の画像のままにする
+"""
+
+import gzip
+
+from bs4 import BeautifulSoup
+
+import image_mirror
+from image_mirror import local_url, localize_images, mirror_templates
+
+INDEX = {
+    "https://example.com/a.png": {
+        "file": "abc.png", "width": 1800, "height": 900,
+        "variants": {
+            "avif": {"300": "abc-300.avif", "1800": "abc-1800.avif"},
+            "webp": {"300": "abc-300.webp", "1800": "abc-1800.webp"},
+        },
+    },
+    "https://example.com/a-300.png": {"file": "def.png", "width": 300, "height": 150, "variants": {}},
+}
+
+
+def parse(html_content):
+    return BeautifulSoup(html_content, "html.parser")
+
+
+def test_variants_go_into_picture_sources():
+    html_content = localize_images(
+        '<p><img src="https://example.com/a.png" '
+        'srcset="https://example.com/a-300.png 300w, https://example.com/a.png 1800w"></p>', INDEX,
+    )
+    picture = parse(html_content).find("picture")
+    assert [source["type"] for source in picture.find_all("source")] == ["image/avif", "image/webp"]
+    assert picture.find("source")["srcset"] == f"{local_url('abc-300.avif')} 300w, {local_url('abc-1800.avif')} 1800w"
+    img = picture.find("img")
+    assert img["src"] == local_url("abc.png")
+    # imgのsrcsetは元の形式（どのブラウザでも表示できる）
+    assert img["srcset"] == f"{local_url('def.png')} 300w, {local_url('abc.png')} 1800w"
+
+
+def test_img_without_srcset_gets_sources():
+    picture = parse(localize_images('<img src="https://example.com/a.png">', INDEX)).find("picture")
+    assert len(picture.find_all("source")) == 2
+    assert not picture.find("img").has_attr("srcset")
+
+
+def test_idempotent_and_repairs_variant_only_srcset():
+    once = localize_images('<img src="https://example.com/a.png">', INDEX)
+    assert localize_images(once, INDEX) == once
+    # 以前の書き換えでimgのsrcsetにAVIFだけが入っていたもの
+    old = '<img src="../images/abc.png" srcset="../images/abc-300.avif 300w, ../images/abc-1800.avif 1800w">'
+    assert localize_images(old, INDEX) == once
+
+
+def test_image_without_variants_is_not_wrapped():
+    html_content = localize_images('<img src="https://example.com/a-300.png">', INDEX)
+    assert parse(html_content).find("picture") is None
+    assert parse(html_content).find("img")["src"] == local_url("def.png")
+
+
+def test_rebases_images_localized_with_another_base_url(monkeypatch):
+    import site_assets
+    monkeypatch.setitem(site_assets._settings, "base_url", "/4tonao/src/")
+    html_content = localize_images('<img src="../images/def.png">', INDEX)
+    assert parse(html_content).find("img")["src"] == "/4tonao/src/images/def.png"
+
+
+def test_mirror_templates_rewrites_compressed_siblings(tmp_path, monkeypatch):
+    templates_dir = tmp_path / "templates"
+    templates_dir.mkdir()
+    template = templates_dir / "110-56.html"
+    template.write_text('<p><img src="https://example.com/a.png"></p>', encoding="utf-8")
+    (templates_dir / "110-56.html.gz").write_bytes(gzip.compress(template.read_bytes()))
+    monkeypatch.setattr(image_mirror, "mirror_images", lambda urls, images_dir: INDEX)
+
+    mirror_templates(templates_dir)
+    compressed = gzip.decompress((templates_dir / "110-56.html.gz").read_bytes()).decode("utf-8")
+    assert compressed == template.read_text(encoding="utf-8")
+    assert parse(compressed).find("img")["src"] == local_url("abc.png")
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+new2.main: 元ページ（キャッシュ済み）とマニフェストが前回と同じなら、取得で待たずにすぐ終わる
+"""
+
+import time
+
+import pytest
+
+import config
+import fetcher
+import new2
+
+PAGE_URLS = {
+    56: "https://example.com/110-56/",
+    254: "https://example.com/110-254/",
+    255: "https://example.com/110-254/",
+}
+SOURCE_HTML = """<html><body>
+<h1 class="c-postTitle__ttl">第110回薬剤師国家試験 問{label}</h1>
+<div class="post_content">
+<p><strong>問{label}</strong> 正しいのはどれか。１つ選べ。</p>
+<ol><li>a</li><li>b</li></ol>
+<div class="su-spoiler"><div class="su-spoiler-title">解答・解説</div>
+<div class="su-spoiler-content"><p>解答 1</p></div></div>
+</div>
+</body></html>"""
+
+
+@pytest.fixture
+def build_config(tmp_path, monkeypatch):
+    """一時ディレクトリに出力する設定（取得間隔は既定の0.2秒のまま）"""
+    config_path = tmp_path / "yakugaku.toml"
+    config_path.write_text(
+        '[paths]\ntemplates = "templates"\npages = "question_pages.json"\n'
+        '[build]\nbase_url = "../"\n[questions]\n110 = [56, 254, 255]\n',
+        encoding="utf-8",
+    )
+    loaded = config.load_config(config_path)
+    monkeypatch.setattr(config, "_config", loaded)
+    monkeypatch.setitem(fetcher._settings, "host_interval", 0.2)
+    monkeypatch.setattr(new2, "refresh_question_pages", lambda *args, **kwargs: {110: PAGE_URLS})
+
+    def fetch_html_from_url(url):
+        label = "56" if url == PAGE_URLS[56] else "254"
+        return SOURCE_HTML.format(label=label)
+
+    monkeypatch.setattr(new2, "fetch_html_from_url", fetch_html_from_url)
+    return loaded
+
+
+def test_warm_build_does_not_sleep(build_config, monkeypatch, capsys):
+    new2.main()
+    assert "変更なし: 0ページ" in capsys.readouterr().out
+
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    new2.main()
+    assert "変更なし: 2ページ" in capsys.readouterr().out
+    assert sleeps == []
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+HTMLパーサーを切り替えても、テンプレートからの抽出結果が変わらないか（verify_parser_backends.py と同じ比較）
+
+既定のパーサーは必ず一致すること。一致しないことが分かっているもの（KNOWN_MISMATCHES）は、
+一致するようになったら既定に戻せるように、一致した時点でテストが失敗する。
+"""
+
+import pytest
+
+import parser_backend
+from conftest import list_templates, read_template
+from verify_parser_backends import REFERENCE_PARSER, extract_from_template
+
+# (パーサー, ファイル名): 理由
+KNOWN_MISMATCHES = {
+    ("lxml", "102-290_291.html"): "lxmlは<noscript>の中の閉じていない<iframe>の後ろを文字列として扱う",
+}
+
+
+@pytest.fixture(autouse=True)
+def restore_parser():
+    saved = parser_backend._parser_name
+    yield
+    parser_backend._parser_name = saved
+
+
+def extract_with(parser, html_content):
+    parser_backend.set_parser_name(parser)
+    return extract_from_template(html_content)
+
+
+def test_default_parser_is_reference(monkeypatch):
+    monkeypatch.delenv(parser_backend.PARSER_ENV, raising=False)
+    parser_backend._parser_name = None
+    assert parser_backend.get_parser_name() == REFERENCE_PARSER
+
+
+def comparison_params():
+    """(パーサー, ファイル名)（一致しないことが分かっているものは strict な xfail）"""
+    for parser in parser_backend.get_available_parsers():
+        if parser == REFERENCE_PARSER:
+            continue
+        for filename in list_templates():
+            reason = KNOWN_MISMATCHES.get((parser, filename))
+            marks = [pytest.mark.xfail(reason=reason, strict=True)] if reason else []
+            yield pytest.param(parser, filename, marks=marks, id=f"{parser}-{filename}")
+
+
+@pytest.mark.parametrize("parser, filename", list(comparison_params()))
+def test_same_extraction_as_reference(parser, filename):
+    html_content = read_template(filename)
+    assert extract_with(parser, html_content) == extract_with(REFERENCE_PARSER, html_content)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTMLパーサー（html.parser / lxml）で抽出結果が変わらないか確認するスクリプト
+templates内の保存済みファイルと、キャッシュ済みの元ページの両方で比較する
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "yakugaku-251212"))
+from parser_backend import get_available_parsers, set_parser_name, make_soup
+from http_cache import CACHE_DIR
+import new2
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+REFERENCE_PARSER = "html.parser"
+
+
+def extract_from_template(html_content):
+    """テンプレートからpost_contentを抽出"""
+    soup = make_soup(html_content)
+    post_content = soup.find("div", class_="post_content")
+    return str(post_content) if post_content else None
+
+
+def extract_from_source(html_content):
+    """元ページからnew2と同じ方法でpost_contentを抽出"""
+    try:
+        return new2.extract_post_content(html_content)
+    except ValueError:
+        return None
+
+
+def load_cached_sources():
+    """キャッシュ済みの元ページ（URL, HTML）のリスト"""
+    try:
+        with open(os.path.join(CACHE_DIR, "index.json"), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return []
+    sources = []
+    for url, entry in sorted(index.items()):
+        body_path = os.path.join(CACHE_DIR, "bodies", f"{entry['body']}.html")
+        if os.path.exists(body_path):
+            with open(body_path, "r", encoding="utf-8", errors="replace") as f:
+                sources.append((url, f.read()))
+    return sources
+
+
+def compare(name, items, extract):
+    """各パーサーで抽出してhtml.parserの結果と比較"""
+    parsers = get_available_parsers()
+    results = {}
+    for parser in parsers:
+        set_parser_name(parser)
+        start = time.perf_counter()
+        results[parser] = [extract(html_content) for _, html_content in items]
+        elapsed = time.perf_counter() - start
+        print(f"  {parser}: {elapsed:.3f}秒")
+
+    mismatches = []
+    for parser in parsers:
+        if parser == REFERENCE_PARSER:
+            continue
+        for (label, _), expected, actual in zip(items, results[REFERENCE_PARSER], results[parser]):
+            if expected != actual:
+                mismatches.append((parser, label))
+
+    print(f"{name}: {len(items)}件, 不一致: {len(mismatches)}件")
+    for parser, label in mismatches:
+        print(f"  ✗ {parser}: {label}")
+    return not mismatches
+
+
+def main():
+    print("=" * 80)
+    print(f"利用可能なパーサー: {', '.join(get_available_parsers())}")
+    print("=" * 80)
+
+    if get_available_parsers() == [REFERENCE_PARSER]:
+        print("比較対象のパーサーがインストールされていません（lxml）")
+        return
+
+    templates = []
+    for filepath in sorted(glob.glob(os.path.join(TEMPLATES_DIR, "*.html"))):
+        with open(filepath, "r", encoding="utf-8") as f:
+            templates.append((os.path.basename(filepath), f.read()))
+
+    ok = compare("templates", templates, extract_from_template)
+
+    sources = load_cached_sources()
+    if sources:
+        ok = compare("キャッシュ済みの元ページ", sources, extract_from_source) and ok
+    else:
+        print("キャッシュ済みの元ページがありません（スキップ）")
+
+    print("=" * 80)
+    print("✓ 全て一致しました" if ok else "✗ 不一致があります")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+インクリメンタルビルド用のマニフェスト
+
+テンプレートごとに「元ページのHTMLのハッシュ」「抽出処理のバージョン」「出力のハッシュ」を記録し、
+変更のないページの抽出・生成と、入力が変わっていない場合のindex.htmlの再生成を省略する。
+"""
+
+import hashlib
+import json
+import os
+
+from write_batch import write_text_atomic
+
+MANIFEST_FILENAME = "build_manifest.json"
+
+
+def get_manifest_path(templates_dir):
+    """マニフェストのパス（templatesと同じ階層）"""
+    return os.path.join(os.path.dirname(templates_dir), MANIFEST_FILENAME)
+
+
+def hash_text(text):
+    """文字列のSHA-256ハッシュ"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(filepath):
+    """ファイルのSHA-256ハッシュ（存在しない場合はNone）"""
+    try:
+        with open(filepath, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def load_manifest(path):
+    """マニフェストを読み込む（なければ空のマニフェスト）"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = {}
+    manifest.setdefault("templates", {})
+    manifest.setdefault("index", {})
+    return manifest
+
+
+def save_manifest(manifest, path):
+    """マニフェストを保存（一時ファイル経由で置き換える）"""
+    write_text_atomic(path, json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True))
+
+
+def get_fresh_template(manifest, filename, source_hash, extractor_version, templates_dir):
+    """
+    元ページと抽出処理が前回と同じで、出力ファイルも手を加えられていなければ前回の記録を返す
+
+    Returns:
+        dict: 前回の記録（再生成が必要な場合はNone）
+    """
+    entry = manifest["templates"].get(filename)
+    if not entry:
+        return None
+    if entry.get("source_hash") != source_hash or entry.get("extractor_version") != extractor_version:
+        return None
+    if hash_file(os.path.join(templates_dir, filename)) != entry.get("output_hash"):
+        return None
+    return entry
+
+
+def record_template(manifest, filename, url, source_hash, extractor_version, output_html, failed_page=None):
+    """テンプレートの生成結果を記録（failed_pageは複数問題ページで問題が不足していた場合の情報）"""
+    manifest["templates"][filename] = {
+        "url": url,
+        "source_hash": source_hash,
+        "extractor_version": extractor_version,
+        "output_hash": hash_text(output_html),
+        "failed_page": failed_page,
+    }
+
+
+def get_index_inputs(html_files):
+    """index.htmlの入力（テンプレートのファイル名 -> ハッシュ）"""
+    return {os.path.basename(f): hash_file(f) for f in html_files}
+
+
+def is_index_fresh(manifest, inputs, output_files, options=None):
+    """入力のテンプレートと生成の設定が前回と同じで、出力ファイルも手を加えられていなければTrue"""
+    entry = manifest["index"]
+    if entry.get("inputs") != inputs or entry.get("options") != options:
+        return False
+    outputs = entry.get("outputs") or {}
+    if set(outputs) != set(output_files):
+        return False
+    return all(hash_file(f) == outputs[f] for f in output_files)
+
+
+def record_index(manifest, inputs, output_files, options=None):
+    """インデックス（index.htmlと、分割した場合は各ファイル）の生成結果を記録"""
+    manifest["index"] = {
+        "inputs": inputs,
+        "options": options,
+        "outputs": {f: hash_file(f) for f in output_files},
+    }
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全ての処理の入り口（設定ファイル yakugaku.toml を1回だけ読み込んで、各処理に渡す）
+
+使い方: python yakugaku.py <コマンド> [オプション...] [ファイル名...]
+    共通のオプション: --config=設定ファイル（省略時は環境変数 YAKUGAKU_CONFIG か src/yakugaku.toml）
+"""
+
+import sys
+
+from config import get_config
+
+# コマンド: (説明, 使えるオプション)
+COMMANDS = {
+    "build": ("問題を取得してテンプレートとインデックスを作成", ["dry-run"]),
+    "index": ("テンプレートからインデックスだけを作り直す", ["mode"]),
+    "lint": ("テンプレートの構造を確認（--fixで修正）", ["fix", "dry-run", "rules"]),
+    "verify": ("テンプレートを元ページと比較してレポートを作成", ["multi", "checks", "no-cache"]),
+    "fix-multi": ("複数問題ページの不足している問題を元ページから追加", ["dry-run"]),
+    "legacy": ("旧形式（全問題を1つのHTML）で作成（main.py）", []),
+    "config": ("読み込んだ設定を表示", []),
+}
+COMMON_OPTIONS = ["config"]
+
+
+def print_usage():
+    print("使い方: python yakugaku.py <コマンド> [オプション...] [ファイル名...]")
+    print("\nコマンド:")
+    for name, (description, options) in COMMANDS.items():
+        option_text = " ".join(f"--{option}" for option in options)
+        print(f"  {name:<10} {description}" + (f"（{option_text}）" if option_text else ""))
+    print("\n共通のオプション:")
+    print("  --config=設定ファイル")
+
+
+def parse_args(args):
+    """
+    コマンドラインを「--名前=値」「--名前」とそれ以外に分ける
+
+    Returns:
+        tuple: ({名前: 値（値がなければTrue）}, それ以外の引数のリスト)
+    """
+    options = {}
+    positional = []
+    for arg in args:
+        if arg.startswith("--"):
+            name, has_value, value = arg[2:].partition("=")
+            options[name] = value if has_value else True
+        else:
+            positional.append(arg)
+    return options, positional
+
+
+def run_build(config, options, filenames):
+    from new2 import main as build_main
+    build_main(dry_run="dry-run" in options)
+
+
+def run_index(config, options, filenames):
+    from new2 import create_index_html
+    create_index_html(config["paths"]["templates"], mode=options.get("mode"))
+
+
+def run_lint(config, options, filenames):
+    from template_lint import RULES, RULE_CHECKS, main as lint_main
+    rules = tuple(options["rules"].split(",")) if "rules" in options else RULES
+    unknown = [rule for rule in rules if rule not in RULE_CHECKS]
+    if unknown:
+        print(f"✗ 不明なルール: {', '.join(unknown)}（{', '.join(RULES)} から選択）")
+        sys.exit(1)
+    lint_main(
+        filenames or None, rules, fix="fix" in options, templates_dir=config["paths"]["templates"],
+        dry_run="dry-run" in options, workers=config["concurrency"]["workers"],
+    )
+
+
+def run_verify(config, options, filenames):
+    from verification import CHECKS, get_multi_question_filenames, main as verify_main
+    templates_dir = config["paths"]["templates"]
+    checks = tuple(options["checks"].split(",")) if "checks" in options else CHECKS
+    if "multi" in options:
+        filenames = get_multi_question_filenames(templates_dir)
+    verify_main(
+        filenames or None, checks, templates_dir=templates_dir,
+        use_cache=config["cache"]["verify_results"] and "no-cache" not in options,
+        workers=config["concurrency"]["workers"], cache_path=config["paths"]["verify_cache"],
+    )
+
+
+def run_fix_multi(config, options, filenames):
+    from fix_multi_questions import main as fix_multi_main
+    fix_multi_main(dry_run="dry-run" in options, templates_dir=config["paths"]["templates"])
+
+
+def run_legacy(config, options, filenames):
+    from main import main as legacy_main
+    legacy_main()
+
+
+def run_config(config, options, filenames):
+    print(f"設定ファイル: {config['file']}")
+    for section in ("paths", "build", "concurrency", "cache"):
+        print(f"[{section}]")
+        for key, value in config[section].items():
+            print(f"  {key} = {value}")
+    print("[questions]")
+    for exam_number, question_numbers in config["questions"].items():
+        print(f"  第{exam_number}回: {len(question_numbers)}問")
+
+
+RUNNERS = {
+    "build": run_build,
+    "index": run_index,
+    "lint": run_lint,
+    "verify": run_verify,
+    "fix-multi": run_fix_multi,
+    "legacy": run_legacy,
+    "config": run_config,
+}
+
+
+def main(args):
+    if not args or args[0] in ("help", "-h", "--help"):
+        print_usage()
+        return 0
+    command = args[0]
+    if command not in COMMANDS:
+        print(f"✗ 不明なコマンド: {command}\n")
+        print_usage()
+        return 1
+    options, filenames = parse_args(args[1:])
+    unknown = sorted(set(options) - set(COMMANDS[command][1]) - set(COMMON_OPTIONS))
+    if unknown:
+        print(f"✗ {command} では使えないオプション: {', '.join('--' + name for name in unknown)}")
+        return 1
+
+    if options.get("config") is True:
+        print("✗ --config=設定ファイル のように指定してください")
+        return 1
+    try:
+        config = get_config(options.get("config"))
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    RUNNERS[command](config, options, filenames)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+問題の取得・サイトの作成の設定（yakugaku.toml）を読み込む
+
+取得する問題（回数ごとの問番号）・出力先・並列数・キャッシュの設定を1つのファイルにまとめ、
+new2.py / main.py / template_lint.py などはここから読む。
+- 設定ファイルは src/yakugaku.toml（環境変数 YAKUGAKU_CONFIG か、cli.py の --config= で変更できる）
+- パスは設定ファイルのあるディレクトリからの相対パス
+- 読み込みはプロセス内で1回だけ（get_config()）。読み込んだときにパーサー・並列取得・HTTPキャッシュの設定も反映する
+"""
+
+import os
+import sys
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:
+    # Python 3.10以前
+    import tomli as tomllib
+
+import fetcher
+import http_cache
+import site_assets
+from parser_backend import set_parser_name
+
+PROJECT_ROOT = Path(__file__).parent.parent
+CONFIG_ENV = "YAKUGAKU_CONFIG"
+DEFAULT_CONFIG_PATH = PROJECT_ROOT / "yakugaku.toml"
+INDEX_MODES = ("single", "exam")
+
+# 設定ファイルで省略した項目の値
+DEFAULTS = {
+    "paths": {
+        "templates": "templates",
+        "pages": "yakugaku-251212/question_pages.json",
+        "legacy_output": "html/過去問まとめ.html",
+        "http_cache": ".cache/http",
+        "verify_cache": ".cache/verify.json",
+    },
+    "build": {
+        "index_mode": "single",
+        "parser": "",
+        "base_url": site_assets.DEFAULT_BASE_URL,
+    },
+    "concurrency": {
+        "fetch_workers": fetcher.DEFAULT_MAX_WORKERS,
+        "host_interval": fetcher.DEFAULT_HOST_INTERVAL,
+        "workers": 0,
+    },
+    "cache": {
+        "http_ttl": http_cache.DEFAULT_TTL,
+        "http_max_bytes": http_cache.DEFAULT_MAX_BYTES,
+        "verify_results": True,
+    },
+    "questions": {},
+}
+
+_config = None
+
+
+def _parse_questions(table, path):
+    """[questions] の「回数 = [問番号]」を {回数: [問番号]}（整数、回数の昇順）にする"""
+    questions = {}
+    for key, numbers in table.items():
+        if not key.isdigit():
+            raise ValueError(f"{path}: [questions] の回数は数字で指定してください: {key}")
+        if not isinstance(numbers, list) or not all(isinstance(n, int) for n in numbers):
+            raise ValueError(f"{path}: [questions] {key} は問番号（整数）のリストで指定してください")
+        questions[int(key)] = sorted(set(numbers))
+    return dict(sorted(questions.items()))
+
+
+def load_config(path=None):
+    """
+    設定ファイルを読み込む（get_config() と違い、毎回読み込んで設定の反映もしない）
+
+    Args:
+        path: 設定ファイルのパス（省略時は環境変数 YAKUGAKU_CONFIG、それもなければ src/yakugaku.toml）
+
+    Returns:
+        dict: DEFAULTSと同じ構成（pathsは絶対パス、questionsは {回数: [問番号]}、"file" は設定ファイルのパス）
+
+    Raises:
+        ValueError: 設定ファイルがない・形式が正しくない場合
+    """
+    path = Path(path or os.environ.get(CONFIG_ENV) or DEFAULT_CONFIG_PATH).resolve()
+    try:
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"設定ファイルがありません: {path}")
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"{path}: {e}")
+
+    unknown = sorted(set(data) - set(DEFAULTS))
+    if unknown:
+        raise ValueError(f"{path}: 不明な設定: {', '.join(unknown)}")
+    config = {}
+    for section, defaults in DEFAULTS.items():
+        values = data.get(section, {})
+        if section == "questions":
+            config[section] = _parse_questions(values, path)
+            continue
+        unknown = sorted(set(values) - set(defaults))
+        if unknown:
+            raise ValueError(f"{path}: [{section}] の不明な設定: {', '.join(unknown)}")
+        config[section] = {**defaults, **values}
+
+    if not config["questions"]:
+        raise ValueError(f"{path}: [questions] に取得する問題がありません")
+    if config["build"]["index_mode"] not in INDEX_MODES:
+        raise ValueError(f"{path}: index_mode は {' / '.join(INDEX_MODES)} のどれかです: {config['build']['index_mode']}")
+    if not config["build"]["base_url"].endswith("/"):
+        raise ValueError(f"{path}: base_url は「/」で終わるように指定してください: {config['build']['base_url']}")
+    config["paths"] = {key: str(path.parent / value) for key, value in config["paths"].items()}
+    if not config["concurrency"]["workers"]:
+        config["concurrency"]["workers"] = os.cpu_count() or 4
+    config["file"] = str(path)
+    return config
+
+
+def apply_config(config):
+    """パーサー・ページから参照するURL・並列取得・HTTPキャッシュの設定を反映する（各モジュールの既定値を変更する）"""
+    if config["build"]["parser"]:
+        set_parser_name(config["build"]["parser"])
+    site_assets.configure(base_url=config["build"]["base_url"])
+    fetcher.configure(
+        max_workers=config["concurrency"]["fetch_workers"],
+        host_interval=config["concurrency"]["host_interval"],
+    )
+    http_cache.configure(
+        ttl=config["cache"]["http_ttl"],
+        max_bytes=config["cache"]["http_max_bytes"],
+        cache_dir=config["paths"]["http_cache"],
+    )
+
+
+def get_config(path=None):
+    """
+    設定を返す（最初の呼び出しで読み込んで反映し、以降は同じものを返す）
+
+    pathを指定すると、そのファイルを読み込み直す（cli.py の --config=）。
+    """
+    global _config
+    if _config is None or path is not None:
+        _config = load_config(path)
+        apply_config(_config)
+    return _config
+
+
+def get_questions_to_fetch(config=None):
+    """取得する問題（{回数: [問番号のリスト]}）"""
+    return (config or get_config())["questions"]
+
+
+if __name__ == "__main__":
+    # 使い方: python config.py [設定ファイル]（読み込んだ設定を表示）
+    try:
+        loaded = load_config(sys.argv[1] if len(sys.argv) > 1 else None)
+    except ValueError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    print(f"設定ファイル: {loaded['file']}")
+    for section in DEFAULTS:
+        print(f"[{section}]")
+        for key, value in loaded[section].items():
+            print(f"  {key} = {value}")
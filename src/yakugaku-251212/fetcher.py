@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+複数のURLを並列に取得する共通フェッチャー
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# 同時に実行するリクエスト数の上限
+DEFAULT_MAX_WORKERS = 8
+# 同一ホストへのリクエストの最小間隔（秒）
+DEFAULT_HOST_INTERVAL = 0.2
+
+# fetch_all() で引数を省略したときの値（configure() で変更する）
+_settings = {"max_workers": DEFAULT_MAX_WORKERS, "host_interval": DEFAULT_HOST_INTERVAL}
+
+
+def configure(max_workers=None, host_interval=None):
+    """fetch_all() の既定値を変更する（設定ファイルの [concurrency]）"""
+    if max_workers is not None:
+        _settings["max_workers"] = max_workers
+    if host_interval is not None:
+        _settings["host_interval"] = host_interval
+
+
+class HostRateLimiter:
+    """ホストごとにリクエストの最小間隔を保証する"""
+
+    def __init__(self, interval=DEFAULT_HOST_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        """urlのホストに対して次のリクエストを送ってよい時刻まで待機"""
+        if self.interval <= 0:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def fetch_all(urls, fetch_func, max_workers=None, host_interval=None):
+    """
+    URLのリストを並列に取得し、入力と同じ順番で結果を返す
+
+    Args:
+        urls: 取得するURLのリスト
+        fetch_func: 1つのURLを受け取りHTML（失敗時はNone）を返す関数
+        max_workers: 同時に実行するリクエスト数の上限（省略時は configure() で設定した値）
+        host_interval: 同一ホストへのリクエストの最小間隔（秒）（省略時は configure() で設定した値）
+
+    Returns:
+        list: urlsと同じ順番のHTMLコンテンツのリスト（取得失敗はNone）
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+    max_workers = _settings["max_workers"] if max_workers is None else max_workers
+    host_interval = _settings["host_interval"] if host_interval is None else host_interval
+
+    limiter = HostRateLimiter(host_interval)
+
+    def fetch_one(url):
+        limiter.wait(url)
+        try:
+            return fetch_func(url)
+        except Exception as e:
+            print(f"  ✗ 予期しないエラー: {type(e).__name__} - {e} ({url})")
+            return None
+
+    workers = max(1, min(max_workers, len(urls)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # mapは入力順に結果を返すので、生成されるテンプレートの順番は逐次実行と同じになる
+        return list(executor.map(fetch_one, urls))
@@ -1,35 +1,28 @@
 #!/usr/bin/env python3
 """
 複数問題ページの不足している問題を追加するスクリプト
+対象は template_lint.py の missing-question ルールで見つかったファイル
 """
 import os
-import re
 import sys
 from pathlib import Path
-from bs4 import BeautifulSoup
-import requests
+from bs4 import BeautifulSoup, Tag
+from parser_backend import make_soup
+from http_cache import cached_get
+from image_mirror import set_responsive_attributes
+from postbuild import write_compressed
+from question_store import QUESTION_HEADING
+from template_lint import lint_html, run_lint
+from write_batch import WriteBatch
 
 # プロジェクトルートのパス
 PROJECT_ROOT = Path(__file__).parent.parent
 TEMPLATES_DIR = PROJECT_ROOT / "templates"
 
-# 修正対象のファイルとURLのマッピング
-TARGET_FILES = [
-    {
-        "file": "103-252_253.html",
-        "url": "https://yakugakulab.info/%e7%ac%ac103%e5%9b%9e%e8%96%ac%e5%89%a4%e5%b8%ab%e5%9b%bd%e5%ae%b6%e8%a9%a6%e9%a8%93%e3%80%80%e5%95%8f252%e3%80%9c253/",
-        "missing": "問253"
-    },
-    # 他のファイルも追加...
-]
-
-
 def fetch_html(url):
     """URLからHTMLを取得"""
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.text
+        return cached_get(url, timeout=10)
     except Exception as e:
         print(f"  ✗ エラー: HTML取得失敗 - {e}")
         return None
@@ -37,33 +30,22 @@ def fetch_html(url):
 
 def extract_post_content(html_content):
     """HTMLからpost_contentを抽出"""
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = make_soup(html_content)
     post_content = soup.find("div", class_="post_content")
     if not post_content:
         return None
     
-    # 画像タグの簡略化
+    # 画像タグの属性を整える（noscript内の重複した画像は削除）
     for img in post_content.find_all("img"):
-        # hrefからURLを取得（親のaタグから）
+        # 親のaタグのhref（元画像）は、src/srcsetから画像を取れない場合にだけ使う
         parent_a = img.find_parent("a")
-        if parent_a and parent_a.get("href"):
-            img_url = parent_a["href"]
-            # 画像URLを直接srcに設定
-            if img_url and not img_url.startswith("http"):
-                # 相対URLの場合は、data-srcまたはsrcsetから取得を試みる
-                if img.get("data-src"):
-                    img_url = img["data-src"]
-                elif img.get("srcset"):
-                    first_url = img["srcset"].split(",")[0].strip().split()[0]
-                    if first_url:
-                        img_url = first_url
-            if img_url.startswith("http"):
-                img["src"] = img_url
+        fallback_url = parent_a.get("href") if parent_a else None
+        # 遅延読み込み用の属性を通常のsrc/srcset/sizesに戻し、width/heightとloading="lazy"を付ける
+        set_responsive_attributes(img, fallback_url)
         
         # 不要な属性を削除
-        for attr in ["data-src", "data-srcset", "srcset", "sizes", "data-aspectratio", "decoding", "class", "lazyload", "lazyloaded"]:
-            if attr in img.attrs:
-                del img.attrs[attr]
+        if "class" in img.attrs:
+            del img.attrs["class"]
         
         # noscriptタグを削除
         noscript = img.find_parent("noscript")
@@ -73,52 +55,81 @@ def extract_post_content(html_content):
     return str(post_content)
 
 
+def get_question_heading_number(element):
+    """post_content直下の要素が「問N」の見出しならNを返す"""
+    if not isinstance(element, Tag) or element.name != "p":
+        return None
+    heading = QUESTION_HEADING.match(element.get_text("\n", strip=True))
+    return int(heading.group(2)) if heading else None
+
+
 def extract_missing_question(post_content_html, question_number):
-    """指定された問題番号の内容を抽出"""
+    """
+    指定された問題番号の内容（post_content直下の要素のHTML）を抽出
+
+    「問N」の見出しから次の問題の見出しの前まで（最後の問題ならpost_contentの最後まで）。
+    """
     soup = BeautifulSoup(post_content_html, "html.parser")
-    
-    # 問題番号のパターン（問253など）
-    pattern = f"問{question_number}"
-    
-    # すべてのpタグとolタグを検索
-    elements = soup.find_all(["p", "ol", "div"])
-    
-    question_start = None
-    question_end = None
-    
-    for i, elem in enumerate(elements):
-        text = elem.get_text()
-        if pattern in text and question_start is None:
-            question_start = i
-        elif question_start is not None:
-            # 次の問題が見つかったら終了
-            if "問" in text and pattern not in text:
-                question_end = i
-                break
-    
-    if question_start is None:
+    post_content = soup.find("div", class_="post_content")
+    if post_content is None:
         return None
-    
-    # 問題部分を抽出
-    if question_end is None:
-        question_end = len(elements)
-    
-    question_elements = elements[question_start:question_end]
-    
-    # HTMLに変換
-    result = ""
-    for elem in question_elements:
-        result += str(elem)
-    
-    return result
 
+    elements = None
+    for element in post_content.children:
+        number = get_question_heading_number(element)
+        if elements is None:
+            if number == question_number:
+                elements = [element]
+        elif number is not None:
+            break
+        else:
+            elements.append(element)
+
+    if elements is None:
+        return None
+    return "".join(str(element) for element in elements).strip()
+
+
+def insert_question(post_content, question_number, question_html):
+    """
+    問題の内容をpost_contentの問題番号順の位置に追加する
+
+    問題番号がより大きい最初の見出しの前に入れる（なければpost_contentの最後）。
+    """
+    fragment = BeautifulSoup(question_html, "html.parser")
+    anchor = next(
+        (
+            element for element in post_content.children
+            if (get_question_heading_number(element) or 0) > question_number
+        ),
+        None,
+    )
+    for element in list(fragment.contents):
+        if anchor is None:
+            post_content.append(element.extract())
+        else:
+            anchor.insert_before(element.extract())
 
-def fix_file(file_path, url, missing_question_number):
-    """ファイルを修正"""
+
+def get_missing_numbers(html_content, filename):
+    """テンプレートに足りない問題番号（template_lint の missing-question ルールで判定）"""
+    diagnostics, _ = lint_html(html_content, filename, rules=("missing-question",))
+    return {d["question_number"] for d in diagnostics if "question_number" in d}
+
+
+def fix_file(file_path, url, question_number, batch):
+    """ファイルを修正（書き込みは batch にまとめ、全ての修正が終わってから置き換える）"""
     print(f"\n処理中: {file_path.name}")
     print(f"  URL: {url}")
-    print(f"  不足: {missing_question_number}")
-    
+    print(f"  不足: 問{question_number}")
+
+    # 既存ファイルを読み込み（同じファイルを先に修正していれば、その内容）
+    # タイトルなどにも「問N」があるので、post_contentの問題番号で確認する
+    file_content = batch.read(file_path)
+    if question_number not in get_missing_numbers(file_content, file_path.name):
+        print("  ✓ 既に含まれています")
+        return True
+
     # HTMLを取得
     html_content = fetch_html(url)
     if not html_content:
@@ -132,44 +143,55 @@ def fix_file(file_path, url, missing_question_number):
         return False
     
     # 不足している問題を抽出
-    missing_content = extract_missing_question(post_content, missing_question_number)
+    missing_content = extract_missing_question(post_content, question_number)
     if not missing_content:
-        print(f"  ✗ スキップ: {missing_question_number}の抽出失敗")
+        print(f"  ✗ スキップ: 問{question_number}の抽出失敗")
         return False
-    
-    # 既存ファイルを読み込み
-    with open(file_path, "r", encoding="utf-8") as f:
-        file_content = f.read()
-    
-    # 修正（既存のpost_contentの最後に追加）
-    # </div>で終わるpost_contentの前に追加
-    pattern = r'(<p><span style="font-size: 100%;"></span></p></div>\s*</div>\s*</div>)'
-    
-    # 修正前の内容を確認
-    if missing_question_number in file_content:
-        print(f"  ✓ 既に含まれているようです")
-        return True
-    
-    # <!--Ads2-->の後に追加するパターンを探す
-    ads_pattern = r'(<!--Ads2-->)'
-    if re.search(ads_pattern, file_content):
-        replacement = f'\\1\n<p><span style="font-size: 100%;"></span></p>{missing_content}'
-        file_content = re.sub(ads_pattern, replacement, file_content)
+
+    soup = BeautifulSoup(file_content, "html.parser")
+    local_post_content = soup.find("div", class_="post_content")
+    if local_post_content is None:
+        print("  ✗ スキップ: テンプレートにpost_contentがありません")
+        return False
+    original_post_content = str(local_post_content)
+    insert_question(local_post_content, question_number, missing_content)
+
+    # テンプレートはpost_contentの文字列を埋め込んで作っているので、その部分だけ置き換える（他の部分は元のまま）
+    if original_post_content in file_content:
+        file_content = file_content.replace(original_post_content, str(local_post_content), 1)
     else:
-        # post_contentの終了タグの前に追加
-        replacement = f'<p><span style="font-size: 100%;"><!--Ads2--></span></p>\n{missing_content}\\1'
-        file_content = re.sub(pattern, replacement, file_content, count=1)
-    
-    # ファイルを保存
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(file_content)
+        file_content = str(soup)
+
+    # 書き込みを予約
+    batch.write(file_path, file_content)
     
     print(f"  ✓ 修正完了")
     return True
 
 
-def main():
-    """メイン処理"""
+def get_missing_questions(templates_dir=TEMPLATES_DIR):
+    """
+    問題が足りないテンプレートと元ページのURL
+
+    Returns:
+        list: [{"file": ファイル名, "url": 元ページのURL, "missing": 253}, ...]
+    """
+    targets = []
+    results = run_lint(templates_dir, rules=("missing-question",))
+    for path, diagnostics in sorted(results.items()):
+        with open(path, "r", encoding="utf-8") as f:
+            link = make_soup(f.read()).select_one("div.question-title a")
+        for diagnostic in diagnostics:
+            targets.append({
+                "file": os.path.basename(path),
+                "url": link.get("href") if link else None,
+                "missing": diagnostic["question_number"],
+            })
+    return targets
+
+
+def main(dry_run=False, templates_dir=TEMPLATES_DIR):
+    """メイン処理（dry_run=Trueなら書き込まずに差分を表示）"""
     print("=" * 60)
     print("複数問題ページの修正")
     print("=" * 60)
@@ -177,25 +199,30 @@ def main():
     success_count = 0
     fail_count = 0
     
-    for target in TARGET_FILES:
-        file_path = TEMPLATES_DIR / target["file"]
-        if not file_path.exists():
-            print(f"\n✗ ファイルが見つかりません: {target['file']}")
-            fail_count += 1
-            continue
-        
-        if fix_file(file_path, target["url"], target["missing"]):
-            success_count += 1
-        else:
-            fail_count += 1
+    with WriteBatch(dry_run) as batch:
+        for target in get_missing_questions(templates_dir):
+            file_path = Path(templates_dir) / target["file"]
+            if not target["url"]:
+                print(f"\n✗ 元ページのURLがありません: {target['file']}")
+                fail_count += 1
+                continue
+            
+            if fix_file(file_path, target["url"], target["missing"], batch):
+                success_count += 1
+            else:
+                fail_count += 1
+    for path in batch.committed:
+        write_compressed(path)
     
     print(f"\n{'='*60}")
     print(f"処理結果:")
     print(f"  成功: {success_count}件")
     print(f"  失敗: {fail_count}件")
+    batch.print_summary()
     print(f"{'='*60}")
 
 
 if __name__ == "__main__":
-    main()
+    # 使い方: python fix_multi_questions.py [--dry-run]
+    main(dry_run="--dry-run" in sys.argv[1:])
 
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+URLをキーにしたHTTPレスポンスのディスクキャッシュ
+
+本文はハッシュ値をファイル名にして保存し（同じ内容は1つだけ保存）、
+ETag / Last-Modified を使った条件付きリクエストで再検証する。
+インデックス（index.json）の変更はメモリ上で行い、flush()（プロセスの終了時にも自動で呼ぶ）と
+本文を削除したときにだけ書き込む。
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+import http_client
+
+# キャッシュの保存先（src/.cache/http）
+CACHE_DIR = Path(__file__).parent.parent / ".cache" / "http"
+# この秒数以内に取得したものは再検証せずにそのまま使う
+DEFAULT_TTL = 24 * 60 * 60
+# 本文の合計サイズの上限（超えたら最も古く参照されたものから削除）
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+_lock = threading.Lock()
+_index_cache = {}
+# 書き込んでいない変更があるキャッシュの保存先
+_dirty = set()
+# このプロセスで削除したURL（キャッシュの保存先ごと。書き込むときに他のプロセスの分から除く）
+_evicted = {}
+# cached_get() で引数を省略したときの値（configure() で変更する）
+_settings = {"ttl": DEFAULT_TTL, "max_bytes": DEFAULT_MAX_BYTES, "cache_dir": CACHE_DIR}
+
+
+def configure(ttl=None, max_bytes=None, cache_dir=None):
+    """cached_get() の既定値を変更する（設定ファイルの [cache] と paths.http_cache）"""
+    if ttl is not None:
+        _settings["ttl"] = ttl
+    if max_bytes is not None:
+        _settings["max_bytes"] = max_bytes
+    if cache_dir is not None:
+        _settings["cache_dir"] = Path(cache_dir)
+
+
+def _index_path(cache_dir):
+    return Path(cache_dir) / "index.json"
+
+
+def _body_path(cache_dir, digest):
+    return Path(cache_dir) / "bodies" / f"{digest}.html"
+
+
+def _load_index(cache_dir):
+    """インデックス（URL -> メタデータ）を読み込む（プロセス内では1回だけ読む）"""
+    key = str(cache_dir)
+    if key not in _index_cache:
+        try:
+            with open(_index_path(cache_dir), "r", encoding="utf-8") as f:
+                _index_cache[key] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            _index_cache[key] = {}
+    return _index_cache[key]
+
+
+def _write_atomic(path, data):
+    """一時ファイルに書き込んでから置き換える（途中で落ちても壊れたファイルを残さない）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _save_index(cache_dir, index):
+    """
+    インデックスを書き込む（_lockを取得して呼ぶ）
+
+    他のプロセスが先に書き込んだURLも残す（同じURLは取得した時刻が新しい方）。
+    """
+    key = str(cache_dir)
+    try:
+        with open(_index_path(cache_dir), "r", encoding="utf-8") as f:
+            on_disk = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        on_disk = {}
+    evicted = _evicted.get(key, set())
+    for url, entry in on_disk.items():
+        current = index.get(url)
+        if current is None:
+            if url not in evicted:
+                index[url] = entry
+        elif entry["fetched_at"] > current["fetched_at"]:
+            index[url] = {**entry, "last_access": max(entry["last_access"], current["last_access"])}
+    data = json.dumps(index, ensure_ascii=False, indent=1).encode("utf-8")
+    _write_atomic(_index_path(cache_dir), data)
+    _dirty.discard(key)
+
+
+def flush():
+    """メモリ上の変更（参照した時刻など）をindex.jsonに書き込む"""
+    with _lock:
+        for key in list(_dirty):
+            _save_index(key, _index_cache[key])
+
+
+atexit.register(flush)
+
+
+def _read_body(cache_dir, entry):
+    try:
+        with open(_body_path(cache_dir, entry["body"]), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _evict(cache_dir, index, max_bytes):
+    """
+    本文の合計サイズが上限を超えていれば、最後に参照された時刻が古い順に削除
+
+    Returns:
+        bool: 削除したものがあればTrue
+    """
+    sizes = {}
+    for entry in index.values():
+        sizes[entry["body"]] = entry["size"]
+    total = sum(sizes.values())
+    if total <= max_bytes:
+        return False
+
+    evicted = _evicted.setdefault(str(cache_dir), set())
+    for url, entry in sorted(index.items(), key=lambda item: item[1]["last_access"]):
+        if total <= max_bytes:
+            break
+        del index[url]
+        evicted.add(url)
+        digest = entry["body"]
+        # 同じ本文を他のURLが参照していなければファイルも削除
+        if not any(e["body"] == digest for e in index.values()):
+            try:
+                os.remove(_body_path(cache_dir, digest))
+            except FileNotFoundError:
+                pass
+            total -= sizes[digest]
+    return True
+
+
+def _store(cache_dir, index, url, response, body, now, max_bytes):
+    digest = hashlib.sha256(body).hexdigest()
+    body_path = _body_path(cache_dir, digest)
+    if not body_path.exists():
+        _write_atomic(body_path, body)
+    index[url] = {
+        "body": digest,
+        "size": len(body),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": now,
+        "last_access": now,
+    }
+    _evicted.get(str(cache_dir), set()).discard(url)
+    return _evict(cache_dir, index, max_bytes)
+
+
+def cached_get(url, headers=None, timeout=30, ttl=None, max_bytes=None, cache_dir=None):
+    """
+    キャッシュを使ってURLのHTMLを取得する
+
+    Args:
+        url: 取得するURL
+        headers: 追加のリクエストヘッダー
+        timeout: タイムアウト（秒）
+        ttl: 再検証せずにキャッシュを使う秒数（0なら毎回再検証）
+        max_bytes: キャッシュの本文の合計サイズの上限
+        cache_dir: キャッシュの保存先
+        （ttl・max_bytes・cache_dirは、省略時は configure() で設定した値）
+
+    Returns:
+        str: HTMLコンテンツ（UTF-8としてデコード）
+
+    Raises:
+        requests.exceptions.RequestException: 取得に失敗し、キャッシュもない場合
+    """
+    ttl = _settings["ttl"] if ttl is None else ttl
+    max_bytes = _settings["max_bytes"] if max_bytes is None else max_bytes
+    cache_dir = _settings["cache_dir"] if cache_dir is None else cache_dir
+    now = time.time()
+    with _lock:
+        index = _load_index(cache_dir)
+        entry = index.get(url)
+        body = _read_body(cache_dir, entry) if entry else None
+        if body is None:
+            entry = None
+        elif now - entry["fetched_at"] < ttl:
+            # 参照した時刻はメモリ上だけで更新する（index.jsonは flush() でまとめて書き込む）
+            entry["last_access"] = now
+            _dirty.add(str(cache_dir))
+            return body.decode("utf-8", errors="replace")
+
+    request_headers = dict(headers or {})
+    if entry:
+        if entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = http_client.get(url, headers=request_headers, timeout=timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        if entry is None:
+            raise
+        # 再検証に失敗した場合は古いキャッシュを使う
+        print(f"  ⚠ 再検証に失敗したためキャッシュを使用します: {e}")
+        return body.decode("utf-8", errors="replace")
+
+    with _lock:
+        index = _load_index(cache_dir)
+        evicted = False
+        if response.status_code == 304 and entry is not None:
+            entry["fetched_at"] = now
+            entry["last_access"] = now
+            index[url] = entry
+        else:
+            body = response.content
+            evicted = _store(cache_dir, index, url, response, body, now, max_bytes)
+        _dirty.add(str(cache_dir))
+        # 本文のファイルを削除したら、インデックスもすぐに書き込む
+        if evicted:
+            _save_index(cache_dir, index)
+
+    return body.decode("utf-8", errors="replace")
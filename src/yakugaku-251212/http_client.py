@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共通のHTTPクライアント
+
+1つのrequests.Sessionを使い回して接続を再利用し（keep-alive）、
+429/5xxや接続エラーは指数バックオフ（ジッター付き）で再試行する。
+ホストごとのトークンバケットで、並列に取得しても一定の頻度を超えないようにする。
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+# 接続プールの大きさ（fetcherの同時実行数以上にする）
+POOL_SIZE = 16
+# 再試行する回数と、対象とするステータスコード
+MAX_RETRIES = 4
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# バックオフの初期値と上限（秒）
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+# ホストごとのトークンバケット（1秒あたりのリクエスト数と、連続で送れる数）
+HOST_RATE = 5.0
+HOST_BURST = 5
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TokenBucket:
+    """ホストごとのトークンバケット（rate個/秒で補充、最大burst個まで貯まる）"""
+
+    def __init__(self, rate=HOST_RATE, burst=HOST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def acquire(self, url):
+        """urlのホストのトークンを1つ取得する（なければ補充されるまで待機）"""
+        if self.rate <= 0:
+            return
+        host = urlparse(url).netloc
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                delay = (1 - tokens) / self.rate
+            time.sleep(delay)
+
+
+_bucket = TokenBucket()
+
+
+def get_session():
+    """共有のSession（最初の呼び出しで作成）"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+        return _session
+
+
+def get_backoff(attempt, retry_after=None):
+    """attempt回目（0始まり）の再試行までの待ち時間（Retry-Afterがあればそれを優先）"""
+    if retry_after is not None:
+        try:
+            return min(BACKOFF_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    # フルジッター: 0〜base*2^attempt の一様乱数
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def get(url, headers=None, timeout=30, max_retries=MAX_RETRIES):
+    """
+    共有のSessionでGETする（429/5xx・接続エラー・タイムアウトは再試行）
+
+    Args:
+        url: 取得するURL
+        headers: 追加のリクエストヘッダー
+        timeout: タイムアウト（秒）
+        max_retries: 再試行の回数
+
+    Returns:
+        requests.Response: 最後のレスポンス（ステータスの確認は呼び出し側で行う）
+
+    Raises:
+        requests.exceptions.RequestException: 再試行しても接続できなかった場合
+    """
+    session = get_session()
+    for attempt in range(max_retries + 1):
+        _bucket.acquire(url)
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == max_retries:
+                raise
+            delay = get_backoff(attempt)
+            print(f"  ⚠ {type(e).__name__}のため{delay:.1f}秒後に再試行します ({attempt + 1}/{max_retries}): {url}")
+            time.sleep(delay)
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+            return response
+        delay = get_backoff(attempt, response.headers.get("Retry-After"))
+        print(f"  ⚠ HTTP {response.status_code}のため{delay:.1f}秒後に再試行します ({attempt + 1}/{max_retries}): {url}")
+        response.close()
+        time.sleep(delay)
+
+
+def fetch_text(url, headers=None, timeout=30):
+    """
+    URLのHTMLを取得してUTF-8の文字列で返す
+
+    Raises:
+        requests.exceptions.RequestException: 取得に失敗した場合（HTTPエラーを含む）
+    """
+    response = get(url, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    response.encoding = "utf-8"
+    return response.text
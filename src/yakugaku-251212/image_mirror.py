@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+問題の図（yakugakulab.infoの画像）をローカルに保存し、テンプレートの参照を書き換える
+
+画像は1回だけ取得し、内容のハッシュ値をファイル名にして images/ に保存する（同じ画像は1つだけ）。
+Pillowがインストールされていれば、幅を縮小したWebP（対応していればAVIFも）を作成し、
+<picture>の<source type="image/avif">・<source type="image/webp">で使う
+（対応していないブラウザは<img>の元の形式の画像を使う）。
+Pillowがない場合は、元ページのsrcsetに含まれる縮小版をそのままローカルに保存して使う。
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from io import BytesIO
+from urllib.parse import urlparse, unquote
+
+from bs4 import BeautifulSoup
+
+import http_client
+from fetcher import fetch_all
+from postbuild import write_compressed
+from site_assets import site_url
+from write_batch import WriteBatch
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+    features = None
+
+IMAGES_DIRNAME = "images"
+INDEX_FILENAME = "index.json"
+# 縮小版を作る幅（元の幅より小さいものだけ作る）
+VARIANT_WIDTHS = [300, 768, 1024]
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+# 画像のURLとして扱う拡張子
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+URL_ATTRIBUTES = ["src", "data-src"]
+SRCSET_ATTRIBUTES = ["srcset", "data-srcset"]
+# <picture>の<source>に使う形式（先頭ほど優先。ブラウザは対応している最初の<source>を使う）
+SOURCE_TYPES = [("avif", "image/avif"), ("webp", "image/webp")]
+
+
+def get_images_dir(templates_dir):
+    """画像の保存先（templatesと同じ階層の images/）"""
+    return os.path.join(os.path.dirname(os.fspath(templates_dir)), IMAGES_DIRNAME)
+
+
+def local_url(filename):
+    """保存した画像をページから参照するURL（site_assets.site_url）"""
+    return site_url(f"{IMAGES_DIRNAME}/{filename}")
+
+
+def _local_filename(url):
+    """保存した画像を参照しているURLならファイル名（以前の base_url で書き換えたものも含む）"""
+    if not url or _is_absolute_url(url) or f"{IMAGES_DIRNAME}/" not in url:
+        return None
+    return url.rsplit("/", 1)[1]
+
+
+def get_variant_formats():
+    """作成する縮小版の形式（Pillowがなければ空）"""
+    if Image is None:
+        return []
+    formats = ["webp"] if features.check("webp") else []
+    if features.check("avif"):
+        formats.append("avif")
+    return formats
+
+
+def is_remote_image(url):
+    """ローカルに保存する対象の画像URLか"""
+    if not url or not url.startswith(("http://", "https://")):
+        return False
+    return unquote(urlparse(url).path).lower().endswith(IMAGE_EXTENSIONS)
+
+
+def parse_srcset(srcset):
+    """srcsetを [(URL, 記述子), ...] に分解（例: "a.png 300w" -> ("a.png", "300w")）"""
+    candidates = []
+    for candidate in srcset.split(","):
+        parts = candidate.strip().split()
+        if parts:
+            candidates.append((parts[0], parts[1] if len(parts) > 1 else ""))
+    return candidates
+
+
+def format_srcset(candidates):
+    """[(URL, 記述子), ...] をsrcsetの文字列に戻す"""
+    return ", ".join(f"{url} {descriptor}".strip() for url, descriptor in candidates)
+
+
+def _is_absolute_url(url):
+    return bool(url) and url.startswith(("http://", "https://", "//"))
+
+
+def _descriptor_width(descriptor):
+    """srcsetの記述子の幅（"300w" -> 300、幅でなければ0）"""
+    return int(descriptor[:-1]) if descriptor.endswith("w") and descriptor[:-1].isdigit() else 0
+
+
+def set_responsive_attributes(img, fallback_url=None):
+    """
+    遅延読み込み用の属性（data-src, data-srcset）を通常のsrc/srcset/sizesに戻し、
+    width/heightとloading="lazy"を付ける（元ページが用意している縮小版を使えるようにする）
+
+    Args:
+        img: imgタグ
+        fallback_url: srcもsrcsetも使えない場合のURL（親のaタグのhrefなど）
+    """
+    src = img.get("data-src") if _is_absolute_url(img.get("data-src")) else img.get("src")
+    srcset = img.get("data-srcset") or img.get("srcset") or ""
+    candidates = [(url, descriptor) for url, descriptor in parse_srcset(srcset) if _is_absolute_url(url)]
+    candidates.sort(key=lambda candidate: _descriptor_width(candidate[1]))
+
+    # srcが相対パスやプレースホルダーの場合は、srcsetの最大の画像（元画像）を使う
+    if not _is_absolute_url(src):
+        if candidates:
+            src = candidates[-1][0]
+        elif _is_absolute_url(fallback_url):
+            src = fallback_url
+    if src:
+        img["src"] = src
+
+    # 幅・高さがなければdata-aspectratio（例: "592/393"）から補う（読み込み時のレイアウトのずれを防ぐ）
+    aspect = (img.get("data-aspectratio") or "").split("/")
+    if not (img.get("width") and img.get("height")) and len(aspect) == 2 and all(a.isdigit() for a in aspect):
+        img["width"], img["height"] = aspect
+
+    if candidates:
+        img["srcset"] = format_srcset(candidates)
+        if not img.get("sizes") and img.get("width"):
+            img["sizes"] = f"(max-width: {img['width']}px) 100vw, {img['width']}px"
+    else:
+        for attr in ["srcset", "sizes"]:
+            if attr in img.attrs:
+                del img.attrs[attr]
+
+    img["loading"] = "lazy"
+    img["decoding"] = "async"
+    for attr in ["data-src", "data-srcset", "data-aspectratio"]:
+        if attr in img.attrs:
+            del img.attrs[attr]
+    classes = [c for c in img.get("class", []) if c not in ("lazyload", "lazyloaded")]
+    if classes:
+        img["class"] = classes
+    elif "class" in img.attrs:
+        del img.attrs["class"]
+
+
+def collect_image_urls(html_content):
+    """HTML内のimgタグが参照している画像URL（src, data-src, srcset, data-srcset）を出現順に取得"""
+    soup = BeautifulSoup(html_content, "html.parser")
+    urls = []
+    for img in soup.find_all("img"):
+        for attr in URL_ATTRIBUTES:
+            urls.append(img.get(attr))
+        for attr in SRCSET_ATTRIBUTES:
+            urls.extend(url for url, _ in parse_srcset(img.get(attr, "")))
+    return list(dict.fromkeys(url for url in urls if is_remote_image(url)))
+
+
+def load_index(images_dir):
+    """保存済みの画像の記録（URL -> {file, width, height, variants}）"""
+    try:
+        with open(os.path.join(images_dir, INDEX_FILENAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_atomic(path, data):
+    """一時ファイルに書き込んでから置き換える"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_index(images_dir, index):
+    data = json.dumps(index, ensure_ascii=False, indent=1, sort_keys=True).encode("utf-8")
+    _write_atomic(os.path.join(images_dir, INDEX_FILENAME), data)
+
+
+def fetch_image(url):
+    """画像をバイト列で取得（失敗時はNone）"""
+    try:
+        response = http_client.get(url, timeout=30)
+        response.raise_for_status()
+        return response.content
+    except Exception as e:
+        print(f"  ✗ 画像の取得に失敗しました: {url} - {e}")
+        return None
+
+
+def make_variants(images_dir, digest, body):
+    """
+    幅を縮小したWebP/AVIFを作成する
+
+    Returns:
+        tuple: (元の幅, 元の高さ, {形式: {幅: ファイル名}})（Pillowがない・読めない画像は (None, None, {})）
+    """
+    formats = get_variant_formats()
+    if not formats:
+        return None, None, {}
+    try:
+        with Image.open(BytesIO(body)) as image:
+            image.load()
+            width, height = image.size
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            variants = {}
+            for variant_width in [w for w in VARIANT_WIDTHS if w < width] + [width]:
+                variant_height = max(1, round(height * variant_width / width))
+                resized = image if variant_width == width else image.resize((variant_width, variant_height), Image.LANCZOS)
+                for fmt in formats:
+                    filename = f"{digest}-{variant_width}.{fmt}"
+                    path = os.path.join(images_dir, filename)
+                    if not os.path.exists(path):
+                        buffer = BytesIO()
+                        quality = WEBP_QUALITY if fmt == "webp" else AVIF_QUALITY
+                        resized.save(buffer, format=fmt.upper(), quality=quality)
+                        _write_atomic(path, buffer.getvalue())
+                    variants.setdefault(fmt, {})[str(variant_width)] = filename
+            return width, height, variants
+    except Exception as e:
+        print(f"  ⚠ 縮小版を作成できませんでした: {digest} - {type(e).__name__}: {e}")
+        return None, None, {}
+
+
+def mirror_images(urls, images_dir):
+    """
+    画像をまだ保存していないものだけ並列に取得して保存する
+
+    Args:
+        urls: 画像URLのリスト
+        images_dir: 保存先
+
+    Returns:
+        dict: 保存済みの画像の記録（URL -> {file, width, height, variants}）
+    """
+    os.makedirs(images_dir, exist_ok=True)
+    index = load_index(images_dir)
+    missing = [
+        url for url in dict.fromkeys(urls)
+        if url not in index or not os.path.exists(os.path.join(images_dir, index[url]["file"]))
+    ]
+    if not missing:
+        return index
+
+    print(f"\n画像を取得中（{len(missing)}件）...")
+    bodies = fetch_all(missing, fetch_image)
+    saved = 0
+    for url, body in zip(missing, bodies):
+        if not body:
+            continue
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        ext = os.path.splitext(unquote(urlparse(url).path))[1].lower()
+        filename = f"{digest}{ext}"
+        path = os.path.join(images_dir, filename)
+        if not os.path.exists(path):
+            _write_atomic(path, body)
+        width, height, variants = make_variants(images_dir, digest, body)
+        index[url] = {"file": filename, "width": width, "height": height, "variants": variants}
+        saved += 1
+
+    save_index(images_dir, index)
+    print(f"  ✓ {saved}件の画像を保存しました: {images_dir}")
+    return index
+
+
+def get_variant_srcsets(entry):
+    """
+    縮小版の形式ごとのsrcset
+
+    Returns:
+        list: [(MIMEタイプ, srcset), ...]（SOURCE_TYPESの順。縮小版がなければ空）
+    """
+    variants = entry.get("variants") or {}
+    srcsets = []
+    for fmt, mime_type in SOURCE_TYPES:
+        if fmt in variants:
+            by_width = sorted(variants[fmt].items(), key=lambda item: int(item[0]))
+            srcsets.append(
+                (mime_type, format_srcset([(local_url(filename), f"{width}w") for width, filename in by_width]))
+            )
+    return srcsets
+
+
+def _set_picture_sources(soup, img, srcsets, sizes):
+    """imgを<picture>で包み（包まれていればそのまま）、縮小版の<source>を入れ直す"""
+    picture = img.parent
+    if picture is None or picture.name != "picture":
+        picture = soup.new_tag("picture")
+        img.wrap(picture)
+    for source in picture.find_all("source", recursive=False):
+        source.decompose()
+    for mime_type, srcset in srcsets:
+        source = soup.new_tag("source", attrs={"type": mime_type, "srcset": srcset})
+        if sizes:
+            source["sizes"] = sizes
+        img.insert_before(source)
+
+
+def localize_images(html_content, index):
+    """
+    imgタグの画像URLを保存済みのローカルファイルに書き換える（保存できていない画像は元のURLのまま）
+
+    縮小版があれば<picture>で包み、形式ごとの<source>を付ける（imgのsrcsetの有無に関係なく）。
+    imgのsrc・srcsetは元の形式の画像のままにする（AVIF/WebPに対応していないブラウザ用）。
+
+    Returns:
+        str: 書き換えたHTML（imgタグがなければそのまま）
+    """
+    if "<img" not in html_content:
+        return html_content
+
+    # 保存した元画像（ファイル名 -> 記録）
+    entries_by_file = {entry["file"]: entry for entry in index.values()}
+
+    def local(url):
+        entry = index.get(url) or entries_by_file.get(_local_filename(url))
+        return local_url(entry["file"]) if entry else url
+
+    # 以前の書き換えでimgのsrcsetに入れた縮小版（元の形式ではないので、imgからは外す）
+    variant_files = {
+        filename
+        for entry in index.values()
+        for by_width in (entry.get("variants") or {}).values()
+        for filename in by_width.values()
+    }
+
+    soup = BeautifulSoup(html_content, "html.parser")
+    for img in soup.find_all("img"):
+        original = img.get("data-src") or img.get("src")
+        # 書き換え済みのimgは、srcがローカルの元画像
+        entry = index.get(original) or entries_by_file.get(_local_filename(original))
+        for attr in URL_ATTRIBUTES:
+            if img.get(attr):
+                img[attr] = local(img[attr])
+        for attr in SRCSET_ATTRIBUTES:
+            if img.get(attr):
+                candidates = [
+                    (local(url), descriptor) for url, descriptor in parse_srcset(img[attr])
+                    if _local_filename(url) not in variant_files
+                ]
+                if candidates:
+                    img[attr] = format_srcset(candidates)
+                else:
+                    del img.attrs[attr]
+
+        srcsets = get_variant_srcsets(entry) if entry else []
+        if srcsets:
+            width = img.get("width") or entry.get("width")
+            sizes = img.get("sizes") or (f"(max-width: {width}px) 100vw, {width}px" if width else None)
+            _set_picture_sources(soup, img, srcsets, sizes)
+    return str(soup)
+
+
+def mirror_templates(templates_dir, dry_run=False):
+    """
+    保存済みのテンプレートの画像をローカルに保存し、参照を書き換える（dry_runなら差分を表示するだけ）
+
+    書き換えたテンプレートは隣の.gz（と.br）も作り直す（事前圧縮を配信するサーバーで古い内容が返らないように）。
+    """
+    templates_dir = os.fspath(templates_dir)
+    images_dir = get_images_dir(templates_dir)
+    filepaths = sorted(
+        os.path.join(templates_dir, f) for f in os.listdir(templates_dir)
+        if f.endswith(".html") and f != "index.html"
+    )
+    contents = {}
+    for filepath in filepaths:
+        with open(filepath, "r", encoding="utf-8") as f:
+            contents[filepath] = f.read()
+
+    urls = [url for html_content in contents.values() for url in collect_image_urls(html_content)]
+    index = mirror_images(urls, images_dir)
+
+    with WriteBatch(dry_run) as batch:
+        for filepath, html_content in contents.items():
+            batch.write(filepath, localize_images(html_content, index))
+    for filepath in batch.committed:
+        write_compressed(filepath)
+    print(f"✓ {len(batch.changed)}個のテンプレートの画像参照を書き換えました")
+    batch.print_summary()
+
+
+if __name__ == "__main__":
+    # 例: python image_mirror.py [--dry-run] ../templates
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    mirror_templates(
+        args[0] if args else os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates"),
+        dry_run="--dry-run" in sys.argv[1:],
+    )
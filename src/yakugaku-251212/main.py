@@ -4,12 +4,15 @@
 HTMLファイルから問題、解答、解説を抽出してシンプルなHTMLを作成する
 """
 
-from bs4 import BeautifulSoup
+from parser_backend import make_soup
 import os
 import re
 import requests
+from http_client import fetch_text
 from urllib.parse import quote
-from pages import build_question_pages_dict, save_pages_dict, load_pages_dict
+from pages import refresh_question_pages
+from fetcher import fetch_all
+from config import get_config, get_questions_to_fetch
 
 
 def get_question_url(exam_number, question_number):
@@ -23,13 +26,8 @@ def get_question_url(exam_number, question_number):
 def fetch_html_from_url(url):
     """URLからHTMLコンテンツを取得"""
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        response.encoding = "utf-8"
-        html_content = response.text
+        # 共有のSessionで取得（接続の再利用と、429/5xxの再試行はhttp_clientで行う）
+        html_content = fetch_text(url, timeout=30)
 
         # 正常に取得できたかを確認
         if html_content and len(html_content) > 0:
@@ -57,7 +55,7 @@ def extract_multiple_questions(html_content, source_name="問題"):
     if not html_content:
         raise ValueError(f"HTMLコンテンツがNoneです: {source_name}")
 
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = make_soup(html_content)
 
     # タイトルを取得
     title_tag = soup.find("h1", class_="c-postTitle__ttl")
@@ -263,7 +261,7 @@ def extract_single_question(html_content, source_name="問題"):
     if not html_content:
         raise ValueError(f"HTMLコンテンツがNoneです: {source_name}")
 
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = make_soup(html_content)
 
     # タイトルを取得
     title_tag = soup.find("h1", class_="c-postTitle__ttl")
@@ -634,40 +632,17 @@ def create_simple_html(questions_data):
 
 
 def main():
-    # 出力ファイルのパス
-    output_file = "/Users/diabolo/dev/temp/tonao/html/過去問まとめ.html"
-    pages_file = "/Users/diabolo/dev/temp/tonao/yakugaku-251212/question_pages.json"
+    # 出力ファイルのパスと取得する問題は設定ファイル（yakugaku.toml）から読む
+    config = get_config()
+    output_file = config["paths"]["legacy_output"]
+    pages_file = config["paths"]["pages"]
 
     # 取得する問題のリスト（回数: [問番号のリスト]）
-    questions_to_fetch = {
-        101: [57, 182, 185, 200, 292, 293, 329],
-        102: [57, 192, 250, 251, 290, 291, 304, 305, 324, 332],
-        103: [68, 246, 247, 252, 253, 272, 273, 276, 277, 288, 289, 343],
-        104: [56, 58, 60, 192, 193, 198, 208, 214, 252, 253, 260, 263, 270, 271, 314, 334],
-        105: [56, 63, 163, 164, 185, 187, 216, 217, 254, 255, 329, 338, 339],
-        106: [159, 160, 161, 185, 288, 289],
-        107: [159, 160, 248, 249, 252, 253, 290, 291, 298, 299, 318, 324, 326, 344],
-        108: [157, 159, 185, 186, 202, 252, 258, 292, 293, 294, 295, 297],
-        109: [61, 160, 165, 166, 188, 220, 221, 254, 255, 290, 292, 293],
-        110: [56, 58, 59, 111, 156, 157, 158, 197, 211, 254, 255, 292, 312],
-    }
-
-    # 問題ページの辞書を取得（既存のファイルがあれば読み込み、なければ探索）
+    questions_to_fetch = get_questions_to_fetch(config)
+
+    # 問題ページの辞書を取得（不足している回数は全ページ、探索から時間が経った回数は新しい記事だけを差分で探索）
     print("問題ページの辞書を取得中...")
-    pages = load_pages_dict(pages_file)
-    
-    # 必要な回数のページが不足している場合は探索
-    needed_exam_numbers = set(questions_to_fetch.keys())
-    existing_exam_numbers = set(pages.keys())
-    missing_exam_numbers = needed_exam_numbers - existing_exam_numbers
-    
-    if missing_exam_numbers:
-        print(f"不足している回数を探索します: {sorted(missing_exam_numbers)}")
-        new_pages = build_question_pages_dict(sorted(missing_exam_numbers))
-        # 辞書のキーを文字列から整数に変換
-        for exam_num in new_pages:
-            pages[int(exam_num)] = {int(k): v for k, v in new_pages[exam_num].items()}
-        save_pages_dict(pages, pages_file)
+    pages = refresh_question_pages(sorted(questions_to_fetch.keys()), pages_file)
     
     # 問題ページの辞書からURLを取得する関数
     def get_question_url_from_pages(exam_number, question_number):
@@ -688,70 +663,73 @@ def main():
     success_count = 0
     failure_count = 0
 
+    # 取得対象のURLを先に解決してから、まとめて並列に取得（結果は入力順）
+    # URLを解決できなかった問題は取得せず、下のループで他のエラーと同じように数える
+    targets = []
     for exam_number, question_numbers in questions_to_fetch.items():
         for question_number in question_numbers:
-            print(f"\n処理中: 第{exam_number}回 問{question_number}")
-            url = get_question_url_from_pages(exam_number, question_number)
-            print(f"  URL: {url}")
-
             try:
-                html_content = fetch_html_from_url(url)
-                if not html_content:
-                    print(f"  ✗ スキップ: HTMLを取得できませんでした")
-                    failure_count += 1
-                    continue
-
-                # HTMLコンテンツから問題を抽出
-                try:
-                    result = extract_question_content(
-                        html_content,
-                        source_name=f"第{exam_number}回問{question_number}",
-                    )
-                    
-                    # 複数の問題が返された場合（リスト）
-                    if isinstance(result, list):
-                        for title, question_html, choices, answer_html, explanation_html in result:
-                            # 抽出結果の検証
-                            if not question_html:
-                                print(f"  ⚠ 警告: 問題文が抽出できませんでした - {title}")
-                                continue
-                            if not answer_html and not explanation_html:
-                                print(f"  ⚠ 警告: 解答・解説が抽出できませんでした - {title}")
-                                continue
-                            
-                            questions_data.append(
-                                (title, question_html, choices, answer_html, explanation_html)
-                            )
-                            print(f"  ✓ 抽出成功: {title}")
-                    else:
-                        # 単一の問題が返された場合（タプル）
-                        title, question_html, choices, answer_html, explanation_html = result
-                        
-                        # 抽出結果の検証
-                        if not question_html:
-                            raise ValueError(f"問題文が抽出できませんでした")
-                        if not answer_html and not explanation_html:
-                            raise ValueError(f"解答・解説が抽出できませんでした")
-
-                        questions_data.append(
-                            (title, question_html, choices, answer_html, explanation_html)
-                        )
-                        print(f"  ✓ 抽出成功: {title}")
-                    success_count += 1
-
-                except ValueError as e:
-                    print(f"  ✗ エラー: {e}")
-                    failure_count += 1
-                    continue
-                except Exception as e:
-                    print(f"  ✗ 予期しないエラー: {type(e).__name__} - {e}")
-                    failure_count += 1
-                    continue
-
+                url = get_question_url_from_pages(exam_number, question_number)
+                targets.append((exam_number, question_number, url, None))
             except Exception as e:
-                print(f"  ✗ 予期しないエラー: {type(e).__name__} - {e}")
-                failure_count += 1
-                continue
+                targets.append((exam_number, question_number, None, e))
+    print(f"問題ページを並列に取得中... ({len(targets)}件)")
+    fetched = iter(fetch_all([url for _, _, url, error in targets if error is None], fetch_html_from_url))
+
+    for exam_number, question_number, url, url_error in targets:
+        print(f"\n処理中: 第{exam_number}回 問{question_number}")
+        print(f"  URL: {url}")
+        html_content = next(fetched) if url_error is None else None
+
+        try:
+            if url_error is not None:
+                raise url_error
+            if not html_content:
+                raise ValueError("HTMLを取得できませんでした")
+
+            # HTMLコンテンツから問題を抽出
+            result = extract_question_content(
+                html_content,
+                source_name=f"第{exam_number}回問{question_number}",
+            )
+
+            # 複数の問題が返された場合（リスト）
+            if isinstance(result, list):
+                for title, question_html, choices, answer_html, explanation_html in result:
+                    # 抽出結果の検証
+                    if not question_html:
+                        print(f"  ⚠ 警告: 問題文が抽出できませんでした - {title}")
+                        continue
+                    if not answer_html and not explanation_html:
+                        print(f"  ⚠ 警告: 解答・解説が抽出できませんでした - {title}")
+                        continue
+
+                    questions_data.append(
+                        (title, question_html, choices, answer_html, explanation_html)
+                    )
+                    print(f"  ✓ 抽出成功: {title}")
+            else:
+                # 単一の問題が返された場合（タプル）
+                title, question_html, choices, answer_html, explanation_html = result
+
+                # 抽出結果の検証
+                if not question_html:
+                    raise ValueError(f"問題文が抽出できませんでした")
+                if not answer_html and not explanation_html:
+                    raise ValueError(f"解答・解説が抽出できませんでした")
+
+                questions_data.append(
+                    (title, question_html, choices, answer_html, explanation_html)
+                )
+                print(f"  ✓ 抽出成功: {title}")
+            success_count += 1
+
+        except ValueError as e:
+            print(f"  ✗ エラー: {e}")
+            failure_count += 1
+        except Exception as e:
+            print(f"  ✗ 予期しないエラー: {type(e).__name__} - {e}")
+            failure_count += 1
 
     # 統計情報を表示
     total_count = success_count + failure_count
@@ -4,11 +4,15 @@
 post_contentの中身をそのまま取得してHTMLを作成する
 """
 
-from bs4 import BeautifulSoup
+from parser_backend import make_soup
 import requests
-import re
+from http_client import fetch_text
 from urllib.parse import quote
-from pages import build_question_pages_dict, save_pages_dict, load_pages_dict
+from pages import refresh_question_pages
+from fetcher import fetch_all
+from config import get_config, get_questions_to_fetch
+from image_mirror import set_responsive_attributes
+from site_assets import SPOILER_SCRIPT, reset_spoilers
 
 
 def get_question_url(exam_number, question_number):
@@ -22,13 +26,8 @@ def get_question_url(exam_number, question_number):
 def fetch_html_from_url(url):
     """URLからHTMLコンテンツを取得"""
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        response.encoding = "utf-8"
-        html_content = response.text
+        # 共有のSessionで取得（接続の再利用と、429/5xxの再試行はhttp_clientで行う）
+        html_content = fetch_text(url, timeout=30)
 
         if html_content and len(html_content) > 0:
             print(f"  ✓ HTML取得成功 (サイズ: {len(html_content)} bytes)")
@@ -55,7 +54,7 @@ def extract_post_content(html_content, source_name="問題"):
     if not html_content:
         raise ValueError(f"HTMLコンテンツがNoneです: {source_name}")
 
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = make_soup(html_content)
 
     # タイトルを取得
     title_tag = soup.find("h1", class_="c-postTitle__ttl")
@@ -72,48 +71,13 @@ def extract_post_content(html_content, source_name="問題"):
             f"予期しないHTML構造: post_contentクラスが見つかりません: {source_name}"
         )
 
-    # 画像タグのsrc属性を修正（data-srcがあればそれを使用、相対パスの場合は絶対URLに変換）
+    # 画像タグを通常のsrc/srcset/sizesに戻す（遅延読み込み用のdata-src/data-srcsetを使い、
+    # 元ページの縮小版を含むsrcsetとwidth/height、loading="lazy"を付ける）
     for img in post_content.find_all("img"):
-        # data-srcがあれば、それをsrcに設定
-        if img.get("data-src"):
-            img["src"] = img["data-src"]
-        # srcが相対パス（./で始まる）の場合、srcsetから最初のURLを取得
-        elif img.get("src") and img.get("src").startswith("./"):
-            # srcsetから最初のURLを取得
-            srcset = img.get("srcset", "")
-            if srcset:
-                # srcsetの形式: "url1 size1, url2 size2, ..."
-                first_url = srcset.split(",")[0].strip().split()[0]
-                if first_url:
-                    img["src"] = first_url
-            # srcsetがない場合はdata-srcを確認
-            elif img.get("data-src"):
-                img["src"] = img["data-src"]
+        set_responsive_attributes(img)
 
     # su-spoiler要素を初期状態（閉じた状態）にリセット
-    for spoiler in post_content.find_all("div", class_=re.compile("su-spoiler")):
-        # openクラスを削除して閉じた状態にする
-        classes = spoiler.get("class", [])
-        if isinstance(classes, list):
-            # open関連のクラスを削除
-            classes = [c for c in classes if c not in ["su-spoiler-open", "open"]]
-            # closedクラスを追加（まだない場合）
-            if "su-spoiler-closed" not in classes:
-                classes.append("su-spoiler-closed")
-            spoiler["class"] = classes
-        
-        # su-spoiler-contentを非表示にする
-        content = spoiler.find("div", class_=re.compile("su-spoiler-content"))
-        if content:
-            # インラインスタイルで確実に非表示にする
-            existing_style = content.get("style", "")
-            if "display" not in existing_style.lower():
-                content["style"] = existing_style + ("; " if existing_style else "") + "display: none !important;"
-            elif "display: none" not in existing_style.lower() and "display:none" not in existing_style.lower():
-                # displayが既にあるが、noneでない場合は上書き
-                content["style"] = re.sub(r'display\s*:\s*[^;]+', 'display: none !important', existing_style)
-                if "display: none !important" not in content["style"]:
-                    content["style"] = content["style"] + "; display: none !important;"
+    reset_spoilers(post_content)
 
     return page_title, str(post_content)
 
@@ -237,58 +201,7 @@ def create_html(contents):
 
     html += """
     <script>
-    document.addEventListener('DOMContentLoaded', () => {
-        document.querySelectorAll('.su-spoiler').forEach(spoiler => {
-            const title = spoiler.querySelector('.su-spoiler-title');
-            const content = spoiler.querySelector('.su-spoiler-content');
-
-            if (!content) return;
-
-            // 初期は確実に閉じる
-            spoiler.classList.remove('su-spoiler-open', 'open');
-            spoiler.classList.add('su-spoiler-closed');
-            // インラインスタイルで確実に非表示にする
-            content.style.setProperty('display', 'none', 'important');
-
-            const toggle = () => {
-                const isOpen = spoiler.classList.toggle('open');
-                spoiler.classList.toggle('su-spoiler-closed', !isOpen);
-                spoiler.classList.toggle('su-spoiler-open', isOpen);
-                if (isOpen) {
-                    content.style.setProperty('display', 'block', 'important');
-                } else {
-                    content.style.setProperty('display', 'none', 'important');
-                }
-            };
-
-            if (title) {
-                title.addEventListener('click', (e) => {
-                    e.preventDefault();
-                    e.stopPropagation();
-                    toggle();
-                });
-                title.addEventListener('keydown', (e) => {
-                    if (e.key === 'Enter' || e.key === ' ') {
-                        e.preventDefault();
-                        e.stopPropagation();
-                        toggle();
-                    }
-                });
-                // フォーカスできるように
-                if (!title.hasAttribute('tabindex')) {
-                    title.setAttribute('tabindex', '0');
-                }
-            } else {
-                // titleがない場合はspoiler全体をクリック可能にする
-                spoiler.style.cursor = 'pointer';
-                spoiler.addEventListener('click', (e) => {
-                    e.preventDefault();
-                    e.stopPropagation();
-                    toggle();
-                });
-            }
-        });
-    });
+""" + SPOILER_SCRIPT + """
     </script>
 </body>
 </html>
@@ -298,34 +211,16 @@ def create_html(contents):
 
 
 def main():
-    output_file = "/Users/diabolo/dev/temp/tonao/html/過去問まとめ.html"
-    pages_file = "/Users/diabolo/dev/temp/tonao/yakugaku-251212/question_pages.json"
+    # 出力ファイルのパスと取得する問題は設定ファイル（yakugaku.toml）から読む
+    config = get_config()
+    output_file = config["paths"]["legacy_output"]
+    pages_file = config["paths"]["pages"]
 
     # 取得する問題のリスト（辞書形式: {回数: [問番号のリスト]}）
-    questions_to_fetch = {
-        101: [57, 182, 185, 200, 292, 293, 329],
-        102: [57, 192, 250, 251, 290, 291, 304, 305, 324, 332],
-        103: [68, 246, 247, 252, 253, 272, 273, 276, 277, 288, 289, 343],
-        104: [56, 58, 60, 192, 193, 198, 208, 214, 252, 253, 260, 263, 270, 271, 314, 334],
-        105: [56, 63, 163, 164, 185, 187, 216, 217, 254, 255, 329, 338, 339],
-        106: [159, 160, 161, 185, 288, 289],
-        107: [159, 160, 248, 249, 252, 253, 290, 291, 298, 299, 318, 324, 326, 344],
-        108: [157, 159, 185, 186, 202, 252, 258, 292, 293, 294, 295, 297],
-        109: [61, 160, 165, 166, 188, 220, 221, 254, 255, 290, 292, 293],
-        110: [56, 58, 59, 111, 156, 157, 158, 197, 211, 254, 255, 292, 312],
-        # 必要に応じて追加
-    }
-
-    # ページ辞書を読み込む
-    pages = load_pages_dict(pages_file)
-
-    # 不足している回数のページを構築
-    missing_exams = [exam for exam in questions_to_fetch.keys() if exam not in pages]
-    if missing_exams:
-        print(f"不足している回数のページを構築中: {missing_exams}")
-        new_pages = build_question_pages_dict(missing_exams)
-        pages.update(new_pages)
-        save_pages_dict(pages, pages_file)
+    questions_to_fetch = get_questions_to_fetch(config)
+
+    # ページ辞書を読み込む（不足している回数は全ページ、探索から時間が経った回数は新しい記事だけを差分で探索）
+    pages = refresh_question_pages(list(questions_to_fetch.keys()), pages_file)
 
     def get_question_url_from_pages(exam_number, question_number):
         """pages辞書からURLを取得、なければ生成"""
@@ -341,47 +236,42 @@ def main():
     print("問題を取得中...")
     print("=" * 60)
 
-    for exam_number, question_numbers in questions_to_fetch.items():
-        for question_number in question_numbers:
-            print(f"\n第{exam_number}回 問{question_number} を処理中...")
-
-            try:
-                # URLを取得
-                url = get_question_url_from_pages(exam_number, question_number)
-                print(f"  URL: {url}")
-
-                # HTMLを取得
-                html_content = fetch_html_from_url(url)
-                if not html_content:
-                    print(f"  ✗ スキップ: HTMLを取得できませんでした")
-                    failure_count += 1
-                    continue
-
-                # post_contentを抽出
-                try:
-                    page_title, post_content_html = extract_post_content(
-                        html_content,
-                        source_name=f"第{exam_number}回問{question_number}",
-                    )
-                    
-                    title = f"第{exam_number}回 問{question_number}"
-                    contents.append((title, post_content_html))
-                    print(f"  ✓ 抽出成功: {title}")
-                    success_count += 1
-
-                except ValueError as e:
-                    print(f"  ✗ エラー: {e}")
-                    failure_count += 1
-                    continue
-                except Exception as e:
-                    print(f"  ✗ 予期しないエラー: {type(e).__name__} - {e}")
-                    failure_count += 1
-                    continue
-
-            except Exception as e:
-                print(f"  ✗ 予期しないエラー: {type(e).__name__} - {e}")
-                failure_count += 1
-                continue
+    # 取得対象を並べてからまとめて並列に取得（結果は入力順）
+    targets = [
+        (exam_number, question_number, get_question_url_from_pages(exam_number, question_number))
+        for exam_number, question_numbers in questions_to_fetch.items()
+        for question_number in question_numbers
+    ]
+    html_contents = fetch_all([url for _, _, url in targets], fetch_html_from_url)
+
+    for (exam_number, question_number, url), html_content in zip(targets, html_contents):
+        print(f"\n第{exam_number}回 問{question_number} を処理中...")
+        print(f"  URL: {url}")
+
+        if not html_content:
+            print(f"  ✗ スキップ: HTMLを取得できませんでした")
+            failure_count += 1
+            continue
+
+        # post_contentを抽出
+        try:
+            page_title, post_content_html = extract_post_content(
+                html_content,
+                source_name=f"第{exam_number}回問{question_number}",
+            )
+        except ValueError as e:
+            print(f"  ✗ エラー: {e}")
+            failure_count += 1
+            continue
+        except Exception as e:
+            print(f"  ✗ 予期しないエラー: {type(e).__name__} - {e}")
+            failure_count += 1
+            continue
+
+        title = f"第{exam_number}回 問{question_number}"
+        contents.append((title, post_content_html))
+        print(f"  ✓ 抽出成功: {title}")
+        success_count += 1
 
     # 統計情報を表示
     total_count = success_count + failure_count
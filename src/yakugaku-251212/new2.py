@@ -4,12 +4,34 @@
 post_contentの中身をそのまま取得してHTMLを作成する
 """
 
-from bs4 import BeautifulSoup
+from bs4 import Comment, NavigableString
+from parser_backend import make_soup
 import requests
 import re
 import os
 from urllib.parse import quote
-from pages import build_question_pages_dict, save_pages_dict, load_pages_dict
+from pages import refresh_question_pages
+from fetcher import fetch_all
+from http_cache import cached_get
+from build_manifest import (
+    get_manifest_path, load_manifest, save_manifest, hash_text, get_fresh_template,
+    record_template, get_index_inputs, is_index_fresh, record_index,
+)
+from question_store import load_question_store, get_store_path
+from site_assets import reset_spoilers, get_assets_dir, write_site_assets, get_asset_version, site_url
+from search_index import SEARCH_INDEX_FILENAME, SEARCH_INDEX_VERSION, get_question_anchor, write_search_index
+from service_worker import SW_FILENAME, get_service_worker_paths, write_service_worker
+from postbuild import strip_wordpress_cruft, write_compressed, get_compressed_paths, optimize_html_files, print_size_report
+from write_batch import WriteBatch
+from config import INDEX_MODES, get_config, get_questions_to_fetch
+from image_mirror import (
+    collect_image_urls, mirror_images, localize_images, get_images_dir, set_responsive_attributes,
+)
+
+# 抽出・HTML生成の処理を変更したら上げる（マニフェストに記録され、全テンプレートが再生成される）
+EXTRACTOR_VERSION = "8"
+# インデックスの生成（問題ブロックの切り出し・書き出し）を変更したら上げる（インデックスが再生成される）
+INDEX_VERSION = "2"
 
 
 def get_question_url(exam_number, question_number):
@@ -23,13 +45,8 @@ def get_question_url(exam_number, question_number):
 def fetch_html_from_url(url):
     """URLからHTMLコンテンツを取得"""
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        response.encoding = "utf-8"
-        html_content = response.text
+        # 取得済みのページはディスクキャッシュから返し、古くなったものは条件付きリクエストで再検証
+        html_content = cached_get(url, timeout=30)
 
         if html_content and len(html_content) > 0:
             print(f"  ✓ HTML取得成功 (サイズ: {len(html_content)} bytes)")
@@ -51,6 +68,36 @@ def fetch_html_from_url(url):
         return None
 
 
+def plan_question_urls(questions_to_fetch, pages):
+    """
+    取得する問題をURLごとにまとめる
+
+    question_pages.jsonの辞書で各問題をURLに解決し、複数問題ページ（問250〜251など）は
+    1つのURLにまとめる。URLは最初に現れた順番を保つ。
+
+    Args:
+        questions_to_fetch: {回数: [問番号のリスト]}
+        pages: load_pages_dictで読み込んだ辞書
+
+    Returns:
+        dict: {url: [(回数, 問番号), ...]}
+    """
+    planned_urls = {}
+    for exam_number, question_numbers in questions_to_fetch.items():
+        for question_number in question_numbers:
+            if exam_number in pages and question_number in pages[exam_number]:
+                url = pages[exam_number][question_number]
+            else:
+                url = get_question_url(exam_number, question_number)
+            planned_urls.setdefault(url, []).append((exam_number, question_number))
+    return planned_urls
+
+
+def get_template_filename(exam_number, question_numbers):
+    """テンプレートのファイル名（例: 101-57.html, 102-250_251.html）"""
+    return f"{exam_number}-{'_'.join(str(q) for q in sorted(question_numbers))}.html"
+
+
 def extract_questions_250_251_from_url(url):
     """
     指定されたURL（第102回 問250〜251）から問250と問251の両方を確実に取得する専用関数
@@ -69,7 +116,7 @@ def extract_questions_250_251_from_url(url):
         print(f"  ✗ エラー: HTMLを取得できませんでした")
         return None
     
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = make_soup(html_content)
     
     # タイトルを取得
     title_tag = soup.find("h1", class_="c-postTitle__ttl")
@@ -85,18 +132,9 @@ def extract_questions_250_251_from_url(url):
         print(f"  ✗ エラー: post_contentが見つかりません")
         return None
     
-    # 画像タグのsrc属性を修正
+    # 画像タグを通常のsrc/srcset/sizesに戻す（元ページの縮小版を使えるようにする）
     for img in post_content.find_all("img"):
-        if img.get("data-src"):
-            img["src"] = img["data-src"]
-        elif img.get("src") and img.get("src").startswith("./"):
-            srcset = img.get("srcset", "")
-            if srcset:
-                first_url = srcset.split(",")[0].strip().split()[0]
-                if first_url:
-                    img["src"] = first_url
-            elif img.get("data-src"):
-                img["src"] = img["data-src"]
+        set_responsive_attributes(img)
     
     # post_contentを文字列に変換
     post_content_str = str(post_content)
@@ -116,51 +154,10 @@ def extract_questions_250_251_from_url(url):
         print(f"  ✓ 問251を検出")
     
     # su-spoiler-contentが空の場合、その直後の「解答」や「解説」を含む要素を移動
-    # 複数問題に対応したパターン
-    pattern1 = r'(<div[^>]*class="[^"]*su-spoiler-content[^"]*"[^>]*>)\s*</div>(\s*</div>\s*</span>\s*</p>\s*<p[^>]*>.*?(?:解答|解説).*?</p>(?:\s*<p[^>]*>.*?</p>)*?)(?=<div[^>]*class="[^"]*su-spoiler[^"]*"[^>]*>|問\d+[^<]*<strong|<!--Ads|</div>\s*</div>\s*</div>\s*$)'
-    pattern2 = r'(<div[^>]*class="[^"]*su-spoiler-content[^"]*"[^>]*>)\s*<p></p>\s*</div>(\s*</div>\s*</p>\s*<p[^>]*>.*?(?:解答|解説).*?</p>(?:\s*<p[^>]*>.*?</p>)*?)(?=<div[^>]*class="[^"]*su-spoiler[^"]*"[^>]*>|問\d+[^<]*<strong|<!--Ads|</div>\s*</div>\s*</div>\s*$)'
-    
-    def move_content_to_spoiler(match):
-        spoiler_content_start = match.group(1)
-        content_to_move = match.group(2)
-        content_cleaned = re.sub(r'</div>\s*</span>\s*</p>\s*', '', content_to_move)
-        content_cleaned = re.sub(r'</div>\s*</p>\s*', '', content_cleaned)
-        return spoiler_content_start + content_cleaned + "</div>"
-    
-    # 正規表現で置換（複数回マッチする可能性があるため、繰り返し処理）
-    max_iterations = 10
-    iteration = 0
-    while iteration < max_iterations:
-        new_str = re.sub(pattern1, move_content_to_spoiler, post_content_str, flags=re.DOTALL)
-        new_str = re.sub(pattern2, move_content_to_spoiler, new_str, flags=re.DOTALL)
-        if new_str == post_content_str:
-            break
-        post_content_str = new_str
-        iteration += 1
-    
-    # 修正した文字列を再パース
-    post_content = BeautifulSoup(post_content_str, "html.parser")
-    if isinstance(post_content, BeautifulSoup):
-        post_content = post_content.find("div", class_="post_content") or post_content
+    move_answers_into_spoilers(post_content)
     
     # su-spoiler要素を初期状態（閉じた状態）にリセット
-    for spoiler in post_content.find_all("div", class_=re.compile("su-spoiler")):
-        classes = spoiler.get("class", [])
-        if isinstance(classes, list):
-            classes = [c for c in classes if c not in ["su-spoiler-open", "open"]]
-            if "su-spoiler-closed" not in classes:
-                classes.append("su-spoiler-closed")
-            spoiler["class"] = classes
-        
-        content = spoiler.find("div", class_=re.compile("su-spoiler-content"))
-        if content:
-            existing_style = content.get("style", "")
-            if "display" not in existing_style.lower():
-                content["style"] = existing_style + ("; " if existing_style else "") + "display: none !important;"
-            elif "display: none" not in existing_style.lower() and "display:none" not in existing_style.lower():
-                content["style"] = re.sub(r'display\s*:\s*[^;]+', 'display: none !important', existing_style)
-                if "display: none !important" not in content["style"]:
-                    content["style"] = content["style"] + "; display: none !important;"
+    reset_spoilers(post_content)
     
     # 最終確認: 問250と問251が含まれているか
     final_content_str = str(post_content)
@@ -181,12 +178,87 @@ def extract_questions_250_251_from_url(url):
     return page_title, final_content_str
 
 
+ANSWER_KEYWORDS = re.compile(r"解答|解説")
+QUESTION_HEADING = re.compile(r"問\d+")
+
+
+def is_spoiler_content_empty(content):
+    """su-spoiler-contentが空（空白か空のpタグだけ）ならTrue"""
+    for child in content.children:
+        if isinstance(child, NavigableString):
+            if child.strip():
+                return False
+        elif child.name != "p" or child.get_text(strip=True) or child.find(True):
+            return False
+    return True
+
+
+def is_answer_section_end(element):
+    """解答・解説の移動を止める要素（次のspoiler、次の問題の見出し、広告、p以外のタグ）ならTrue"""
+    if isinstance(element, Comment):
+        return "Ads" in element
+    if isinstance(element, NavigableString):
+        return False
+    if element.name != "p":
+        return True
+    if element.find("div", class_=re.compile("su-spoiler")):
+        return True
+    if element.find(string=lambda text: isinstance(text, Comment) and "Ads" in text):
+        return True
+    return any(QUESTION_HEADING.search(strong.get_text()) for strong in element.find_all("strong"))
+
+
+def move_answers_into_spoilers(post_content):
+    """
+    空のsu-spoiler-contentに、その直後にある「解答」「解説」のpタグを移動する
+
+    元ページでは <p><span><div class="su-spoiler">...<div class="su-spoiler-content"></div></div></span></p>
+    のようにspoilerがpタグの中にあり、解答・解説がその後ろに並んでいる。
+    解答・解説をsu-spoiler-contentの中に移し、spoilerはpタグの外（直後）に出す。
+    """
+    for content in post_content.find_all("div", class_="su-spoiler-content"):
+        if not is_spoiler_content_empty(content):
+            continue
+        spoiler = content.find_parent("div", class_="su-spoiler")
+        if spoiler is None:
+            continue
+
+        # spoilerを包んでいるpタグ（<p><span>...</span></p> または <p>...</p>）
+        wrapper = spoiler.parent
+        if wrapper.name == "span" and wrapper.parent is not None and wrapper.parent.name == "p":
+            wrapper = wrapper.parent
+        if wrapper.name != "p":
+            continue
+
+        # 次のspoiler・問題の見出し・広告までのpタグを集める
+        to_move = []
+        has_answer = False
+        for sibling in wrapper.next_siblings:
+            if isinstance(sibling, NavigableString) and not isinstance(sibling, Comment) and not sibling.strip():
+                to_move.append(sibling)
+                continue
+            if is_answer_section_end(sibling):
+                break
+            to_move.append(sibling)
+            if ANSWER_KEYWORDS.search(sibling.get_text()):
+                has_answer = True
+        if not has_answer:
+            continue
+        while to_move and isinstance(to_move[-1], NavigableString):
+            to_move.pop()
+
+        content.clear()
+        for element in to_move:
+            content.append(element.extract())
+        wrapper.insert_after(spoiler.extract())
+
+
 def extract_post_content(html_content, source_name="問題"):
     """HTMLコンテンツからpost_contentを抽出"""
     if not html_content:
         raise ValueError(f"HTMLコンテンツがNoneです: {source_name}")
 
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = make_soup(html_content)
 
     # タイトルを取得
     title_tag = soup.find("h1", class_="c-postTitle__ttl")
@@ -203,87 +275,17 @@ def extract_post_content(html_content, source_name="問題"):
             f"予期しないHTML構造: post_contentクラスが見つかりません: {source_name}"
         )
 
-    # 画像タグのsrc属性を修正（data-srcがあればそれを使用、相対パスの場合は絶対URLに変換）
+    # 画像タグを通常のsrc/srcset/sizesに戻す（遅延読み込み用のdata-src/data-srcsetを使い、
+    # 元ページの縮小版を含むsrcsetとwidth/height、loading="lazy"を付ける）
     for img in post_content.find_all("img"):
-        # data-srcがあれば、それをsrcに設定
-        if img.get("data-src"):
-            img["src"] = img["data-src"]
-        # srcが相対パス（./で始まる）の場合、srcsetから最初のURLを取得
-        elif img.get("src") and img.get("src").startswith("./"):
-            # srcsetから最初のURLを取得
-            srcset = img.get("srcset", "")
-            if srcset:
-                # srcsetの形式: "url1 size1, url2 size2, ..."
-                first_url = srcset.split(",")[0].strip().split()[0]
-                if first_url:
-                    img["src"] = first_url
-            # srcsetがない場合はdata-srcを確認
-            elif img.get("data-src"):
-                img["src"] = img["data-src"]
+        set_responsive_attributes(img)
 
     # su-spoiler-contentが空の場合、その直後の「解答」や「解説」を含む要素を移動
-    # まず、post_contentを文字列に変換して処理
-    post_content_str = str(post_content)
-    
-    # su-spoiler-contentが空の場合、その直後の要素を移動するパターン
-    # 複数問題に対応: 各su-spoiler-contentごとに処理
-    # パターン1: </div></span></p>の後に<p><span><strong>解答</strong>などがある場合（従来のパターン）
-    # パターン2: </div></p>の後に<p><span><strong>解答</strong>などがある場合（新しいパターン）
-    # 次のsu-spoiler、問***、またはpost_contentの終わりまで
-    pattern1 = r'(<div[^>]*class="[^"]*su-spoiler-content[^"]*"[^>]*>)\s*</div>(\s*</div>\s*</span>\s*</p>\s*<p[^>]*>.*?(?:解答|解説).*?</p>(?:\s*<p[^>]*>.*?</p>)*?)(?=<div[^>]*class="[^"]*su-spoiler[^"]*"[^>]*>|問\d+[^<]*<strong|<!--Ads|</div>\s*</div>\s*</div>\s*$)'
-    pattern2 = r'(<div[^>]*class="[^"]*su-spoiler-content[^"]*"[^>]*>)\s*<p></p>\s*</div>(\s*</div>\s*</p>\s*<p[^>]*>.*?(?:解答|解説).*?</p>(?:\s*<p[^>]*>.*?</p>)*?)(?=<div[^>]*class="[^"]*su-spoiler[^"]*"[^>]*>|問\d+[^<]*<strong|<!--Ads|</div>\s*</div>\s*</div>\s*$)'
-    
-    def move_content_to_spoiler(match):
-        spoiler_content_start = match.group(1)
-        content_to_move = match.group(2)
-        # 移動するコンテンツから、su-spoilerの終了タグ部分を除去
-        # </div></span></p>または</div></p>の部分を除去し、<p>以降の内容のみを取得
-        content_cleaned = re.sub(r'</div>\s*</span>\s*</p>\s*', '', content_to_move)
-        content_cleaned = re.sub(r'</div>\s*</p>\s*', '', content_cleaned)
-        return spoiler_content_start + content_cleaned + "</div>"
-    
-    # 正規表現で置換（複数回マッチする可能性があるため、繰り返し処理）
-    max_iterations = 10
-    iteration = 0
-    while iteration < max_iterations:
-        new_str = re.sub(pattern1, move_content_to_spoiler, post_content_str, flags=re.DOTALL)
-        new_str = re.sub(pattern2, move_content_to_spoiler, new_str, flags=re.DOTALL)
-        if new_str == post_content_str:
-            break
-        post_content_str = new_str
-        iteration += 1
-    
-    # 修正した文字列を再パース
-    post_content = BeautifulSoup(post_content_str, "html.parser")
-    if isinstance(post_content, BeautifulSoup):
-        post_content = post_content.find("div", class_="post_content") or post_content
-    
-    # su-spoiler要素を初期状態（閉じた状態）にリセット
+    # （パース済みのツリー上で1回だけ処理し、文字列化・再パースはしない）
+    move_answers_into_spoilers(post_content)
     
     # su-spoiler要素を初期状態（閉じた状態）にリセット
-    for spoiler in post_content.find_all("div", class_=re.compile("su-spoiler")):
-        # openクラスを削除して閉じた状態にする
-        classes = spoiler.get("class", [])
-        if isinstance(classes, list):
-            # open関連のクラスを削除
-            classes = [c for c in classes if c not in ["su-spoiler-open", "open"]]
-            # closedクラスを追加（まだない場合）
-            if "su-spoiler-closed" not in classes:
-                classes.append("su-spoiler-closed")
-            spoiler["class"] = classes
-        
-        # su-spoiler-contentを非表示にする
-        content = spoiler.find("div", class_=re.compile("su-spoiler-content"))
-        if content:
-            # インラインスタイルで確実に非表示にする
-            existing_style = content.get("style", "")
-            if "display" not in existing_style.lower():
-                content["style"] = existing_style + ("; " if existing_style else "") + "display: none !important;"
-            elif "display: none" not in existing_style.lower() and "display:none" not in existing_style.lower():
-                # displayが既にあるが、noneでない場合は上書き
-                content["style"] = re.sub(r'display\s*:\s*[^;]+', 'display: none !important', existing_style)
-                if "display: none !important" not in content["style"]:
-                    content["style"] = content["style"] + "; display: none !important;"
+    reset_spoilers(post_content)
 
     # 複数問題が含まれている場合、全ての問題が正しく含まれているか確認
     # post_content内の全ての「問***」を探す（strongタグ内、複数問題に対応）
@@ -301,294 +303,144 @@ def extract_post_content(html_content, source_name="問題"):
     return page_title, str(post_content)
 
 
-def create_single_question_html(title, post_content_html, url):
-    """単一問題用のHTMLを作成"""
+def create_single_question_html(title, post_content_html, url, assets):
+    """
+    単一問題用のHTMLを作成
+
+    Args:
+        assets: write_site_assets() の戻り値（共通のCSS・スクリプトのパス）
+    """
     html = f"""<!DOCTYPE html>
 <html lang="ja">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{title}</title>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "Hiragino Kaku Gothic ProN", "Hiragino Sans", Meiryo, sans-serif;
-            line-height: 1.6;
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 20px;
-            background-color: #f5f5f5;
-        }}
-        .question-block {{
-            background-color: white;
-            border-radius: 8px;
-            padding: 30px;
-            margin-bottom: 40px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        .question-title {{
-            font-size: 24px;
-            font-weight: bold;
-            color: #333;
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 3px solid #4CAF50;
-        }}
-        .post-content {{
-            font-size: 16px;
-            color: #444;
-        }}
-        .post-content p {{
-            margin: 15px 0;
-        }}
-        .post-content ol {{
-            margin: 15px 0;
-            padding-left: 30px;
-        }}
-        .post-content li {{
-            margin: 8px 0;
-        }}
-        .post-content img {{
-            max-width: 100%;
-            height: auto;
-            margin: 15px 0;
-            border-radius: 4px;
-        }}
-        .post-content strong {{
-            color: #2c3e50;
-        }}
-        .post-content a {{
-            color: #4CAF50;
-            text-decoration: none;
-        }}
-        .post-content a:hover {{
-            text-decoration: underline;
-        }}
-        .question-title a {{
-            color: #333;
-            text-decoration: none;
-        }}
-        .question-title a:hover {{
-            color: #4CAF50;
-            text-decoration: underline;
-        }}
-        /* su-spoilerの簡易スタイルと挙動 */
-        .su-spoiler {{
-            border: 1px solid #e0e0e0;
-            border-radius: 6px;
-            margin: 18px 0;
-            background: #fafafa;
-            overflow: hidden;
-        }}
-        .su-spoiler-title {{
-            cursor: pointer;
-            padding: 12px 14px;
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            font-weight: 600;
-            color: #2c3e50;
-            user-select: none;
-        }}
-        .su-spoiler-title:focus {{
-            outline: 2px solid #4CAF50;
-        }}
-        .su-spoiler-icon {{
-            width: 10px;
-            height: 10px;
-            border-left: 2px solid #4CAF50;
-            border-bottom: 2px solid #4CAF50;
-            transform: rotate(-45deg);
-            transition: transform 0.15s ease-out;
-            display: inline-block;
-        }}
-        .su-spoiler.open .su-spoiler-icon {{
-            transform: rotate(135deg);
-        }}
-        .su-spoiler-content {{
-            display: none !important;
-            padding: 12px 14px 18px 14px;
-            background: #fff;
-            border-top: 1px solid #e0e0e0;
-        }}
-        .su-spoiler.open .su-spoiler-content {{
-            display: block !important;
-        }}
-        /* 初期状態で確実に閉じる */
-        .su-spoiler:not(.open) .su-spoiler-content {{
-            display: none !important;
-        }}
-    </style>
+    <link rel="stylesheet" href="{assets['css']}">
+    <script src="{assets['js']}" defer></script>
 </head>
 <body>
+    <div class="container">
     <div class="question-block">
         <div class="question-title"><a href="{url}" target="_blank">{title}</a></div>
         <div class="post-content">
 {post_content_html}
         </div>
     </div>
-    <script>
-    document.addEventListener('DOMContentLoaded', () => {{
-        document.querySelectorAll('.su-spoiler').forEach(spoiler => {{
-            const title = spoiler.querySelector('.su-spoiler-title');
-            const content = spoiler.querySelector('.su-spoiler-content');
-
-            if (!content) return;
-
-            // 初期は確実に閉じる
-            spoiler.classList.remove('su-spoiler-open', 'open');
-            spoiler.classList.add('su-spoiler-closed');
-            // インラインスタイルで確実に非表示にする
-            content.style.setProperty('display', 'none', 'important');
-
-            const toggle = () => {{
-                const isOpen = spoiler.classList.toggle('open');
-                spoiler.classList.toggle('su-spoiler-closed', !isOpen);
-                spoiler.classList.toggle('su-spoiler-open', isOpen);
-                if (isOpen) {{
-                    content.style.setProperty('display', 'block', 'important');
-                }} else {{
-                    content.style.setProperty('display', 'none', 'important');
-                }}
-            }};
-
-            if (title) {{
-                title.addEventListener('click', (e) => {{
-                    e.preventDefault();
-                    e.stopPropagation();
-                    toggle();
-                }});
-                title.addEventListener('keydown', (e) => {{
-                    if (e.key === 'Enter' || e.key === ' ') {{
-                        e.preventDefault();
-                        e.stopPropagation();
-                        toggle();
-                    }}
-                }});
-                // フォーカスできるように
-                if (!title.hasAttribute('tabindex')) {{
-                    title.setAttribute('tabindex', '0');
-                }}
-            }} else {{
-                // titleがない場合はspoiler全体をクリック可能にする
-                spoiler.style.cursor = 'pointer';
-                spoiler.addEventListener('click', (e) => {{
-                    e.preventDefault();
-                    e.stopPropagation();
-                    toggle();
-                }});
-            }}
-        }});
-    }});
-    </script>
+    </div>
 </body>
 </html>
 """
     return html
 
 
-def main():
+def main(dry_run=False):
+    """
+    問題を取得してテンプレートとインデックスを作成
+
+    取得する問題と保存先は設定ファイル（yakugaku.toml）から読む。
+    dry_run=Trueなら、テンプレートを書き込まずに変更の差分を表示して終了する。
+    """
     import os
-    templates_dir = "/Users/diabolo/dev/temp/tonao/templates"
-    pages_file = "/Users/diabolo/dev/temp/tonao/yakugaku-251212/question_pages.json"
+    config = get_config()
+    templates_dir = config["paths"]["templates"]
+    pages_file = config["paths"]["pages"]
 
     # templatesディレクトリが存在しない場合は作成
     os.makedirs(templates_dir, exist_ok=True)
 
     # 取得する問題のリスト（辞書形式: {回数: [問番号のリスト]}）
-    questions_to_fetch = {
-        101: [57, 182, 185, 200, 292, 293, 329],
-        102: [57, 192, 250, 251, 290, 291, 304, 305, 324, 332],
-        103: [68, 246, 247, 252, 253, 272, 273, 276, 277, 288, 289, 343],
-        104: [56, 58, 60, 192, 193, 198, 208, 214, 252, 253, 260, 263, 270, 271, 314, 334],
-        105: [56, 63, 163, 164, 185, 187, 216, 217, 254, 255, 329, 338, 339],
-        106: [159, 160, 161, 185, 288, 289],
-        107: [159, 160, 248, 249, 252, 253, 290, 291, 298, 299, 318, 324, 326, 344],
-        108: [157, 159, 185, 186, 202, 252, 258, 292, 293, 294, 295, 297],
-        109: [61, 160, 165, 166, 188, 220, 221, 254, 255, 290, 292, 293],
-        110: [56, 58, 59, 111, 156, 157, 158, 197, 211, 254, 255, 292, 312],
-        # 必要に応じて追加
-    }
+    questions_to_fetch = get_questions_to_fetch(config)
 
-    # ページ辞書を読み込む
-    pages = load_pages_dict(pages_file)
-
-    # 不足している回数のページを構築
-    missing_exams = [exam for exam in questions_to_fetch.keys() if exam not in pages]
-    if missing_exams:
-        print(f"不足している回数のページを構築中: {missing_exams}")
-        new_pages = build_question_pages_dict(missing_exams)
-        pages.update(new_pages)
-        save_pages_dict(pages, pages_file)
-
-    def get_question_url_from_pages(exam_number, question_number):
-        """pages辞書からURLを取得、なければ生成"""
-        if exam_number in pages and question_number in pages[exam_number]:
-            return pages[exam_number][question_number]
-        else:
-            return get_question_url(exam_number, question_number)
+    # ページ辞書を読み込む（不足している回数は全ページ、探索から時間が経った回数は新しい記事だけを差分で探索）
+    pages = refresh_question_pages(list(questions_to_fetch.keys()), pages_file)
+
+    # 要求された問題を先にURLへ解決し、同じURLの問題をまとめる（1ページ=1回の取得・解析）
+    planned_urls = plan_question_urls(questions_to_fetch, pages)
+    question_total = sum(len(questions) for questions in planned_urls.values())
+
+    # 前回のビルド結果（元ページに変更がなければ抽出・生成を省略する）
+    manifest_path = get_manifest_path(templates_dir)
+    manifest = load_manifest(manifest_path)
+
+    # 共通のCSS・スクリプト（内容が変わるとファイル名が変わり、それを参照するテンプレートも再生成される）
+    assets = write_site_assets(get_assets_dir(templates_dir))
+    template_version = f"{EXTRACTOR_VERSION}:{get_asset_version(assets)}"
 
     # URLごとに問題をグループ化
-    # 構造: {url: [(exam_number, question_number, title, post_content_html, url), ...]}
+    # 構造: {url: {'post_content_html': ..., 'exam_number': ..., 'questions': [(exam_number, question_number, title), ...], 'url': url, 'source_hash': ..., 'unchanged': ...}}
     url_groups = {}
     success_count = 0
     failure_count = 0
+    unchanged_count = 0
 
     print("問題を取得中...")
+    print(f"  {question_total}問 / {len(planned_urls)}ページ")
     print("=" * 60)
 
-    for exam_number, question_numbers in questions_to_fetch.items():
-        for question_number in question_numbers:
-            print(f"\n第{exam_number}回 問{question_number} を処理中...")
+    # ユニークなURLだけをまとめて並列に取得（結果は入力順）
+    # 実際のリクエストはhttp_clientがホストごとに間隔を制御するので、キャッシュからの読み込みは待たない
+    urls = list(planned_urls)
+    html_contents = fetch_all(urls, fetch_html_from_url, host_interval=0)
+
+    for url, html_content in zip(urls, html_contents):
+        questions = planned_urls[url]
+        exam_number = questions[0][0]
+        label = "、".join(f"問{question_number}" for _, question_number in questions)
+        print(f"\n第{exam_number}回 {label} を処理中...")
+        print(f"  URL: {url}")
+
+        if not html_content:
+            print(f"  ✗ スキップ: HTMLを取得できませんでした")
+            failure_count += len(questions)
+            continue
 
-            try:
-                # URLを取得
-                url = get_question_url_from_pages(exam_number, question_number)
-                print(f"  URL: {url}")
-
-                # HTMLを取得
-                html_content = fetch_html_from_url(url)
-                if not html_content:
-                    print(f"  ✗ スキップ: HTMLを取得できませんでした")
-                    failure_count += 1
-                    continue
-
-                # post_contentを抽出
-                try:
-                    page_title, post_content_html = extract_post_content(
-                        html_content,
-                        source_name=f"第{exam_number}回問{question_number}",
-                    )
-                    
-                    title = f"第{exam_number}回 問{question_number}"
-                    
-                    # URLごとにグループ化
-                    # 同じURLの場合は、最初の1回だけHTMLを取得して、そのpost_content_htmlを共有
-                    if url not in url_groups:
-                        url_groups[url] = {
-                            'post_content_html': post_content_html,
-                            'exam_number': exam_number,
-                            'questions': [],
-                            'url': url
-                        }
-                    
-                    # 問題番号を追加
-                    url_groups[url]['questions'].append((exam_number, question_number, title))
-                    print(f"  ✓ 抽出成功: {title}")
-                    success_count += 1
-
-                except ValueError as e:
-                    print(f"  ✗ エラー: {e}")
-                    failure_count += 1
-                    continue
-                except Exception as e:
-                    print(f"  ✗ 予期しないエラー: {type(e).__name__} - {e}")
-                    failure_count += 1
-                    continue
+        # 元ページも抽出処理も前回と同じなら、抽出・生成を省略
+        source_hash = hash_text(html_content)
+        filename = get_template_filename(exam_number, [q for _, q in questions])
+        fresh_entry = get_fresh_template(manifest, filename, source_hash, template_version, templates_dir)
+        if fresh_entry:
+            url_groups[url] = {
+                'post_content_html': None,
+                'exam_number': exam_number,
+                'questions': [(e, q, f"第{e}回 問{q}") for e, q in questions],
+                'url': url,
+                'source_hash': source_hash,
+                'unchanged': fresh_entry,
+            }
+            print(f"  ✓ 変更なし: {filename}")
+            success_count += len(questions)
+            unchanged_count += 1
+            continue
 
-            except Exception as e:
-                print(f"  ✗ 予期しないエラー: {type(e).__name__} - {e}")
-                failure_count += 1
-                continue
+        # post_contentを抽出（ページに含まれる全ての問題で共有）
+        try:
+            page_title, post_content_html = extract_post_content(
+                html_content,
+                source_name=f"第{exam_number}回{label}",
+            )
+        except ValueError as e:
+            print(f"  ✗ エラー: {e}")
+            failure_count += len(questions)
+            continue
+        except Exception as e:
+            print(f"  ✗ 予期しないエラー: {type(e).__name__} - {e}")
+            failure_count += len(questions)
+            continue
+
+        url_groups[url] = {
+            'post_content_html': post_content_html,
+            'exam_number': exam_number,
+            'questions': [],
+            'url': url,
+            'source_hash': source_hash,
+            'unchanged': None,
+        }
+        for question_exam_number, question_number in questions:
+            title = f"第{question_exam_number}回 問{question_number}"
+            url_groups[url]['questions'].append((question_exam_number, question_number, title))
+            print(f"  ✓ 抽出成功: {title}")
+            success_count += 1
 
     # 統計情報を表示
     total_count = success_count + failure_count
@@ -597,15 +449,24 @@ def main():
     print(f"  成功: {success_count}問")
     print(f"  失敗: {failure_count}問")
     print(f"  合計: {total_count}問")
+    print(f"  変更なし: {unchanged_count}ページ")
     print(f"{'='*60}")
 
     if not url_groups:
         print("\n✗ エラー: 取得できた問題がありませんでした。")
         return
 
+    # 生成するページの画像をまとめてローカルに保存（取得済みの画像は再取得しない）
+    image_urls = [
+        image_url for group_data in url_groups.values() if not group_data['unchanged']
+        for image_url in collect_image_urls(group_data['post_content_html'])
+    ]
+    image_index = mirror_images(image_urls, get_images_dir(templates_dir)) if image_urls else {}
+    
     # 各URLグループごとにファイルを作成
     print(f"\nHTMLファイルを生成中...")
     file_count = 0
+    batch = WriteBatch(dry_run)
     
     # 複数問題ページで問題が正しく反映されなかったものを記録
     failed_multi_question_pages = []
@@ -616,10 +477,18 @@ def main():
         questions = group_data['questions']
         url = group_data.get('url', url)
         
+        # 変更のないページは既存のテンプレートをそのまま使う
+        if group_data['unchanged']:
+            failed_page = group_data['unchanged'].get('failed_page')
+            if failed_page:
+                failed_multi_question_pages.append(failed_page)
+            continue
+        
         # 問題番号をソート
         questions_sorted = sorted(questions, key=lambda x: x[1])  # question_numberでソート
         
         # タイトルとファイル名を生成
+        failed_page = None
         if len(questions_sorted) == 1:
             # 単一問題
             _, question_number, title = questions_sorted[0]
@@ -629,7 +498,7 @@ def main():
             question_numbers = [q[1] for q in questions_sorted]
             question_numbers_str = "、".join([f"問{q}" for q in question_numbers])
             title = f"第{exam_number}回 {question_numbers_str}"
-            filename = f"{exam_number}-{'_'.join([str(q) for q in question_numbers])}.html"
+            filename = get_template_filename(exam_number, question_numbers)
             
             # 複数問題の場合、post_content_htmlに全ての問題が含まれているか確認
             # HTML内の「問***」パターンを探して、必要な問題番号が全て含まれているか確認
@@ -650,31 +519,42 @@ def main():
                     print(f"     ⚠ 注意: 問{sorted(missing_questions)[0]}は文字列として存在しますが、strongタグ内に見つかりませんでした")
                 
                 # 失敗した複数問題ページの情報を記録
-                failed_multi_question_pages.append({
+                failed_page = {
                     'exam_number': exam_number,
                     'expected_questions': sorted([int(q) for q in expected_questions]),
                     'found_questions': sorted([int(q) for q in found_questions]),
                     'missing_questions': sorted([int(q) for q in missing_questions]),
                     'url': url,
                     'filename': filename
-                })
+                }
+                failed_multi_question_pages.append(failed_page)
         
         filepath = os.path.join(templates_dir, filename)
         
-        # HTMLを作成
-        html_content = create_single_question_html(title, post_content_html, url)
+        # 画像の参照をローカルのファイルに書き換え、元ページの不要なマークアップを削除してからHTMLを作成
+        post_content_html = strip_wordpress_cruft(localize_images(post_content_html, image_index))
+        html_content = create_single_question_html(title, post_content_html, url, assets)
         
-        # ファイルに保存
-        try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(html_content)
+        # 書き込みを予約（内容が前回と同じファイルは書き込まない）
+        if batch.write(filepath, html_content):
             print(f"  ✓ {filename} を作成しました")
             file_count += 1
-        except Exception as e:
-            print(f"  ✗ エラー: {filename} の保存に失敗しました - {type(e).__name__}: {e}")
-            continue
+        else:
+            print(f"  ✓ {filename} は内容が変わらないため書き込みません")
+            unchanged_count += 1
+        record_template(manifest, filename, url, group_data['source_hash'], template_version, html_content, failed_page)
+    
+    if dry_run:
+        print(f"\n--dry-run: {file_count}個のHTMLファイルに変更があります（書き込みなし）")
+        return
     
-    print(f"\n✓ 成功: {file_count}個のHTMLファイルを作成しました")
+    # 全てのテンプレートを一時ファイルに書き出せてから、まとめて置き換える（途中で失敗したら何も変更しない）
+    batch.commit()
+    for filepath in batch.committed:
+        write_compressed(filepath)
+    save_manifest(manifest, manifest_path)
+    
+    print(f"\n✓ 成功: {file_count}個のHTMLファイルを作成しました（変更なし: {unchanged_count}個）")
     print(f"  保存先: {templates_dir}")
     
     # 複数問題ページで問題が正しく反映されなかったものを.txtファイルに出力
@@ -699,14 +579,128 @@ def main():
     else:
         print(f"\n✓ 全ての複数問題ページで問題が正しく反映されました")
     
+    # 問題ごとの構造化データを更新（変更されたテンプレートだけ解析し直す）
+    question_records = load_question_store(templates_dir)
+    question_total = sum(len(records) for records in question_records.values())
+    print(f"\n✓ 問題データを更新しました: {question_total}問")
+    print(f"  保存先: {get_store_path(templates_dir)}")
+    
     # 全てのHTMLファイルを順番に読み込むインデックスHTMLを作成
     create_index_html(templates_dir)
 
 
-def create_index_html(templates_dir):
-    """templatesディレクトリ内の全てのHTMLファイルを順番に読み込むHTMLを作成"""
+# インデックスの出力形式（single: 1ファイルにまとめる / exam: 回数ごとに分割）
+INDEX_MODE_ENV = "YAKUGAKU_INDEX_MODE"
+HTML_DIRNAME = "html"
+SHARDS_DIRNAME = "shards"
+
+# 問題ブロックは<template>に入れて（画像も読み込まれない）、表示位置に近づいたときに展開する
+# 展開前の枠の高さの見積もり（px）: タイトルと余白、本文1行、spoiler1つ
+SLOT_BASE_HEIGHT = 160
+SLOT_LINE_HEIGHT = 26
+SLOT_CHARS_PER_LINE = 40
+SLOT_SPOILER_HEIGHT = 70
+# 画像の高さを見積もるときの本文の幅（.containerの幅 - .question-blockのpadding）
+SLOT_CONTENT_WIDTH = 1080
+
+SHARD_SHELL_FOOTER = """
+    </div>
+</body>
+</html>
+"""
+
+
+SPOILER_INLINE_DISPLAY = re.compile(r'(<div class="su-spoiler-content[^"]*")\s+style="display:\s*none\s*!important;?"')
+TEMPLATE_SCRIPT = re.compile(r'\s*<script\b[^>]*>.*?</script>', re.DOTALL)
+QUESTION_BLOCK_START = re.compile(r'<div\s[^>]*class="question-block"[^>]*>')
+# divの開始・終了タグ（コメントとscript・styleの中身はまとめて読み飛ばし、その中の「<div」は数えない）
+DIV_TAG = re.compile(
+    r'<!--.*?(?:-->|\Z)|<(script|style)\b[^>]*>.*?(?:</\1\s*>|\Z)|<(/?)div\b[^>]*>',
+    re.DOTALL | re.IGNORECASE,
+)
+BODY_CONTENTS = re.compile(r'<body[^>]*>(.*)</body>', re.DOTALL | re.IGNORECASE)
+NOSCRIPT = re.compile(r'<noscript>.*?</noscript>', re.DOTALL | re.IGNORECASE)
+IMG_TAG = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+IMG_WIDTH = re.compile(r'\swidth="(\d+)"')
+IMG_HEIGHT = re.compile(r'\sheight="(\d+)"')
+LINE_BREAK_TAG = re.compile(r'<(?:br|/p|/li|/h\d|/tr)\b[^>]*>', re.IGNORECASE)
+ANY_TAG = re.compile(r'<[^>]+>')
+
+
+def extract_question_block(html_content):
+    """
+    テンプレートのHTMLからdiv.question-blockの部分を文字列のまま切り出す
+
+    DOMは構築せず、divの開始・終了タグの深さだけを数えて対応する終了タグを探す
+    （コメントとscript・styleの中の「<div」は数えない）。
+    終了タグが足りない場合は（html.parserと同じく）</body>の直前までをブロックとみなす。
+    question-blockがない場合はbodyの中身を返す。
+    """
+    start = QUESTION_BLOCK_START.search(html_content)
+    if start:
+        depth = 0
+        for tag in DIV_TAG.finditer(html_content, start.start()):
+            if tag.group(0).startswith("<!--") or tag.group(1):
+                continue
+            depth += -1 if tag.group(2) else 1
+            if depth == 0:
+                return html_content[start.start():tag.end()]
+        end = html_content.lower().rfind("</body>")
+        return html_content[start.start():end if end != -1 else len(html_content)]
+    body = BODY_CONTENTS.search(html_content)
+    if body:
+        return body.group(1)
+    return None
+
+
+def estimate_block_height(question_block):
+    """
+    展開前の枠の高さ（px）を見積もる
+
+    最初のspoilerより前（閉じた状態で表示される部分）の行数と画像の高さに、spoilerの数を足す。
+    見積もりがずれても展開時に実際の高さになるだけで、表示位置に近づく前に展開するので大きくは動かない。
+    """
+    visible = NOSCRIPT.sub("", question_block.split('<div class="su-spoiler', 1)[0])
+    height = SLOT_BASE_HEIGHT
+    for img in IMG_TAG.findall(visible):
+        width = IMG_WIDTH.search(img)
+        img_height = IMG_HEIGHT.search(img)
+        if width and img_height and int(width.group(1)):
+            height += int(img_height.group(1)) * min(1, SLOT_CONTENT_WIDTH / int(width.group(1)))
+    for line in LINE_BREAK_TAG.split(visible):
+        text = ANY_TAG.sub("", line).strip()
+        if text:
+            height += SLOT_LINE_HEIGHT * -(-len(text) // SLOT_CHARS_PER_LINE)
+    height += SLOT_SPOILER_HEIGHT * question_block.count("su-spoiler-title")
+    return int(height)
+
+
+def get_index_mode(mode=None):
+    """インデックスの出力形式（引数 > 環境変数 YAKUGAKU_INDEX_MODE > 設定ファイルの index_mode）"""
+    mode = mode or os.environ.get(INDEX_MODE_ENV) or get_config()["build"]["index_mode"]
+    if mode not in INDEX_MODES:
+        raise ValueError(f"インデックスの出力形式が不正です: {mode}（{', '.join(INDEX_MODES)}）")
+    return mode
+
+
+def get_exam_number_from_filename(filepath):
+    """テンプレートのファイル名から回数を取得（例: 102-250_251.html -> 102）"""
+    match = re.match(r"(\d+)-", os.path.basename(filepath))
+    return int(match.group(1)) if match else None
+
+
+def create_index_html(templates_dir, mode=None):
+    """
+    templatesディレクトリ内の全てのHTMLファイルを順番に読み込むHTMLを作成
+
+    Args:
+        templates_dir: テンプレートのディレクトリ
+        mode: "single"（全問題を1つのindex.htmlにまとめる）または
+              "exam"（回数ごとに shards/{回数}.html に分け、index.htmlは表示が近づいた回だけ読み込む）
+              省略時は環境変数 YAKUGAKU_INDEX_MODE、それもなければ設定ファイルの index_mode
+    """
     import glob
-    from bs4 import BeautifulSoup
+    mode = get_index_mode(mode)
     
     # templatesディレクトリ内の全てのHTMLファイルを取得（index.htmlを除く）
     html_files = [f for f in glob.glob(os.path.join(templates_dir, "*.html")) 
@@ -731,266 +725,169 @@ def create_index_html(templates_dir):
     
     html_files_sorted = sorted(html_files, key=get_sort_key)
     
-    # 各HTMLファイルからbodyの内容を抽出
-    question_sections = []
+    # インデックスHTMLの保存先（templatesと同じ階層のhtmlディレクトリ）
+    html_dir = os.path.join(os.path.dirname(templates_dir), HTML_DIRNAME)
+    index_file = os.path.join(html_dir, "index.html")
+    
+    # 回数ごとに分割する場合の出力先（shards/{回数}.html）
+    shards_dir = os.path.join(html_dir, SHARDS_DIRNAME)
+    exam_files = {}
     for filepath in html_files_sorted:
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                html_content = f.read()
-            
-            soup = BeautifulSoup(html_content, "html.parser")
-            body = soup.find("body")
-            if body:
-                # question-blockの内容を取得
-                question_block = body.find("div", class_="question-block")
-                if question_block:
-                    question_sections.append(str(question_block))
-                else:
-                    # question-blockがない場合はbody全体を使用
-                    question_sections.append(body.decode_contents())
-        except Exception as e:
-            print(f"  ⚠ 警告: {os.path.basename(filepath)} の読み込みに失敗しました - {e}")
-            continue
+        exam_files.setdefault(get_exam_number_from_filename(filepath), []).append(filepath)
+    shard_files = {
+        exam_number: os.path.join(shards_dir, f"{exam_number}.html")
+        for exam_number in exam_files
+    }
+    output_files = [index_file]
+    if mode == "exam":
+        output_files += list(shard_files.values())
+    # 検索用の索引（index.htmlと同じディレクトリ）
+    search_file = os.path.join(html_dir, SEARCH_INDEX_FILENAME)
+    # 後処理で書き出す事前圧縮ファイル（.gz/.br）も出力として記録する
+    compressed_files = [p for f in output_files + [search_file] for p in get_compressed_paths(f)]
+    # サイトのルートのService Workerと事前キャッシュの一覧
+    site_dir = os.path.dirname(templates_dir)
+    recorded_files = output_files + [search_file] + compressed_files + get_service_worker_paths(site_dir)
+    
+    # 入力のテンプレート・出力形式・共通のCSS/スクリプトが前回から変わっていなければ再生成しない
+    manifest_path = get_manifest_path(templates_dir)
+    manifest = load_manifest(manifest_path)
+    index_inputs = get_index_inputs(html_files_sorted)
+    assets = write_site_assets(get_assets_dir(templates_dir))
+    index_options = {
+        "version": INDEX_VERSION, "mode": mode, "assets": get_asset_version(assets), "search": SEARCH_INDEX_VERSION,
+    }
+    if is_index_fresh(manifest, index_inputs, recorded_files, index_options):
+        print(f"\n✓ インデックスHTMLは最新です（テンプレートに変更なし）")
+        print(f"  保存先: {index_file}")
+        return
     
-    # インデックスHTMLを作成
-    index_html = """<!DOCTYPE html>
+    # インデックスHTMLのヘッダーとフッター（問題ブロックはこの間に1つずつ書き出す）
+    index_header = f"""<!DOCTYPE html>
 <html lang="ja">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>過去問まとめ - 全問題</title>
-    <style>
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "Hiragino Kaku Gothic ProN", "Hiragino Sans", Meiryo, sans-serif;
-            line-height: 1.6;
-            margin: 0;
-            padding: 0;
-            background-color: #f5f5f5;
-        }
-        .header {
-            background-color: #2c3e50;
-            color: white;
-            padding: 20px;
-            text-align: center;
-            position: sticky;
-            top: 0;
-            z-index: 1000;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }
-        .header h1 {
-            margin: 0;
-            font-size: 24px;
-        }
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 20px;
-        }
-        .question-block {
-            background-color: white;
-            border-radius: 8px;
-            padding: 30px;
-            margin-bottom: 40px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }
-        .question-title {
-            font-size: 24px;
-            font-weight: bold;
-            color: #333;
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 3px solid #4CAF50;
-        }
-        .post-content {
-            font-size: 16px;
-            color: #444;
-        }
-        .post-content p {
-            margin: 15px 0;
-        }
-        .post-content ol {
-            margin: 15px 0;
-            padding-left: 30px;
-        }
-        .post-content li {
-            margin: 8px 0;
-        }
-        .post-content img {
-            max-width: 100%;
-            height: auto;
-            margin: 15px 0;
-            border-radius: 4px;
-        }
-        .post-content strong {
-            color: #2c3e50;
-        }
-        .post-content a {
-            color: #4CAF50;
-            text-decoration: none;
-        }
-        .post-content a:hover {
-            text-decoration: underline;
-        }
-        .question-title a {
-            color: #333;
-            text-decoration: none;
-        }
-        .question-title a:hover {
-            color: #4CAF50;
-            text-decoration: underline;
-        }
-        /* su-spoilerの簡易スタイルと挙動 */
-        .su-spoiler {
-            border: 1px solid #e0e0e0;
-            border-radius: 6px;
-            margin: 18px 0;
-            background: #fafafa;
-            overflow: hidden;
-        }
-        .su-spoiler-title {
-            cursor: pointer;
-            padding: 12px 14px;
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            font-weight: 600;
-            color: #2c3e50;
-            user-select: none;
-        }
-        .su-spoiler-title:focus {
-            outline: 2px solid #4CAF50;
-        }
-        .su-spoiler-icon {
-            width: 10px;
-            height: 10px;
-            border-left: 2px solid #4CAF50;
-            border-bottom: 2px solid #4CAF50;
-            transform: rotate(-45deg);
-            transition: transform 0.15s ease-out;
-            display: inline-block;
-        }
-        .su-spoiler.open .su-spoiler-icon {
-            transform: rotate(135deg);
-        }
-        .su-spoiler-content {
-            display: none !important;
-            padding: 12px 14px 18px 14px;
-            background: #fff;
-            border-top: 1px solid #e0e0e0;
-        }
-        .su-spoiler.open .su-spoiler-content {
-            display: block !important;
-        }
-        /* 初期状態で確実に閉じる */
-        .su-spoiler:not(.open) .su-spoiler-content {
-            display: none !important;
-        }
-    </style>
+    <link rel="stylesheet" href="{assets['css']}">
+    <script src="{assets['js']}" defer></script>
 </head>
 <body>
     <div class="header">
         <h1>過去問まとめ - 全問題</h1>
+        <div class="site-search" role="search">
+            <input type="search" id="site-search" data-index="{site_url(f'{HTML_DIRNAME}/{SEARCH_INDEX_FILENAME}')}" placeholder="問題文・選択肢・解説を検索" aria-label="問題を検索" autocomplete="off">
+            <ol id="site-search-results" class="search-results" hidden></ol>
+        </div>
     </div>
     <div class="container">
-""" + "\n".join(question_sections) + """
+"""
+    index_footer = """
     </div>
-    <script>
-    document.addEventListener('DOMContentLoaded', () => {
-        document.querySelectorAll('.su-spoiler').forEach(spoiler => {
-            const title = spoiler.querySelector('.su-spoiler-title');
-            const content = spoiler.querySelector('.su-spoiler-content');
-
-            if (!content) return;
-
-            // 初期は確実に閉じる
-            spoiler.classList.remove('su-spoiler-open', 'open');
-            spoiler.classList.add('su-spoiler-closed');
-            // インラインスタイルで確実に非表示にする
-            content.style.setProperty('display', 'none', 'important');
-
-            const toggle = () => {
-                const isOpen = spoiler.classList.toggle('open');
-                spoiler.classList.toggle('su-spoiler-closed', !isOpen);
-                spoiler.classList.toggle('su-spoiler-open', isOpen);
-                if (isOpen) {
-                    content.style.setProperty('display', 'block', 'important');
-                } else {
-                    content.style.setProperty('display', 'none', 'important');
-                }
-            };
-
-            if (title) {
-                title.addEventListener('click', (e) => {
-                    e.preventDefault();
-                    e.stopPropagation();
-                    toggle();
-                });
-                title.addEventListener('keydown', (e) => {
-                    if (e.key === 'Enter' || e.key === ' ') {
-                        e.preventDefault();
-                        e.stopPropagation();
-                        toggle();
-                    }
-                });
-                // フォーカスできるように
-                if (!title.hasAttribute('tabindex')) {
-                    title.setAttribute('tabindex', '0');
-                }
-            } else {
-                // titleがない場合はspoiler全体をクリック可能にする
-                spoiler.style.cursor = 'pointer';
-                spoiler.addEventListener('click', (e) => {
-                    e.preventDefault();
-                    e.stopPropagation();
-                    toggle();
-                });
-            }
-        });
-    });
-    </script>
 </body>
 </html>
 """
     
     # インデックスHTMLを保存（templatesと同じ階層のhtmlディレクトリに保存）
-    html_dir = os.path.join(os.path.dirname(templates_dir), "html")
     os.makedirs(html_dir, exist_ok=True)
-    index_file = os.path.join(html_dir, "index.html")
     
+    # 各テンプレートからquestion-blockを切り出し、そのままファイルに書き出す
+    # （全体を1つの文字列にまとめないので、問題数が増えてもメモリ使用量は一定）
+    def write_question_blocks(f, filepaths):
+        count = 0
+        height = 0
+        for filepath in filepaths:
+            try:
+                with open(filepath, "r", encoding="utf-8") as template:
+                    question_block = extract_question_block(template.read())
+            except Exception as e:
+                print(f"  ⚠ 警告: {os.path.basename(filepath)} の読み込みに失敗しました - {e}")
+                continue
+            if question_block is None:
+                continue
+            # 古いテンプレートのインラインの display 指定（開閉がCSSで切り替わらなくなる）と、
+            # 閉じていないdivのためにブロックに含まれてしまったテンプレート自身のスクリプトを削除
+            question_block = SPOILER_INLINE_DISPLAY.sub(r"\1", question_block)
+            question_block = TEMPLATE_SCRIPT.sub("", question_block)
+            # 中身は<template>に入れ、見積もった高さの枠だけを置く（表示位置に近づいたらスクリプトで展開）
+            # 枠にはテンプレートごとのidを付ける（検索結果からの移動先）
+            anchor = get_question_anchor(os.path.basename(filepath))
+            block_height = estimate_block_height(question_block)
+            if count:
+                f.write("\n")
+            f.write(
+                f'<div class="question-slot" id="{anchor}" style="min-height: {block_height}px">'
+                f'<template>{question_block}</template></div>'
+            )
+            count += 1
+            height += block_height
+        return count, height
+    
+    section_count = 0
     try:
-        with open(index_file, "w", encoding="utf-8") as f:
-            f.write(index_html)
+        if mode == "exam":
+            # 回数ごとのファイル（question-blockを並べただけの断片）と、それを読み込むindex.html
+            os.makedirs(shards_dir, exist_ok=True)
+            shard_sizes = {}
+            for exam_number, filepaths in exam_files.items():
+                with open(shard_files[exam_number], "w", encoding="utf-8") as f:
+                    shard_sizes[exam_number] = write_question_blocks(f, filepaths)
+                section_count += shard_sizes[exam_number][0]
+            with open(index_file, "w", encoding="utf-8") as f:
+                f.write(index_header)
+                f.write(create_shard_shell(shard_sizes))
+                f.write(SHARD_SHELL_FOOTER)
+        else:
+            with open(index_file, "w", encoding="utf-8") as f:
+                f.write(index_header)
+                section_count, _ = write_question_blocks(f, html_files_sorted)
+                f.write(index_footer)
+        # 問題ごとのレコードから検索用の索引を作成
+        search_count = write_search_index(load_question_store(templates_dir), search_file)
+        write_compressed(search_file)
+        # 後処理（HTMLの圧縮と.gz/.brの作成）をしてから、最終的な出力を記録
+        size_report = optimize_html_files(output_files)
+        # 最終的な出力のハッシュ値でService Workerの事前キャッシュの一覧を作成
+        precache_count, image_count = write_service_worker(site_dir, assets, output_files + [search_file])
+        record_index(manifest, index_inputs, recorded_files, index_options)
+        save_manifest(manifest, manifest_path)
         print(f"\n✓ インデックスHTMLを作成しました")
         print(f"  保存先: {index_file}")
-        print(f"  読み込んだファイル数: {len(question_sections)}")
+        if mode == "exam":
+            print(f"  回数ごとのファイル: {shards_dir}（{len(shard_files)}個）")
+        print(f"  読み込んだファイル数: {section_count}")
+        print(f"  検索用の索引: {search_file}（{search_count}問）")
+        print(f"  Service Worker: {os.path.join(site_dir, SW_FILENAME)}（事前キャッシュ: {precache_count}ファイル / 画像: {image_count}個）")
+        print_size_report(*size_report)
     except Exception as e:
         print(f"\n✗ エラー: インデックスHTMLの保存に失敗しました - {type(e).__name__}: {e}")
 
 
-def test_extract_250_251():
-    """問250〜251を取得する専用関数のテスト"""
-    url = "https://yakugakulab.info/%e7%ac%ac102%e5%9b%9e%e8%96%ac%e5%89%a4%e5%b8%ab%e5%9b%bd%e5%ae%b6%e8%a9%a6%e9%a8%93%e3%80%80%e5%95%8f250%e3%80%9c251/"
-    result = extract_questions_250_251_from_url(url)
-    if result:
-        page_title, post_content_html = result
-        print(f"\n✓ 取得成功")
-        print(f"  タイトル: {page_title}")
-        print(f"  コンテンツ長: {len(post_content_html)} 文字")
-        
-        # 問250と問251が含まれているか最終確認
-        import re
-        questions = set(re.findall(r'<strong[^>]*>.*?問(\d+)', post_content_html, re.DOTALL))
-        print(f"  含まれている問題: {sorted([int(q) for q in questions])}")
-        
-        return result
-    else:
-        print(f"\n✗ 取得失敗")
-        return None
+def create_shard_shell(shard_sizes):
+    """
+    回数ごとに分割した場合のindex.htmlの本文（目次と、回数ごとの読み込み前の枠）
+
+    Args:
+        shard_sizes: {回数: (ページ数, 問題ブロックの枠の高さの合計)}
+    """
+    nav = "".join(
+        f'<a href="#exam-{exam_number}">第{exam_number}回</a>'
+        for exam_number in shard_sizes
+    )
+    sections = []
+    for exam_number, (count, height) in shard_sizes.items():
+        # 読み込み前も中の枠と同じ高さを確保して、読み込み時にスクロール位置がずれないようにする
+        sections.append(
+            f'        <section class="exam-shard" id="exam-{exam_number}" '
+            f'data-src="{site_url(f"{HTML_DIRNAME}/{SHARDS_DIRNAME}/{exam_number}.html")}" '
+            f'style="min-height: {height}px">\n'
+            f'            <h2 class="exam-title">第{exam_number}回（{count}ページ）</h2>\n'
+            f'            <div class="exam-questions"><p class="exam-status">読み込み中...</p></div>\n'
+            f'        </section>\n'
+        )
+    return f'        <nav class="exam-nav">{nav}</nav>\n' + "".join(sections)
 
 
 if __name__ == "__main__":
-    # テスト用: 問250〜251の専用関数をテスト
-    # test_extract_250_251()
-    
     # main()
-    create_index_html("/Users/diabolo/dev/temp/tonao/templates")
+    create_index_html(get_config()["paths"]["templates"])
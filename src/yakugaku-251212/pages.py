@@ -4,11 +4,22 @@
 問題ページのURLを探索して辞書にまとめる
 """
 
-from bs4 import BeautifulSoup
-import requests
+from parser_backend import make_soup
+from http_client import fetch_text
 from urllib.parse import quote, urljoin, unquote
 import re
-import time
+import os
+import tempfile
+from datetime import datetime
+from fetcher import fetch_all
+
+# カテゴリページへのリクエストの最小間隔（秒、全回数で共通）
+CATEGORY_HOST_INTERVAL = 0.5
+# 差分更新でこの秒数以内に探索済みの回数は取得しない
+REFRESH_MAX_AGE = 24 * 60 * 60
+# question_pages.json内の回数ごとの探索時刻のキー
+CRAWL_TIMES_KEY = "_crawled_at"
+PAGINATION_PATTERN = re.compile(r'<a\s[^>]*href=["\'][^"\']*?page/(\d+)')
 
 
 def get_category_url(exam_number):
@@ -22,13 +33,8 @@ def get_category_url(exam_number):
 def fetch_html_from_url(url):
     """URLからHTMLコンテンツを取得"""
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        response.encoding = "utf-8"
-        return response.text
+        # 共有のSessionで取得（接続の再利用と、429/5xxの再試行はhttp_clientで行う）
+        return fetch_text(url, timeout=30)
     except Exception as e:
         print(f"  エラー: URLからHTMLを取得できませんでした - {e}")
         return None
@@ -74,10 +80,15 @@ def find_question_pages_in_category(category_url, exam_number):
     """カテゴリページから問題ページを探す"""
     print(f"  カテゴリページを取得: {category_url}")
     html_content = fetch_html_from_url(category_url)
+    return parse_question_pages_in_category(html_content, exam_number)
+
+
+def parse_question_pages_in_category(html_content, exam_number):
+    """取得済みのカテゴリページHTMLから問題ページを探す"""
     if not html_content:
         return {}
     
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = make_soup(html_content)
     question_pages = {}
     
     # 記事へのリンクを探す
@@ -116,70 +127,183 @@ def find_question_pages_in_category(category_url, exam_number):
     return question_pages
 
 
+def parse_max_page(html_content):
+    """取得済みのカテゴリページHTMLのページネーションリンクから最大ページ番号を取得"""
+    if not html_content:
+        return 1
+    max_page = 1
+    for page_match in PAGINATION_PATTERN.finditer(html_content):
+        max_page = max(max_page, int(page_match.group(1)))
+    return max_page
+
+
 def find_all_question_pages(exam_number):
     """指定された回数のすべての問題ページを探索"""
-    print(f"\n第{exam_number}回の問題ページを探索中...")
-    
-    # カテゴリページのURLを取得
-    category_url = get_category_url(exam_number)
-    print(f"カテゴリURL: {category_url}")
+    return build_question_pages_dict([exam_number])[exam_number]
+
+
+def build_question_pages_dict(exam_numbers):
+    """
+    複数の回数の問題ページを探索して辞書にまとめる
+
+    1. 全回数のカテゴリページ1ページ目を並列に取得し、そのレスポンスから最大ページ番号を読む
+    2. 全回数の2ページ目以降をまとめて並列に取得する
+    各カテゴリページの取得は1回だけで、ホストごとの間隔はfetcherで全体に対して制御する。
+    """
+    exam_numbers = list(exam_numbers)
+    category_urls = {exam_number: get_category_url(exam_number) for exam_number in exam_numbers}
     
-    # カテゴリページから問題ページを探す
-    question_pages = find_question_pages_in_category(category_url, exam_number)
+    print(f"\n{'='*60}")
+    print(f"{len(exam_numbers)}回分のカテゴリページを取得中...")
+    for exam_number in exam_numbers:
+        print(f"  カテゴリページを取得: {category_urls[exam_number]}")
+    first_contents = fetch_all(
+        [category_urls[exam_number] for exam_number in exam_numbers],
+        fetch_html_from_url, host_interval=CATEGORY_HOST_INTERVAL,
+    )
     
-    # ページネーションがある場合、すべてのページを探索
-    # まず、最初のページから次のページへのリンクを探す
-    html_content = fetch_html_from_url(category_url)
-    if html_content:
-        soup = BeautifulSoup(html_content, "html.parser")
-        # ページネーションリンクを探す
-        pagination_links = soup.find_all("a", href=re.compile(r"page/\d+"))
-        max_page = 1
-        for link in pagination_links:
-            href = link.get("href", "")
-            page_match = re.search(r"page/(\d+)", href)
-            if page_match:
-                page_num = int(page_match.group(1))
-                if page_num > max_page:
-                    max_page = page_num
-        
-        # 見つかったすべてのページを探索
+    # 2ページ目以降のURL（回数, URL）を全回数分まとめる
+    next_targets = []
+    for exam_number, html_content in zip(exam_numbers, first_contents):
+        max_page = parse_max_page(html_content)
         for page_num in range(2, max_page + 1):
-            next_url = f"{category_url}page/{page_num}/"
-            next_pages = find_question_pages_in_category(next_url, exam_number)
+            next_targets.append((exam_number, f"{category_urls[exam_number]}page/{page_num}/"))
+    
+    if next_targets:
+        print(f"\n2ページ目以降のカテゴリページを取得中（{len(next_targets)}ページ）...")
+        for _, next_url in next_targets:
+            print(f"  カテゴリページを取得: {next_url}")
+    next_contents = fetch_all(
+        [next_url for _, next_url in next_targets],
+        fetch_html_from_url, host_interval=CATEGORY_HOST_INTERVAL,
+    )
+    
+    # 回数ごとに1ページ目から順に解析（後のページの結果で上書きするのは従来どおり）
+    pages = {}
+    for exam_number, html_content in zip(exam_numbers, first_contents):
+        print(f"\n第{exam_number}回の問題ページを探索中...")
+        pages[exam_number] = parse_question_pages_in_category(html_content, exam_number)
+        for (next_exam, _), next_content in zip(next_targets, next_contents):
+            if next_exam != exam_number:
+                continue
+            next_pages = parse_question_pages_in_category(next_content, exam_number)
             if next_pages:
-                question_pages.update(next_pages)
-            time.sleep(0.5)  # サーバー負荷を考慮
+                pages[exam_number].update(next_pages)
+        print(f"  見つかった問題ページ数: {len(pages[exam_number])}")
     
-    print(f"  見つかった問題ページ数: {len(question_pages)}")
-    return question_pages
+    return pages
 
 
-def build_question_pages_dict(exam_numbers):
-    """複数の回数の問題ページを探索して辞書にまとめる"""
-    pages = {}
+def refresh_question_pages(exam_numbers, filepath="question_pages.json", max_age=REFRESH_MAX_AGE, force=False):
+    """
+    question_pages.jsonを差分で更新する
+
+    カテゴリページは新しい記事から順に並んでいるので、1ページ目から順に取得し、
+    既知のURLしか載っていないページに当たったらその回数の探索を終える。
+    未登録の回数は最後まで探索する（build_question_pages_dictと同じ結果になる）。
+    前回の探索からmax_age秒以内の回数は、forceを指定しない限り取得しない。
+
+    Args:
+        exam_numbers: 更新する回数のリスト
+        filepath: question_pages.jsonのパス
+        max_age: この秒数以内に探索済みの回数はスキップ
+        force: Trueなら探索時刻に関係なく取得する
+
+    Returns:
+        dict: 更新後の問題ページの辞書
+    """
+    pages = load_pages_dict(filepath)
+    crawled_at = load_crawl_times(filepath)
+    now = datetime.now()
     
+    targets = []
     for exam_number in exam_numbers:
-        print(f"\n{'='*60}")
-        print(f"第{exam_number}回を処理中...")
-        question_pages = find_all_question_pages(exam_number)
-        pages[exam_number] = question_pages
+        last_crawled = crawled_at.get(exam_number)
+        if force or exam_number not in pages or last_crawled is None:
+            targets.append(exam_number)
+        elif (now - datetime.fromisoformat(last_crawled)).total_seconds() >= max_age:
+            targets.append(exam_number)
+    if not targets:
+        return pages
+    
+    print(f"\n問題ページの辞書を差分で更新中: {targets}")
+    # サイドバーなどに出る他の回数の記事で探索が止まらなくならないよう、全回数の既知URLで判定する
+    known_urls = {url for question_pages in pages.values() for url in question_pages.values()}
+    found = {exam_number: {} for exam_number in targets}
+    max_pages = {}
+    completed = []
+    walking = {exam_number: 1 for exam_number in targets}
+    request_count = 0
+    
+    while walking:
+        # 探索中の全回数の次のページをまとめて並列に取得
+        page_targets = sorted(walking.items())
+        page_urls = []
+        for exam_number, page_num in page_targets:
+            category_url = get_category_url(exam_number)
+            page_urls.append(category_url if page_num == 1 else f"{category_url}page/{page_num}/")
+        for page_url in page_urls:
+            print(f"  カテゴリページを取得: {page_url}")
+        contents = fetch_all(page_urls, fetch_html_from_url, host_interval=CATEGORY_HOST_INTERVAL)
+        request_count += len(page_urls)
         
-        # 少し待機（サーバー負荷を考慮）
-        time.sleep(1)
+        walking = {}
+        for (exam_number, page_num), html_content in zip(page_targets, contents):
+            if html_content is None:
+                # 取得に失敗した回数は探索時刻を更新しない（次回もう一度探索する）
+                print(f"  ⚠ 第{exam_number}回の探索を中断しました（{page_num}ページ目の取得に失敗）")
+                continue
+            if page_num == 1:
+                max_pages[exam_number] = parse_max_page(html_content)
+            page_pages = parse_question_pages_in_category(html_content, exam_number)
+            found[exam_number].update(page_pages)
+            new_urls = set(page_pages.values()) - known_urls
+            if new_urls and page_num < max_pages[exam_number]:
+                walking[exam_number] = page_num + 1
+            else:
+                completed.append(exam_number)
+    
+    added = 0
+    for exam_number in completed:
+        question_pages = pages.setdefault(exam_number, {})
+        for q_num, url in found[exam_number].items():
+            if question_pages.get(q_num) != url:
+                question_pages[q_num] = url
+                added += 1
+        crawled_at[exam_number] = now.isoformat(timespec="seconds")
     
+    save_pages_dict(pages, filepath, crawled_at)
+    print(f"  追加・更新した問題ページ: {added}件（リクエスト数: {request_count}）")
     return pages
 
 
-def save_pages_dict(pages, filepath="question_pages.json"):
-    """問題ページの辞書をJSONファイルに保存"""
+def save_pages_dict(pages, filepath="question_pages.json", crawled_at=None):
+    """
+    問題ページの辞書をJSONファイルに保存
+
+    一時ファイルに書き込んでから置き換えるので、途中で落ちても元のファイルは壊れない。
+    crawled_atを省略した場合は、保存済みの探索時刻をそのまま残す。
+    """
     import json
+    if crawled_at is None:
+        crawled_at = load_crawl_times(filepath)
     # キーを文字列に変換して保存（JSONはキーを文字列にする必要がある）
     pages_str = {}
     for exam_num, question_pages in pages.items():
         pages_str[str(exam_num)] = {str(k): v for k, v in question_pages.items()}
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(pages_str, f, ensure_ascii=False, indent=2)
+    if crawled_at:
+        pages_str[CRAWL_TIMES_KEY] = {str(k): v for k, v in sorted(crawled_at.items())}
+    
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(pages_str, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
     print(f"\n問題ページの辞書を保存しました: {filepath}")
 
 
@@ -189,16 +313,37 @@ def load_pages_dict(filepath="question_pages.json"):
     try:
         with open(filepath, "r", encoding="utf-8") as f:
             pages_str = json.load(f)
-            # キーを整数に変換
+            # キーを整数に変換（探索時刻の記録は除く）
             pages = {}
             for exam_num_str, question_pages_str in pages_str.items():
+                if exam_num_str == CRAWL_TIMES_KEY:
+                    continue
                 pages[int(exam_num_str)] = {int(k): v for k, v in question_pages_str.items()}
             return pages
     except FileNotFoundError:
         return {}
 
 
+def load_crawl_times(filepath="question_pages.json"):
+    """回数ごとの前回の探索時刻（ISO形式の文字列）を読み込む"""
+    import json
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            pages_str = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {int(k): v for k, v in pages_str.get(CRAWL_TIMES_KEY, {}).items()}
+
+
 if __name__ == "__main__":
+    import sys
+    if "--refresh" in sys.argv:
+        # 保存済みの全回数を差分で更新（例: python pages.py --refresh 111）
+        exam_numbers = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+        existing = load_pages_dict("question_pages.json")
+        refresh_question_pages(sorted(set(existing) | set(exam_numbers)), "question_pages.json", force=True)
+        sys.exit(0)
+    
     # テスト: 第101回の問題ページを探索
     exam_numbers = [101]
     pages = build_question_pages_dict(exam_numbers)
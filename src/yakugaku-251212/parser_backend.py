@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTMLパーサーの切り替え
+
+標準のhtml.parserを使う。lxmlは高速だが、テンプレートの一部（<noscript>の中の閉じていない<iframe>）で
+抽出結果が変わるため、環境変数 YAKUGAKU_HTML_PARSER か設定ファイルで指定した場合だけ使う（例: lxml）。
+抽出結果が変わらないかは src/tests/test_parser_backends.py で確認する。
+"""
+
+import os
+
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+PARSER_ENV = "YAKUGAKU_HTML_PARSER"
+# 優先順（指定がなければ先頭を使う。lxmlは抽出結果が一致するようになるまで指定した場合だけ）
+PREFERRED_PARSERS = ["html.parser", "lxml"]
+
+_parser_name = None
+
+
+def is_parser_available(name):
+    """BeautifulSoupでそのパーサーが使えるか"""
+    return builder_registry.lookup(name) is not None
+
+
+def get_available_parsers():
+    """利用可能なパーサーのリスト（優先順）"""
+    return [name for name in PREFERRED_PARSERS if is_parser_available(name)]
+
+
+def get_parser_name():
+    """使用するパーサー名（環境変数の指定 > PREFERRED_PARSERSの先頭）"""
+    global _parser_name
+    if _parser_name is None:
+        requested = os.environ.get(PARSER_ENV)
+        if requested:
+            if not is_parser_available(requested):
+                raise ValueError(f"パーサーが利用できません: {requested}（{PARSER_ENV}）")
+            _parser_name = requested
+        else:
+            _parser_name = get_available_parsers()[0]
+    return _parser_name
+
+
+def set_parser_name(name):
+    """使用するパーサーを切り替える（比較・検証用）"""
+    global _parser_name
+    if not is_parser_available(name):
+        raise ValueError(f"パーサーが利用できません: {name}")
+    _parser_name = name
+
+
+def make_soup(html_content, parser=None):
+    """
+    ページ全体のHTMLをパースする
+
+    Args:
+        html_content: HTMLコンテンツ
+        parser: パーサー名（省略時はget_parser_name()）
+
+    Returns:
+        BeautifulSoup
+    """
+    return BeautifulSoup(html_content, parser or get_parser_name())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成したHTMLの後処理（WordPressの不要なマークアップの削除・HTMLの圧縮・.gz/.brの作成）
+
+静的ホスティングでそのまま配信できるように、各ファイルの隣に事前圧縮した
+{ファイル名}.gz（と、brotliがインストールされていれば {ファイル名}.br）を書き出す。
+"""
+
+import gzip
+import os
+import re
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 元ページ（WordPress）から残っている、表示に関係しないマークアップ
+WORDPRESS_CRUFT = [
+    re.compile(r"<!--\s*Ads\d*\s*-->", re.IGNORECASE),
+    # 中身のないspanだけの段落（例: <p><span style="font-size: 100%;"></span></p>）
+    re.compile(r"<p>(?:\s|&nbsp;)*(?:<span[^>]*>(?:\s|&nbsp;)*</span>(?:\s|&nbsp;)*)+</p>", re.IGNORECASE),
+]
+
+# 中身の空白をそのまま残す要素
+RAW_TEXT_BLOCK = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.DOTALL | re.IGNORECASE)
+# 条件付きコメント（<!--[if ...]>）以外のコメント
+HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+WHITESPACE = re.compile(r"\s+")
+# 前後の空白が表示に影響しないブロック要素のタグ（インライン要素の間の空白は1つ残す）
+BLOCK_TAG_SPACE = re.compile(
+    r"\s*(</?(?:html|head|body|meta|link|title|script|style|div|section|nav|header|footer|"
+    r"h[1-6]|p|ol|ul|li|dl|dt|dd|table|thead|tbody|tr|th|td|figure|figcaption|br|hr)\b[^>]*>)\s*",
+    re.IGNORECASE,
+)
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def strip_wordpress_cruft(html):
+    """広告の目印のコメントや中身のない段落を削除"""
+    for pattern in WORDPRESS_CRUFT:
+        html = pattern.sub("", html)
+    return html
+
+
+def _minify_markup(markup):
+    markup = HTML_COMMENT.sub("", markup)
+    markup = WHITESPACE.sub(" ", markup)
+    return BLOCK_TAG_SPACE.sub(r"\1", markup)
+
+
+def minify_html(html):
+    """
+    HTMLの空白とコメントを削除
+
+    pre・textarea・script・styleの中身はそのまま残す。
+    インライン要素の間の空白は表示が変わらないように1つだけ残す。
+    """
+    html = strip_wordpress_cruft(html)
+    parts = []
+    position = 0
+    for block in RAW_TEXT_BLOCK.finditer(html):
+        parts.append(_minify_markup(html[position:block.start()]))
+        parts.append(block.group(0))
+        position = block.end()
+    parts.append(_minify_markup(html[position:]))
+    return "".join(parts).strip() + "\n"
+
+
+def get_compressed_paths(path):
+    """事前圧縮したファイルのパス（brotliがなければ.gzだけ）"""
+    paths = [path + ".gz"]
+    if brotli is not None:
+        paths.append(path + ".br")
+    return paths
+
+
+def write_compressed(path):
+    """
+    ファイルの隣に.gz（と.br）を書き出す
+
+    gzipのヘッダーには時刻を入れない（内容が同じなら同じバイト列になる）。
+
+    Returns:
+        dict: {圧縮したファイルのパス: サイズ}
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    compressed = {path + ".gz": gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        compressed[path + ".br"] = brotli.compress(data, quality=BROTLI_QUALITY)
+    for compressed_path, body in compressed.items():
+        with open(compressed_path, "wb") as f:
+            f.write(body)
+    return {compressed_path: len(body) for compressed_path, body in compressed.items()}
+
+
+def optimize_html_files(paths):
+    """
+    HTMLファイルを圧縮して上書きし、.gz/.brを書き出す
+
+    Returns:
+        tuple: (元の合計サイズ, 圧縮後の合計サイズ, {拡張子: 事前圧縮後の合計サイズ})
+    """
+    original_total = 0
+    minified_total = 0
+    compressed_totals = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        minified = minify_html(html)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(minified)
+        original_total += len(html.encode("utf-8"))
+        minified_total += len(minified.encode("utf-8"))
+        for compressed_path, size in write_compressed(path).items():
+            extension = os.path.splitext(compressed_path)[1]
+            compressed_totals[extension] = compressed_totals.get(extension, 0) + size
+    return original_total, minified_total, compressed_totals
+
+
+def print_size_report(original_total, minified_total, compressed_totals):
+    print(f"  HTMLの圧縮: {original_total:,} bytes -> {minified_total:,} bytes")
+    for extension, size in sorted(compressed_totals.items()):
+        ratio = original_total / size if size else 0
+        print(f"  事前圧縮（{extension}）: {size:,} bytes（元の約{ratio:.1f}分の1）")
+    if brotli is None:
+        print("  ※ brotliがインストールされていないため、.brは作成していません")
+
+
+if __name__ == "__main__":
+    # 使い方: python postbuild.py <HTMLファイル...>
+    if len(sys.argv) < 2:
+        print("使い方: python postbuild.py <HTMLファイル...>")
+        sys.exit(1)
+    print_size_report(*optimize_html_files(sys.argv[1:]))
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+問題ごとの構造化データ（症例文・問題文・選択肢・解答・解説・画像・URL）をJSONに保存する
+
+テンプレートを1回だけ解析して questions.json に記録し、
+範囲外の修正や検証ではHTMLを読み直さずにこのデータを使う。
+
+元になるのはテンプレート（HTML）で、questions.json はそこから作る派生データ（キャッシュ）。
+- 抽出（new2.extract_post_content）はレコードを直接は書き出さず、保存したテンプレートを解析して作る
+  （lintやfix_multi_questionsで手で直したテンプレートも、同じ方法でレコードに反映される）
+- テンプレートごとに内容のハッシュ値を記録し、変わったテンプレートだけを解析し直す
+- インデックス（new2.create_index_html）はレコードからではなく、テンプレートのquestion-blockから作る
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from bs4 import BeautifulSoup, Tag
+
+from write_batch import write_text_atomic
+
+# プロジェクトルートのパス
+PROJECT_ROOT = Path(__file__).parent.parent
+TEMPLATES_DIR = PROJECT_ROOT / "templates"
+STORE_FILENAME = "questions.json"
+
+QUESTION_HEADING = re.compile(r"^(\(範囲外\))?問\s*(\d+)")
+FILENAME_PATTERN = re.compile(r"(\d+)-(.+)\.html")
+SPOILER_QUESTION_LINE = re.compile(r"^問\s*(\d+)$")
+VIDEO_LABEL = re.compile(r"^(解説動画|動画解説)")
+CHOICE_LINE = re.compile(r"^[１-９1-9][\s\u3000]+")
+
+
+def get_store_path(templates_dir=TEMPLATES_DIR):
+    """questions.jsonのパス（templatesと同じ階層）"""
+    return os.path.join(os.path.dirname(os.fspath(templates_dir)), STORE_FILENAME)
+
+
+def list_template_filenames(templates_dir=TEMPLATES_DIR):
+    """
+    テンプレートのファイル名（例: 102-250_251.html）を名前順に取得
+
+    同じディレクトリの事前圧縮ファイル（.html.gz / .html.br）や一時ファイルは含めない。
+    """
+    return sorted(
+        f for f in os.listdir(templates_dir)
+        if f.endswith(".html") and FILENAME_PATTERN.match(f)
+    )
+
+
+def parse_template_filename(filename):
+    """ファイル名から回数と問題番号を取得（例: 102-250_251.html -> (102, [250, 251])）"""
+    match = FILENAME_PATTERN.match(filename)
+    if not match:
+        return None, []
+    return int(match.group(1)), [int(q) for q in match.group(2).split("_")]
+
+
+def _text(element):
+    return element.get_text("\n", strip=True)
+
+
+def _image_refs(element):
+    return [img["src"] for img in element.find_all("img") if img.get("src")]
+
+
+def _new_question(exam_number, question_number, out_of_range=False):
+    return {
+        "exam_number": exam_number,
+        "question_number": question_number,
+        "out_of_range": out_of_range,
+        "body": [],
+        "choices": [],
+        "answer": [],
+        "explanation": [],
+        "images": [],
+        "has_spoiler": False,
+    }
+
+
+def _read_spoiler(question, spoiler_content, questions_by_number):
+    """
+    su-spoiler-contentから解答・解説を読み取る
+
+    「解答」「解説」の見出しは<strong>の場合と地の文の場合があるので行単位で判定する。
+    「問252：1」のように複数問の解答がまとめて書かれている場合はそれぞれの問題に振り分ける。
+    """
+    question["has_spoiler"] = True
+    target = answer_target = question
+    mode = None
+    for p in spoiler_content.find_all("p"):
+        for line in _text(p).split("\n"):
+            number = SPOILER_QUESTION_LINE.match(line)
+            if number and int(number.group(1)) in questions_by_number:
+                answer_target = questions_by_number[int(number.group(1))]
+                if mode != "answer":
+                    target = answer_target
+                continue
+            if VIDEO_LABEL.match(line):
+                # 「動画解説」などは対象外
+                mode = None
+                continue
+            if line.startswith("解答"):
+                mode = "answer"
+                line = line[len("解答"):]
+            elif line.startswith("解説"):
+                mode = "explanation"
+                line = line[len("解説"):]
+            line = line.lstrip(":：\u3000 ")
+            if mode == "answer" and line:
+                answer_target["answer"].append(line)
+            elif mode == "explanation" and line:
+                target["explanation"].append(line)
+    question["images"].extend(_image_refs(spoiler_content))
+
+
+def _read_choice_lines(text):
+    """「１　a〜d間」のような行だけからなる段落なら選択肢のリストを返す"""
+    lines = text.split("\n")
+    if len(lines) >= 2 and all(CHOICE_LINE.match(line) for line in lines):
+        return [CHOICE_LINE.sub("", line) for line in lines]
+    return None
+
+
+def parse_post_content(post_content, exam_number, question_numbers, url=None, filename=None):
+    """
+    post_content要素から問題ごとのレコードを作る
+
+    Args:
+        post_content: div.post_content の要素
+        exam_number: 回数
+        question_numbers: このページで扱う問題番号のリスト
+        url: 元ページのURL
+        filename: テンプレートのファイル名
+
+    Returns:
+        list: 問題ごとのレコード（dict）のリスト
+    """
+    shared_context = []
+    shared_images = []
+    questions = []
+    current = None
+    remaining_numbers = list(question_numbers)
+
+    def start_question(number, out_of_range=False):
+        nonlocal current
+        if number in remaining_numbers:
+            remaining_numbers.remove(number)
+        current = _new_question(exam_number, number, out_of_range)
+        questions.append(current)
+
+    for element in post_content.children:
+        if not isinstance(element, Tag):
+            continue
+        text = _text(element)
+        heading = QUESTION_HEADING.match(text) if element.name == "p" else None
+        spoiler_contents = element.find_all("div", class_="su-spoiler-content")
+        if "su-spoiler-content" in (element.get("class") or []):
+            spoiler_contents = [element]
+
+        if spoiler_contents:
+            if current is None:
+                start_question(remaining_numbers[0] if remaining_numbers else None)
+            questions_by_number = {q["question_number"]: q for q in questions}
+            for spoiler_content in spoiler_contents:
+                _read_spoiler(current, spoiler_content, questions_by_number)
+        elif heading:
+            start_question(int(heading.group(2)), bool(heading.group(1)))
+            current["body"].append(text)
+            current["images"].extend(_image_refs(element))
+        elif element.name == "ol":
+            if current is None:
+                start_question(remaining_numbers[0] if remaining_numbers else None)
+            current["choices"].extend(_text(li) for li in element.find_all("li"))
+        elif text or element.find("img"):
+            choices = _read_choice_lines(text) if element.name == "p" else None
+            if current is None and choices is None:
+                shared_context.append(text)
+                shared_images.extend(_image_refs(element))
+                continue
+            if current is None:
+                start_question(remaining_numbers[0] if remaining_numbers else None)
+            if current["has_spoiler"]:
+                # spoilerの外に出てしまっている解答・解説
+                target = "explanation" if current["explanation"] or "解説" in text else "answer"
+                current[target].append(text)
+            elif choices:
+                current["choices"].extend(choices)
+            else:
+                current["body"].append(text)
+                current["images"].extend(_image_refs(element))
+
+    # 「問N」の見出しがない1問だけのページでは、見出し前の文章が問題文
+    if len(questions) == 1 and not questions[0]["body"]:
+        questions[0]["body"] = shared_context
+        questions[0]["images"] = shared_images + questions[0]["images"]
+        shared_context, shared_images = [], []
+
+    records = []
+    for question in questions:
+        records.append({
+            "exam_number": question["exam_number"],
+            "question_number": question["question_number"],
+            "out_of_range": question["out_of_range"],
+            "shared_context": "\n".join(shared_context),
+            "body": "\n".join(question["body"]),
+            "choices": question["choices"],
+            "answer": "\n".join(question["answer"]),
+            "explanation": "\n".join(question["explanation"]),
+            "images": shared_images + question["images"],
+            "has_spoiler": question["has_spoiler"],
+            "url": url,
+            "filename": filename,
+        })
+    return records
+
+
+def parse_template(html_content, filename):
+    """テンプレートのHTMLから問題ごとのレコードを作る"""
+    exam_number, question_numbers = parse_template_filename(filename)
+    soup = BeautifulSoup(html_content, "html.parser")
+    post_content = soup.find("div", class_="post_content")
+    if post_content is None:
+        return []
+    link = soup.select_one("div.question-title a")
+    url = link.get("href") if link else None
+    return parse_post_content(post_content, exam_number, question_numbers, url, filename)
+
+
+def _hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_store(path):
+    """questions.jsonを読み込む（なければ空）"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            store = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        store = {}
+    store.setdefault("templates", {})
+    return store
+
+
+def save_store(store, path):
+    """questions.jsonを保存（一時ファイル経由で置き換える）"""
+    write_text_atomic(path, json.dumps(store, ensure_ascii=False, indent=1, sort_keys=True))
+
+
+def update_template_records(store, filename, html_content):
+    """1つのテンプレートのレコードを更新"""
+    store["templates"][filename] = {
+        "hash": _hash_text(html_content),
+        "questions": parse_template(html_content, filename),
+    }
+
+
+def load_question_store(templates_dir=TEMPLATES_DIR, path=None):
+    """
+    questions.jsonを読み込み、変更・追加されたテンプレートだけ解析し直して返す
+
+    Returns:
+        dict: {テンプレートのファイル名: [問題ごとのレコード, ...]}
+    """
+    templates_dir = os.fspath(templates_dir)
+    path = path or get_store_path(templates_dir)
+    store = load_store(path)
+    changed = False
+
+    filenames = list_template_filenames(templates_dir)
+    for filename in filenames:
+        with open(os.path.join(templates_dir, filename), "r", encoding="utf-8") as f:
+            html_content = f.read()
+        entry = store["templates"].get(filename)
+        if entry is None or entry.get("hash") != _hash_text(html_content):
+            update_template_records(store, filename, html_content)
+            changed = True
+
+    for filename in list(store["templates"]):
+        if filename not in filenames:
+            del store["templates"][filename]
+            changed = True
+
+    if changed:
+        save_store(store, path)
+    return {filename: entry["questions"] for filename, entry in store["templates"].items()}
+
+
+def get_question_numbers(records):
+    """レコードのリストから問題番号のリストを取得"""
+    return [r["question_number"] for r in records if r["question_number"] is not None]
+
+
+def get_question_text(record):
+    """比較用に1問分のテキストをまとめる（問題文・選択肢・解答・解説）"""
+    parts = [record["body"], "\n".join(record["choices"]), "解答", record["answer"], "解説", record["explanation"]]
+    return "\n".join(part for part in parts if part)
+
+
+if __name__ == "__main__":
+    questions = load_question_store()
+    total = sum(len(records) for records in questions.values())
+    print(f"✓ {len(questions)}ファイル / {total}問を保存しました: {get_store_path()}")
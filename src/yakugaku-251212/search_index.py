@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ブラウザで検索するための索引（search-index.json）を作成する
+
+問題ごとのレコード（question_store）の問題文・選択肢・解答・解説を
+2文字ずつ（bigram）に区切った転置索引にする。日本語は単語の区切りがないため、
+bigramにすると形態素解析なしで部分一致の検索ができる。
+検索の処理（SEARCH_SCRIPT）は同じ区切り方でクエリを分割し、全てのbigramを含む問題を返す。
+"""
+
+import json
+import re
+import unicodedata
+
+SEARCH_INDEX_FILENAME = "search-index.json"
+# 索引の形式を変更したら上げる（スクリプト側で確認する）
+SEARCH_INDEX_VERSION = 1
+# 検索結果に表示する問題文の長さ
+SNIPPET_LENGTH = 60
+
+# 文字・数字の連続（記号や空白で区切る。スクリプト側の /[\p{L}\p{N}_]+/gu と同じ）
+WORD_RUN = re.compile(r"\w+")
+
+
+def normalize(text):
+    """全角英数字を半角に、英字を小文字にそろえる（スクリプト側は normalize('NFKC').toLowerCase()）"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def tokenize(text):
+    """テキストをbigramの集合にする（1文字だけの連続はその1文字）"""
+    tokens = set()
+    for run in WORD_RUN.findall(normalize(text)):
+        if len(run) == 1:
+            tokens.add(run)
+        else:
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def get_question_anchor(filename):
+    """インデックスHTML内の問題ブロックのid（例: 102-250_251.html -> q-102-250_251）"""
+    return "q-" + filename[:-len(".html")] if filename.endswith(".html") else "q-" + filename
+
+
+def _record_text(record):
+    parts = [
+        f"第{record['exam_number']}回 問{record['question_number']}",
+        record["body"],
+        "\n".join(record["choices"]),
+        record["answer"],
+        record["explanation"],
+    ]
+    return "\n".join(part for part in parts if part)
+
+
+def build_search_index(question_records):
+    """
+    問題ごとのレコードから検索用の索引を作成
+
+    Args:
+        question_records: load_question_store() の戻り値（{ファイル名: [レコード, ...]}）
+
+    Returns:
+        dict: {
+            "version": 形式のバージョン,
+            "docs": [[回数, 問番号, アンカー, 問題文の先頭], ...],
+            "postings": {bigram: [問題の番号の差分, ...]},
+        }
+        postingsは問題の番号（docsの添字）の昇順で、直前の番号との差分で保存する（JSONが小さくなる）
+    """
+    docs = []
+    postings = {}
+    for filename in sorted(question_records):
+        anchor = get_question_anchor(filename)
+        for record in question_records[filename]:
+            if record["question_number"] is None:
+                continue
+            doc_id = len(docs)
+            snippet = " ".join(record["body"].split())[:SNIPPET_LENGTH]
+            docs.append([record["exam_number"], record["question_number"], anchor, snippet])
+            for token in tokenize(_record_text(record)):
+                postings.setdefault(token, []).append(doc_id)
+
+    for token, doc_ids in postings.items():
+        postings[token] = [doc_id - previous for previous, doc_id in zip([0] + doc_ids, doc_ids)]
+    return {"version": SEARCH_INDEX_VERSION, "docs": docs, "postings": postings}
+
+
+def write_search_index(question_records, path):
+    """検索用の索引をJSONで書き出す（空白なし）"""
+    index = build_search_index(question_records)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    return len(index["docs"])
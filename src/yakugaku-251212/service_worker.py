@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+公開するサイトのService Worker（sw.js）と、事前キャッシュの一覧（precache-manifest.json）を作成する
+
+サイトのルート（templates/ ・html/ ・assets/ ・images/ と同じ階層）に書き出す。
+一覧には各ファイルの内容のハッシュ値を記録し、Service Workerはインストール時に
+一覧のハッシュ値を名前にした新しいキャッシュを作り、前回から内容が変わったファイルだけを取得する
+（変わっていないファイルは前回のキャッシュから移す。1つでも取得に失敗したら新しいキャッシュは使わない）。
+HTMLはネットワークを優先し（オフラインのときだけキャッシュ）、それ以外はキャッシュを優先する。
+画像は数が多いので事前には取得せず、表示したときにキャッシュする（一覧にない画像は削除）。
+"""
+
+import glob
+import json
+import os
+import sys
+
+from build_manifest import hash_file, hash_text
+from image_mirror import IMAGES_DIRNAME, INDEX_FILENAME as IMAGE_INDEX_FILENAME
+from site_assets import ASSETS_DIRNAME, write_site_assets
+
+SW_FILENAME = "sw.js"
+PRECACHE_MANIFEST_FILENAME = "precache-manifest.json"
+# 一覧に記録するハッシュ値の長さ
+REVISION_LENGTH = 12
+# インデックスの出力のほかに事前に取得するファイル（サイトのルートからの相対パスのパターン）
+PRECACHE_PATTERNS = [
+    "templates/*.html",
+]
+
+SW_SCRIPT = """// service_worker.py で生成（手で編集しない）
+// 一覧のハッシュ値（一覧が変わるとこのファイルも変わり、ブラウザが新しいService Workerをインストールする）
+const MANIFEST_VERSION = '%(version)s';
+// 事前キャッシュは一覧ごとに別のキャッシュに入れる（インストールに失敗しても、使用中のキャッシュは変わらない）
+const CACHE_PREFIX = 'yakugaku-precache';
+const CACHE_NAME = CACHE_PREFIX + '-' + MANIFEST_VERSION;
+const IMAGE_CACHE_NAME = 'yakugaku-images';
+const MANIFEST_URL = '%(manifest)s';
+const MANIFEST_KEY = '__precache-manifest__';
+
+const toUrl = (path) => new URL(path, self.registration.scope).href;
+
+const isPrecacheName = (name) => name === CACHE_PREFIX || name.startsWith(CACHE_PREFIX + '-');
+
+// 以前のキャッシュにある、内容が同じ（revisionが同じ）ファイル（{url: Response}）
+const loadUnchanged = async (manifest) => {
+    const wanted = Object.fromEntries(manifest.precache.map(entry => [toUrl(entry.url), entry.revision]));
+    const unchanged = {};
+    for (const name of await caches.keys()) {
+        if (!isPrecacheName(name) || name === CACHE_NAME) continue;
+        const cache = await caches.open(name);
+        const stored = await cache.match(toUrl(MANIFEST_KEY));
+        if (!stored) continue;
+        for (const entry of (await stored.json()).precache) {
+            const url = toUrl(entry.url);
+            if (unchanged[url] || wanted[url] !== entry.revision) continue;
+            const response = await cache.match(url);
+            if (response) unchanged[url] = response;
+        }
+    }
+    return unchanged;
+};
+
+self.addEventListener('install', (event) => {
+    event.waitUntil((async () => {
+        const response = await fetch(MANIFEST_URL, { cache: 'no-cache' });
+        if (!response.ok) throw new Error('precache manifest: ' + response.status);
+        const manifest = await response.json();
+        const cache = await caches.open(CACHE_NAME);
+        try {
+            // 内容が変わっていないファイルは以前のキャッシュから移し、それ以外はまとめて取得する
+            // （addAllは1つでも失敗すると何も追加しない）
+            const unchanged = await loadUnchanged(manifest);
+            const changed = [];
+            for (const entry of manifest.precache) {
+                const url = toUrl(entry.url);
+                if (unchanged[url]) {
+                    await cache.put(url, unchanged[url]);
+                } else {
+                    changed.push(new Request(url, { cache: 'no-cache' }));
+                }
+            }
+            await cache.addAll(changed);
+            await cache.put(toUrl(MANIFEST_KEY), new Response(JSON.stringify(manifest)));
+        } catch (error) {
+            // 途中まで作ったキャッシュは使わない（使用中のService Workerとキャッシュはそのまま）
+            await caches.delete(CACHE_NAME);
+            throw error;
+        }
+        await self.skipWaiting();
+    })());
+});
+
+// 以前の一覧のキャッシュと、一覧から外れた画像を削除する
+self.addEventListener('activate', (event) => {
+    event.waitUntil((async () => {
+        for (const name of await caches.keys()) {
+            if (isPrecacheName(name) && name !== CACHE_NAME) await caches.delete(name);
+        }
+        const cache = await caches.open(CACHE_NAME);
+        const stored = await cache.match(toUrl(MANIFEST_KEY));
+        if (stored) {
+            const manifest = await stored.json();
+            const images = new Set(manifest.images.map(entry => toUrl(entry.url)));
+            const imageCache = await caches.open(IMAGE_CACHE_NAME);
+            for (const request of await imageCache.keys()) {
+                if (!images.has(request.url)) await imageCache.delete(request);
+            }
+        }
+        await self.clients.claim();
+    })());
+});
+
+const isHtmlRequest = (request) =>
+    request.mode === 'navigate' || new URL(request.url).pathname.endsWith('.html');
+
+// HTMLはネットワークを優先し（更新したページがすぐに表示される）、取得できない場合だけキャッシュを使う
+const networkFirst = async (request) => {
+    try {
+        const response = await fetch(request);
+        if (response.ok) return response;
+        return (await caches.match(request, { ignoreSearch: true })) || response;
+    } catch (error) {
+        const cached = await caches.match(request, { ignoreSearch: true });
+        if (cached) return cached;
+        throw error;
+    }
+};
+
+// それ以外（ハッシュ値の付いたCSS・スクリプト、索引、画像）はキャッシュを優先する（画像は取得したものをキャッシュ）
+const cacheFirst = async (request) => {
+    const cached = await caches.match(request, { ignoreSearch: true });
+    if (cached) return cached;
+    const response = await fetch(request);
+    if (response.ok && request.url.startsWith(toUrl('%(images)s/'))) {
+        const imageCache = await caches.open(IMAGE_CACHE_NAME);
+        await imageCache.put(request, response.clone());
+    }
+    return response;
+};
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    if (request.method !== 'GET' || new URL(request.url).origin !== self.location.origin) return;
+    event.respondWith(isHtmlRequest(request) ? networkFirst(request) : cacheFirst(request));
+});
+"""
+
+
+def _entry(site_dir, path):
+    return {
+        "url": os.path.relpath(path, site_dir).replace(os.sep, "/"),
+        "revision": hash_file(path)[:REVISION_LENGTH],
+    }
+
+
+def build_precache_manifest(site_dir, assets, output_files):
+    """
+    事前キャッシュの一覧を作成
+
+    インデックスは今回の出力（output_files）だけを入れ、以前の出力形式で残っているファイルは入れない。
+    CSS・スクリプトも、古いハッシュ値のファイルを除いて現在のもの（assets）だけを入れる。
+
+    Returns:
+        dict: {"precache": [{"url": ..., "revision": ...}, ...], "images": [...]}
+        （urlはサイトのルートからの相対パス、revisionは内容のハッシュ値の先頭）
+    """
+    precache_paths = sorted({
+        path
+        for pattern in PRECACHE_PATTERNS
+        for path in glob.glob(os.path.join(site_dir, pattern))
+    } | {
+        os.path.join(site_dir, ASSETS_DIRNAME, os.path.basename(asset))
+        for asset in assets.values()
+    } | set(output_files))
+    images_dir = os.path.join(site_dir, IMAGES_DIRNAME)
+    image_paths = sorted(
+        path for path in glob.glob(os.path.join(images_dir, "*"))
+        if os.path.isfile(path)
+        and os.path.basename(path) != IMAGE_INDEX_FILENAME
+        and not os.path.basename(path).startswith(".")
+    )
+    return {
+        "precache": [_entry(site_dir, path) for path in precache_paths],
+        "images": [_entry(site_dir, path) for path in image_paths],
+    }
+
+
+def get_service_worker_paths(site_dir):
+    """書き出すファイル（sw.js と precache-manifest.json）のパス"""
+    return [os.path.join(site_dir, SW_FILENAME), os.path.join(site_dir, PRECACHE_MANIFEST_FILENAME)]
+
+
+def write_service_worker(site_dir, assets, output_files):
+    """
+    precache-manifest.json と sw.js を書き出す
+
+    Args:
+        site_dir: サイトのルート
+        assets: write_site_assets() の戻り値（現在のCSS・スクリプト）
+        output_files: インデックスの出力（index.html・回数ごとのファイル・検索用の索引）
+
+    sw.jsには一覧のハッシュ値を埋め込む（一覧が変わるとsw.jsも変わり、ブラウザが更新を検出する）。
+
+    Returns:
+        tuple: (事前に取得するファイル数, 画像の数)
+    """
+    manifest = build_precache_manifest(site_dir, assets, output_files)
+    manifest_json = json.dumps(manifest, ensure_ascii=False, indent=1)
+    sw_path, manifest_path = get_service_worker_paths(site_dir)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        f.write(manifest_json)
+    with open(sw_path, "w", encoding="utf-8") as f:
+        f.write(SW_SCRIPT % {
+            "version": hash_text(manifest_json)[:REVISION_LENGTH],
+            "manifest": PRECACHE_MANIFEST_FILENAME,
+            "images": IMAGES_DIRNAME,
+        })
+    return len(manifest["precache"]), len(manifest["images"])
+
+
+if __name__ == "__main__":
+    # 使い方: python service_worker.py <サイトのルート>（インデックスは html/ にあるファイルを全て入れる）
+    if len(sys.argv) != 2:
+        print("使い方: python service_worker.py <サイトのルート（templatesと同じ階層）>")
+        sys.exit(1)
+    site_dir = sys.argv[1]
+    assets = write_site_assets(os.path.join(site_dir, ASSETS_DIRNAME))
+    output_files = [
+        path for path in glob.glob(os.path.join(site_dir, "html", "**", "*"), recursive=True)
+        if os.path.isfile(path) and not path.endswith((".gz", ".br"))
+    ]
+    precache_count, image_count = write_service_worker(site_dir, assets, output_files)
+    print(f"✓ {SW_FILENAME} を作成しました（事前キャッシュ: {precache_count}ファイル / 画像: {image_count}個）")
@@ -0,0 +1,611 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成するHTMLで共通に使うCSS・スクリプトと、それに合わせたspoilerの初期化
+
+CSSとスクリプトは内容のハッシュ値を付けたファイル（site.<hash>.css / site.<hash>.js）として
+assets/ に書き出し、各ページからリンクする（ブラウザがページをまたいでキャッシュできる）。
+
+ページから assets/ ・images/ ・html/ などを参照するURLは site_url() で作る。
+既定はサイトのルート（templates/ ・html/ と同じ階層）への相対パス "../" で、templates/ と html/ のページで使える。
+生成したページを別の場所に置いて公開する場合（リポジトリのルートに index.html をコピーするなど）は、
+設定ファイルの base_url にサイトのルートのURL（例: "/4tonao/src/"）を指定する。
+"""
+
+import hashlib
+import os
+import re
+
+from postbuild import get_compressed_paths, write_compressed
+
+INLINE_DISPLAY = re.compile(r"display\s*:\s*[^;]*;?", re.IGNORECASE)
+
+ASSETS_DIRNAME = "assets"
+ASSET_HASH_LENGTH = 10
+# サイトのルートのURL（templates/ と html/ のどちらからも同じ相対パスで参照できる）
+DEFAULT_BASE_URL = "../"
+
+# site_url() で使う値（configure() で変更する）
+_settings = {"base_url": DEFAULT_BASE_URL}
+
+
+def configure(base_url=None):
+    """サイトのルートのURLを変更する（設定ファイルの base_url）"""
+    if base_url is not None:
+        _settings["base_url"] = base_url
+
+
+def site_url(path):
+    """サイトのルートからのパス（例: "assets/site.css"）を、ページから参照するURLにする"""
+    return _settings["base_url"] + path
+
+SITE_CSS = """body {
+    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "Hiragino Kaku Gothic ProN", "Hiragino Sans", Meiryo, sans-serif;
+    line-height: 1.6;
+    margin: 0;
+    padding: 0;
+    background-color: #f5f5f5;
+}
+.header {
+    background-color: #2c3e50;
+    color: white;
+    padding: 20px;
+    text-align: center;
+    position: sticky;
+    top: 0;
+    z-index: 1000;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+}
+.header h1 {
+    margin: 0;
+    font-size: 24px;
+}
+.container {
+    max-width: 1200px;
+    margin: 0 auto;
+    padding: 20px;
+}
+.question-block {
+    background-color: white;
+    border-radius: 8px;
+    padding: 30px;
+    margin-bottom: 40px;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+}
+.question-title {
+    font-size: 24px;
+    font-weight: bold;
+    color: #333;
+    margin-bottom: 20px;
+    padding-bottom: 10px;
+    border-bottom: 3px solid #4CAF50;
+}
+.post-content {
+    font-size: 16px;
+    color: #444;
+}
+.post-content p {
+    margin: 15px 0;
+}
+.post-content ol {
+    margin: 15px 0;
+    padding-left: 30px;
+}
+.post-content li {
+    margin: 8px 0;
+}
+.post-content img {
+    max-width: 100%;
+    height: auto;
+    margin: 15px 0;
+    border-radius: 4px;
+}
+.post-content strong {
+    color: #2c3e50;
+}
+.post-content a {
+    color: #4CAF50;
+    text-decoration: none;
+}
+.post-content a:hover {
+    text-decoration: underline;
+}
+.question-title a {
+    color: #333;
+    text-decoration: none;
+}
+.question-title a:hover {
+    color: #4CAF50;
+    text-decoration: underline;
+}
+/* su-spoilerの簡易スタイルと挙動 */
+.su-spoiler {
+    border: 1px solid #e0e0e0;
+    border-radius: 6px;
+    margin: 18px 0;
+    background: #fafafa;
+    overflow: hidden;
+}
+.su-spoiler-title {
+    cursor: pointer;
+    padding: 12px 14px;
+    display: flex;
+    align-items: center;
+    gap: 8px;
+    font-weight: 600;
+    color: #2c3e50;
+    user-select: none;
+}
+.su-spoiler-title:focus {
+    outline: 2px solid #4CAF50;
+}
+.su-spoiler-icon {
+    width: 10px;
+    height: 10px;
+    border-left: 2px solid #4CAF50;
+    border-bottom: 2px solid #4CAF50;
+    transform: rotate(-45deg);
+    transition: transform 0.15s ease-out;
+    display: inline-block;
+}
+.su-spoiler.open .su-spoiler-icon {
+    transform: rotate(135deg);
+}
+.su-spoiler-content {
+    display: none !important;
+    padding: 12px 14px 18px 14px;
+    background: #fff;
+    border-top: 1px solid #e0e0e0;
+}
+.su-spoiler.open .su-spoiler-content {
+    display: block !important;
+}
+/* 初期状態で確実に閉じる */
+.su-spoiler:not(.open) .su-spoiler-content {
+    display: none !important;
+}
+/* 回数ごとに分割した場合の目次と読み込み前の枠 */
+.exam-nav {
+    display: flex;
+    flex-wrap: wrap;
+    gap: 8px;
+    margin-bottom: 20px;
+}
+.exam-nav a {
+    background-color: white;
+    border: 1px solid #4CAF50;
+    border-radius: 4px;
+    color: #2c3e50;
+    padding: 4px 10px;
+    text-decoration: none;
+}
+.exam-title {
+    color: #2c3e50;
+    margin: 30px 0 20px;
+}
+.exam-status {
+    color: #888;
+}
+/* 展開前の問題ブロックの枠（展開後は中のブロックのmarginを含めた高さになる） */
+.question-slot {
+    display: flow-root;
+}
+/* 問題の検索（ヘッダーの検索欄と結果の一覧） */
+.question-slot,
+.question-block {
+    scroll-margin-top: 110px;
+}
+.site-search {
+    position: relative;
+    max-width: 600px;
+    margin: 12px auto 0;
+    text-align: left;
+}
+.site-search input {
+    box-sizing: border-box;
+    width: 100%;
+    padding: 8px 12px;
+    border: none;
+    border-radius: 4px;
+    font-size: 16px;
+}
+.search-results {
+    position: absolute;
+    left: 0;
+    right: 0;
+    max-height: 60vh;
+    overflow-y: auto;
+    margin: 4px 0 0;
+    padding: 0;
+    list-style: none;
+    background-color: white;
+    border-radius: 4px;
+    box-shadow: 0 2px 8px rgba(0,0,0,0.2);
+}
+.search-results li {
+    border-bottom: 1px solid #e0e0e0;
+}
+.search-results a {
+    display: block;
+    padding: 8px 12px;
+    color: #2c3e50;
+    text-decoration: none;
+}
+.search-results a:hover,
+.search-results a:focus {
+    background-color: #f0f7f0;
+}
+.search-status {
+    padding: 8px 12px;
+    color: #888;
+}
+.search-snippet {
+    display: block;
+    color: #888;
+    font-size: 13px;
+    white-space: nowrap;
+    overflow: hidden;
+    text-overflow: ellipsis;
+}
+"""
+
+# su-spoilerの開閉（documentに1つだけ登録し、開閉の状態はクラスだけで持つ）
+# 問題数や後から読み込んだ要素に関係なく、読み込み時の処理は一定
+SPOILER_SCRIPT = """(() => {
+    const toggle = (spoiler) => {
+        const isOpen = !spoiler.classList.contains('open');
+        spoiler.classList.toggle('open', isOpen);
+        spoiler.classList.toggle('su-spoiler-open', isOpen);
+        spoiler.classList.toggle('su-spoiler-closed', !isOpen);
+        const title = spoiler.querySelector('.su-spoiler-title');
+        if (title) title.setAttribute('aria-expanded', String(isOpen));
+    };
+
+    // titleがあればtitleで、なければspoiler全体で開閉する
+    const findSpoiler = (target) => {
+        if (!(target instanceof Element)) return null;
+        const title = target.closest('.su-spoiler-title');
+        if (title) return title.closest('.su-spoiler');
+        const spoiler = target.closest('.su-spoiler');
+        return spoiler && !spoiler.querySelector('.su-spoiler-title') ? spoiler : null;
+    };
+
+    document.addEventListener('click', (e) => {
+        const spoiler = findSpoiler(e.target);
+        if (!spoiler) return;
+        e.preventDefault();
+        toggle(spoiler);
+    });
+    document.addEventListener('keydown', (e) => {
+        if (e.key !== 'Enter' && e.key !== ' ') return;
+        if (!(e.target instanceof Element) || !e.target.classList.contains('su-spoiler-title')) return;
+        e.preventDefault();
+        toggle(e.target.closest('.su-spoiler'));
+    });
+})();"""
+
+
+def reset_spoilers(post_content):
+    """
+    su-spoiler要素を初期状態（閉じた状態）にする
+
+    開閉の状態はクラス（open / su-spoiler-closed）だけで持ち、表示はCSSで切り替える。
+    インラインの display 指定はCSSより優先されてしまうので削除する。
+    """
+    for spoiler in post_content.find_all("div", class_="su-spoiler"):
+        classes = [c for c in spoiler.get("class", []) if c not in ["su-spoiler-open", "open"]]
+        if "su-spoiler-closed" not in classes:
+            classes.append("su-spoiler-closed")
+        spoiler["class"] = classes
+        
+        content = spoiler.find("div", class_="su-spoiler-content")
+        if content and content.get("style"):
+            style = INLINE_DISPLAY.sub("", content["style"]).strip()
+            if style:
+                content["style"] = style
+            else:
+                del content["style"]
+        
+        # キーボードでも開閉できるように
+        title = spoiler.find("div", class_="su-spoiler-title")
+        if title:
+            title["tabindex"] = "0"
+            title["role"] = "button"
+            title["aria-expanded"] = "false"
+
+
+# 回数ごとに分割したindex.htmlで、各回のファイルを表示位置に近づいたときに読み込む
+# （.exam-shard がないページでは何もしない）
+SHARD_LOADER_SCRIPT = """(() => {
+    // 回数ごとのファイルを、表示位置に近づいたときに1回だけ読み込む
+    const loading = new Map();
+    const loadShard = (section) => {
+        if (!loading.has(section)) {
+            section.dataset.loaded = '1';
+            const questions = section.querySelector('.exam-questions');
+            loading.set(section, fetch(section.dataset.src)
+                .then(response => {
+                    if (!response.ok) throw new Error(response.status);
+                    return response.text();
+                })
+                .then(html => {
+                    questions.innerHTML = html;
+                    section.style.minHeight = '';
+                    if (window.observeQuestionSlots) window.observeQuestionSlots(questions);
+                })
+                .catch(error => {
+                    questions.innerHTML = '<p class="exam-status"></p>';
+                    questions.firstChild.textContent = '読み込みに失敗しました: ' + error.message;
+                }));
+        }
+        return loading.get(section);
+    };
+    // 検索結果から、まだ読み込んでいない回の問題に移動するときに使う
+    window.loadExamShard = (examNumber) => {
+        const section = document.getElementById('exam-' + examNumber);
+        return section && section.classList.contains('exam-shard') ? loadShard(section) : Promise.resolve();
+    };
+
+    const sections = document.querySelectorAll('.exam-shard');
+    if ('IntersectionObserver' in window) {
+        const observer = new IntersectionObserver(entries => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
+                    observer.unobserve(entry.target);
+                    loadShard(entry.target);
+                }
+            });
+        }, { rootMargin: '1000px 0px' });
+        sections.forEach(section => observer.observe(section));
+    } else {
+        sections.forEach(loadShard);
+    }
+    // 目次から移動したときは、その回をすぐに読み込む
+    document.querySelectorAll('.exam-nav a').forEach(link => {
+        link.addEventListener('click', () => {
+            const section = document.querySelector(link.getAttribute('href'));
+            if (section) loadShard(section);
+        });
+    });
+})();"""
+
+# インデックスHTMLの問題ブロック（.question-slot > template）を、表示位置に近づいたときに展開し、
+# 十分に離れたら実際の高さを残してtemplateに戻す（問題数が増えてもDOMの要素数は一定の範囲に収まる）
+LAZY_BLOCK_SCRIPT = """(() => {
+    const getTemplate = (slot) => slot.firstElementChild instanceof HTMLTemplateElement ? slot.firstElementChild : null;
+
+    const mount = (slot) => {
+        const template = getTemplate(slot);
+        if (!template) return;
+        slot.replaceChildren(template.content);
+        slot.style.minHeight = '';
+    };
+
+    // 入力中の要素を含む場合はそのままにする
+    const unmount = (slot) => {
+        if (getTemplate(slot) || slot.contains(document.activeElement)) return;
+        const height = slot.offsetHeight;
+        const template = document.createElement('template');
+        template.content.append(...slot.childNodes);
+        slot.replaceChildren(template);
+        slot.style.minHeight = height + 'px';
+    };
+
+    let near = null;
+    let far = null;
+    if ('IntersectionObserver' in window) {
+        near = new IntersectionObserver(entries => {
+            entries.forEach(entry => { if (entry.isIntersecting) mount(entry.target); });
+        }, { rootMargin: '1000px 0px' });
+        far = new IntersectionObserver(entries => {
+            entries.forEach(entry => { if (!entry.isIntersecting) unmount(entry.target); });
+        }, { rootMargin: '4000px 0px' });
+    }
+
+    // 回数ごとに分割した場合は、読み込んだ回の中の枠も登録する
+    window.observeQuestionSlots = (root) => {
+        root.querySelectorAll('.question-slot').forEach(slot => {
+            if (!near) {
+                mount(slot);
+                return;
+            }
+            near.observe(slot);
+            far.observe(slot);
+        });
+    };
+    window.observeQuestionSlots(document);
+})();"""
+
+# インデックスHTMLの検索欄（#site-search がないページでは何もしない）
+# 索引（search_index.py）は最初に入力したときに1回だけ読み込み、bigramの転置索引で検索する
+SEARCH_SCRIPT = """(() => {
+    const input = document.getElementById('site-search');
+    const results = document.getElementById('site-search-results');
+    if (!input || !results) return;
+    const MAX_RESULTS = 50;
+
+    let indexPromise = null;
+    const loadIndex = () => {
+        if (!indexPromise) {
+            indexPromise = fetch(input.dataset.index)
+                .then(response => {
+                    if (!response.ok) throw new Error(response.status);
+                    return response.json();
+                })
+                .then(index => {
+                    if (index.version !== 1) throw new Error('索引の形式が違います');
+                    // 直前の番号との差分で保存されているので、問題の番号に戻す
+                    for (const token in index.postings) {
+                        let id = 0;
+                        index.postings[token] = index.postings[token].map(delta => (id += delta));
+                    }
+                    return index;
+                });
+        }
+        return indexPromise;
+    };
+
+    // search_index.tokenize と同じ区切り方（1文字だけの連続はその1文字）
+    const tokenize = (text) => {
+        const tokens = new Set();
+        for (const run of text.normalize('NFKC').toLowerCase().match(/[\\p{L}\\p{N}_]+/gu) || []) {
+            const chars = Array.from(run);
+            if (chars.length === 1) {
+                tokens.add(run);
+            } else {
+                for (let i = 0; i < chars.length - 1; i++) tokens.add(chars[i] + chars[i + 1]);
+            }
+        }
+        return [...tokens];
+    };
+
+    // 1文字のクエリは、その文字を含むbigramの問題をまとめる
+    const lookup = (index, token) => {
+        if (Array.from(token).length > 1 || index.postings[token]) return index.postings[token] || [];
+        const ids = new Set();
+        for (const key in index.postings) {
+            if (key.includes(token)) index.postings[key].forEach(id => ids.add(id));
+        }
+        return [...ids].sort((a, b) => a - b);
+    };
+
+    // 全てのbigramを含む問題（短いリストから順に絞り込む）
+    const search = (index, query) => {
+        const tokens = tokenize(query);
+        if (!tokens.length) return [];
+        const lists = tokens.map(token => lookup(index, token)).sort((a, b) => a.length - b.length);
+        let ids = lists[0];
+        for (const list of lists.slice(1)) {
+            const set = new Set(list);
+            ids = ids.filter(id => set.has(id));
+        }
+        return ids;
+    };
+
+    const addItem = (className, text) => {
+        const item = document.createElement('li');
+        item.className = className;
+        item.textContent = text;
+        results.appendChild(item);
+        return item;
+    };
+
+    const render = (index, ids) => {
+        results.textContent = '';
+        results.hidden = false;
+        if (!ids.length) {
+            addItem('search-status', '見つかりませんでした');
+            return;
+        }
+        const shown = ids.slice(0, MAX_RESULTS);
+        addItem('search-status', ids.length > shown.length ? `${ids.length}件（先頭${shown.length}件を表示）` : `${ids.length}件`);
+        shown.forEach(id => {
+            const [exam, question, anchor, snippet] = index.docs[id];
+            const link = document.createElement('a');
+            link.href = '#' + anchor;
+            link.dataset.exam = exam;
+            link.textContent = `第${exam}回 問${question}`;
+            const text = document.createElement('span');
+            text.className = 'search-snippet';
+            text.textContent = snippet;
+            link.appendChild(text);
+            addItem('search-result', '').appendChild(link);
+        });
+    };
+
+    let timer = null;
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(() => {
+            const query = input.value;
+            if (!query.trim()) {
+                results.hidden = true;
+                return;
+            }
+            loadIndex()
+                .then(index => {
+                    if (input.value === query) render(index, search(index, query));
+                })
+                .catch(error => {
+                    results.textContent = '';
+                    results.hidden = false;
+                    addItem('search-status', '索引の読み込みに失敗しました: ' + error.message);
+                });
+        }, 100);
+    });
+    input.addEventListener('focus', () => { loadIndex().catch(() => {}); }, { once: true });
+    input.addEventListener('keydown', (e) => {
+        if (e.key === 'Escape') {
+            input.value = '';
+            results.hidden = true;
+        }
+    });
+
+    // 回数ごとに分割した場合は、移動先の回を読み込んでから移動する
+    results.addEventListener('click', (e) => {
+        const link = e.target instanceof Element ? e.target.closest('a') : null;
+        if (!link) return;
+        const id = link.getAttribute('href').slice(1);
+        results.hidden = true;
+        if (document.getElementById(id) || !window.loadExamShard) return;
+        e.preventDefault();
+        window.loadExamShard(link.dataset.exam).then(() => {
+            const target = document.getElementById(id);
+            if (target) {
+                target.scrollIntoView();
+                history.replaceState(null, '', '#' + id);
+            }
+        });
+    });
+})();"""
+
+# サイトのルートの sw.js（service_worker.py）を登録する
+# このスクリプト（assets/ にある）のURLから求めるので、ページの場所に関係なく同じ sw.js になる（file:// で開いた場合は使えない）
+SW_REGISTER_SCRIPT = """(() => {
+    const script = document.currentScript;
+    if (!('serviceWorker' in navigator) || location.protocol === 'file:' || !script) return;
+    const swUrl = new URL('../sw.js', script.src).href;
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register(swUrl).catch(() => {});
+    });
+})();"""
+
+SITE_JS = "\n".join([SPOILER_SCRIPT, LAZY_BLOCK_SCRIPT, SHARD_LOADER_SCRIPT, SEARCH_SCRIPT, SW_REGISTER_SCRIPT]) + "\n"
+
+
+def get_assets_dir(templates_dir):
+    """CSS・スクリプトの保存先（templatesと同じ階層の assets/）"""
+    return os.path.join(os.path.dirname(os.fspath(templates_dir)), ASSETS_DIRNAME)
+
+
+def write_site_assets(assets_dir):
+    """
+    site.<hash>.css と site.<hash>.js を書き出す（同じ内容のファイルがあれば書き込まない）
+
+    静的ホスティング用に、それぞれの.gz（brotliがあれば.brも）も書き出す。
+
+    古いハッシュのファイルは、変更のないテンプレートから参照されている可能性があるので残す。
+
+    Returns:
+        dict: {"css": CSSのパス, "js": スクリプトのパス}（各ページから参照する相対パス）
+    """
+    os.makedirs(assets_dir, exist_ok=True)
+    assets = {}
+    for kind, content in [("css", SITE_CSS), ("js", SITE_JS)]:
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()[:ASSET_HASH_LENGTH]
+        filename = f"site.{digest}.{kind}"
+        path = os.path.join(assets_dir, filename)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        # 事前圧縮したファイル（.gz/.br）がなければ作成
+        if not all(os.path.exists(p) for p in get_compressed_paths(path)):
+            write_compressed(path)
+        assets[kind] = site_url(f"{ASSETS_DIRNAME}/{filename}")
+    return assets
+
+
+def get_asset_version(assets):
+    """テンプレートの再生成の判定に使う、CSS・スクリプトの組み合わせ（と参照するURL）の識別子"""
+    return f"{os.path.basename(assets['css'])}+{os.path.basename(assets['js'])}@{_settings['base_url']}"
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+テンプレートの構造を確認し、自動で直せるものは修正する（lint）
+
+fix_spoiler_structure / check_spoiler_fix / fix_out_of_range_questions と
+fix_multi_questions の確認をまとめたもの。
+- テンプレートはファイルごとに1回だけ解析し、全てのルールを同じ木に適用する
+- ファイルごとにプロセスを分けて並列に実行
+- 結果は「ファイル:行:列: 重要度 ルール メッセージ」の形式で表示する
+
+ルール:
+    empty-spoiler:    su-spoiler-contentが空で、解答・解説がspoilerの外にある
+                      （修正: 解答・解説をspoilerの中に移す）
+    div-in-p:         pタグの中にdivがある（修正: divをpタグの直後に出す）
+    out-of-range:     取得対象（設定ファイルの [questions]）でない問題番号に「(範囲外)」が付いていない（または対象なのに付いている）
+                      （修正: 「(範囲外)」を付ける・外す）
+    missing-question: ファイル名の問題番号がテンプレートにない
+                      （元ページの取得が必要なので自動では直さない。fix_multi_questions.py で追加する）
+
+--dry-run を付けると、修正を書き込まずに差分（unified diff）を表示する。
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup, NavigableString
+
+from config import get_questions_to_fetch
+from new2 import is_spoiler_content_empty, is_answer_section_end, move_answers_into_spoilers, ANSWER_KEYWORDS
+from postbuild import write_compressed
+from write_batch import WriteBatch
+from question_store import (
+    TEMPLATES_DIR, QUESTION_HEADING, list_template_filenames, parse_template_filename,
+    parse_post_content, get_question_numbers,
+)
+
+RULES = ("empty-spoiler", "div-in-p", "out-of-range", "missing-question")
+DEFAULT_WORKERS = os.cpu_count() or 4
+OUT_OF_RANGE_PREFIX = "(範囲外)"
+
+SEVERITY_LABELS = {"error": "エラー", "warning": "警告"}
+
+
+def _diagnostic(element, rule, severity, message, fixable):
+    return {
+        "line": getattr(element, "sourceline", None) or 0,
+        "column": (getattr(element, "sourcepos", None) or 0) + 1,
+        "rule": rule,
+        "severity": severity,
+        "message": message,
+        "fixable": fixable,
+        "fixed": False,
+    }
+
+
+def _has_answer_after(wrapper):
+    """spoiler（を包むpタグ）の後ろ、次のspoiler・問題の見出しまでに解答・解説があるか"""
+    for sibling in wrapper.next_siblings:
+        if isinstance(sibling, NavigableString) and not sibling.strip():
+            continue
+        if is_answer_section_end(sibling):
+            return False
+        if ANSWER_KEYWORDS.search(sibling.get_text()):
+            return True
+    return False
+
+
+def check_empty_spoiler(post_content, context, fix):
+    """空のsu-spoiler-contentの後ろに解答・解説がある"""
+    diagnostics = []
+    for content in post_content.find_all("div", class_="su-spoiler-content"):
+        if not is_spoiler_content_empty(content):
+            continue
+        spoiler = content.find_parent("div", class_="su-spoiler")
+        wrapper = spoiler.find_parent("p") if spoiler is not None else None
+        if wrapper is None or not _has_answer_after(wrapper):
+            diagnostics.append(_diagnostic(content, "empty-spoiler", "warning", "spoilerの中身が空です", False))
+        else:
+            diagnostics.append(_diagnostic(
+                content, "empty-spoiler", "error", "spoilerの中身が空で、解答・解説がspoilerの外にあります", True,
+            ))
+    if fix and any(d["fixable"] for d in diagnostics):
+        move_answers_into_spoilers(post_content)
+        for d in diagnostics:
+            d["fixed"] = d["fixable"]
+    return diagnostics
+
+
+def _is_empty_wrapper(element):
+    """中身のない（空白と空のspanだけの）pタグ・spanタグならTrue"""
+    return not element.get_text(strip=True) and all(tag.name == "span" for tag in element.find_all(True))
+
+
+def check_div_in_p(post_content, context, fix):
+    """pタグの中のdiv（ブラウザはpタグを閉じてしまうため、表示が崩れる）"""
+    diagnostics = []
+    # pタグごとの、最後に外に出したdiv（同じpタグの中のdivは元の順番で並べる）
+    last_moved = {}
+    for div in post_content.find_all("div"):
+        wrapper = div.find_parent("p")
+        if wrapper is None:
+            continue
+        # 同じpタグの中の外側のdivと一緒に移すので、内側のdivは数えない
+        outer = div.find_parent("div")
+        if outer is not None and any(parent is wrapper for parent in outer.parents):
+            continue
+        d = _diagnostic(div, "div-in-p", "error", f"pタグの中に{_describe(div)}があります", True)
+        diagnostics.append(d)
+        if fix:
+            anchor = last_moved.get(id(wrapper), wrapper)
+            anchor.insert_after(div.extract())
+            last_moved[id(wrapper)] = div
+            d["fixed"] = True
+    if fix:
+        for wrapper_id, div in last_moved.items():
+            wrapper = div.find_previous_sibling("p")
+            if wrapper is not None and id(wrapper) == wrapper_id and _is_empty_wrapper(wrapper):
+                wrapper.decompose()
+    return diagnostics
+
+
+def _describe(div):
+    classes = div.get("class") or []
+    return f'<div class="{classes[0]}">' if classes else "<div>"
+
+
+def check_out_of_range(post_content, context, fix):
+    """問題の見出しの「(範囲外)」が取得対象の問題番号と合っているか"""
+    valid_numbers = context["valid_numbers"]
+    if valid_numbers is None:
+        return []
+    diagnostics = []
+    for strong in post_content.find_all("strong"):
+        if strong.find_parent("div", class_="su-spoiler-content") is not None:
+            continue
+        heading = QUESTION_HEADING.match(strong.get_text(strip=True))
+        if not heading:
+            continue
+        number = int(heading.group(2))
+        marked = heading.group(1) is not None
+        if (number in valid_numbers) != marked:
+            continue
+        if marked:
+            message = f"問{number}は取得対象なのに「{OUT_OF_RANGE_PREFIX}」が付いています"
+        else:
+            message = f"問{number}は取得対象ではありません（「{OUT_OF_RANGE_PREFIX}」が付いていません）"
+        d = _diagnostic(strong, "out-of-range", "warning", message, True)
+        diagnostics.append(d)
+        if fix:
+            d["fixed"] = _set_out_of_range_prefix(strong, not marked)
+    return diagnostics
+
+
+def _set_out_of_range_prefix(strong, marked):
+    """見出しの最初の文字列に「(範囲外)」を付ける・外す"""
+    for text in strong.find_all(string=True):
+        if not text.strip():
+            continue
+        stripped = text.lstrip()
+        leading = text[:len(text) - len(stripped)]
+        if marked:
+            text.replace_with(leading + OUT_OF_RANGE_PREFIX + stripped)
+        elif stripped.startswith(OUT_OF_RANGE_PREFIX):
+            text.replace_with(leading + stripped[len(OUT_OF_RANGE_PREFIX):])
+        else:
+            return False
+        return True
+    return False
+
+
+def check_missing_question(post_content, context, fix):
+    """ファイル名の問題番号がテンプレートにあるか（他のルールの修正後の木で確認する）"""
+    exam_number, expected = context["exam_number"], context["question_numbers"]
+    if exam_number is None:
+        return []
+    records = parse_post_content(post_content, exam_number, expected, filename=context["filename"])
+    found = set(get_question_numbers(records))
+    diagnostics = []
+    for number in expected:
+        if number in found:
+            continue
+        d = _diagnostic(
+            post_content, "missing-question", "error",
+            f"問{number}がありません（fix_multi_questions.py で元ページから追加してください）", False,
+        )
+        d["question_number"] = number
+        diagnostics.append(d)
+    return diagnostics
+
+
+RULE_CHECKS = {
+    "empty-spoiler": check_empty_spoiler,
+    "div-in-p": check_div_in_p,
+    "out-of-range": check_out_of_range,
+    "missing-question": check_missing_question,
+}
+
+
+def lint_html(html_content, filename, rules=RULES, valid_numbers=None, fix=False):
+    """
+    テンプレートのHTMLを確認する
+
+    Args:
+        html_content: テンプレートのHTML
+        filename: テンプレートのファイル名（回数と問題番号を取得する）
+        rules: 適用するルール（RULESの順に適用する）
+        valid_numbers: この回数の取得対象の問題番号（Noneならout-of-rangeは確認しない）
+        fix: 自動で直せるものを修正する
+
+    Returns:
+        tuple: (診断のリスト, 修正後のHTML（修正がなければNone）)
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+    post_content = soup.find("div", class_="post_content")
+    if post_content is None:
+        return [_diagnostic(soup, "structure", "error", "div.post_contentがありません", False)], None
+
+    exam_number, question_numbers = parse_template_filename(filename)
+    context = {
+        "filename": filename,
+        "exam_number": exam_number,
+        "question_numbers": question_numbers,
+        "valid_numbers": valid_numbers,
+    }
+    original_post_content = str(post_content)
+    diagnostics = []
+    for rule in RULES:
+        if rule in rules:
+            diagnostics.extend(RULE_CHECKS[rule](post_content, context, fix))
+
+    if not any(d["fixed"] for d in diagnostics):
+        return diagnostics, None
+    # テンプレートはpost_contentの文字列を埋め込んで作っているので、その部分だけ置き換える（他の部分は元のまま）
+    if original_post_content in html_content:
+        return diagnostics, html_content.replace(original_post_content, str(post_content), 1)
+    return diagnostics, str(soup)
+
+
+def lint_template(task):
+    """
+    1つのテンプレートを確認する（プロセスプールから呼ばれる）
+
+    Args:
+        task: (テンプレートのパス, 適用するルール, 取得対象の問題番号 or None, 修正するか)
+
+    Returns:
+        tuple: (パス, 診断のリスト, 修正後のHTML or None)
+    """
+    path, rules, valid_numbers, fix = task
+    with open(path, "r", encoding="utf-8") as f:
+        html_content = f.read()
+    diagnostics, fixed_html = lint_html(html_content, os.path.basename(path), rules, valid_numbers, fix)
+    return path, diagnostics, fixed_html
+
+
+def get_template_paths(templates_dir=TEMPLATES_DIR, filenames=None):
+    """確認するテンプレートのパス（ファイル名が 回数-問番号.html のもの）"""
+    if filenames is None:
+        filenames = list_template_filenames(templates_dir)
+    return [os.path.join(templates_dir, f) for f in sorted(filenames)]
+
+
+def run_lint(templates_dir=TEMPLATES_DIR, filenames=None, rules=RULES, fix=False,
+             valid_questions=None, workers=DEFAULT_WORKERS, dry_run=False):
+    """
+    テンプレートを並列に確認し、fix=Trueなら修正したファイルを書き戻す
+
+    修正したファイルは全ての確認が終わってからまとめて置き換える（write_batch）。
+
+    Args:
+        valid_questions: {回数: [取得対象の問題番号]}（ない回数は全ての問題が範囲外）
+                         省略時は設定ファイルの [questions]
+        dry_run: 修正を書き込まずに差分を表示する
+
+    Returns:
+        dict: {パス: 診断のリスト}（診断がないファイルは含めない）
+    """
+    if valid_questions is None and "out-of-range" in rules:
+        valid_questions = get_questions_to_fetch()
+    tasks = []
+    for path in get_template_paths(templates_dir, filenames):
+        exam_number, _ = parse_template_filename(os.path.basename(path))
+        valid_numbers = None
+        if valid_questions is not None and exam_number is not None:
+            valid_numbers = set(valid_questions.get(exam_number, []))
+        tasks.append((path, tuple(rules), valid_numbers, fix))
+
+    results = {}
+    with WriteBatch(dry_run) as batch:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for path, diagnostics, fixed_html in executor.map(lint_template, tasks, chunksize=4):
+                if fixed_html is not None:
+                    batch.write(path, fixed_html)
+                if diagnostics:
+                    results[path] = diagnostics
+    for path in batch.committed:
+        write_compressed(path)
+    return results
+
+
+def format_diagnostic(path, diagnostic, dry_run=False):
+    label = SEVERITY_LABELS.get(diagnostic["severity"], diagnostic["severity"])
+    suffix = ""
+    if diagnostic["fixed"]:
+        suffix = "（--dry-run: 修正できます）" if dry_run else "（修正済み）"
+    return (
+        f"{path}:{diagnostic['line']}:{diagnostic['column']}: {label} "
+        f"{diagnostic['rule']} {diagnostic['message']}{suffix}"
+    )
+
+
+def _display_path(path):
+    """カレントディレクトリの下なら相対パス、それ以外は絶対パス"""
+    relative = os.path.relpath(path)
+    return path if relative.startswith("..") else relative
+
+
+def print_diagnostics(results, dry_run=False):
+    """診断を表示して、修正されずに残ったエラーの数を返す"""
+    remaining_errors = 0
+    fixed_count = 0
+    for path in sorted(results):
+        for diagnostic in sorted(results[path], key=lambda d: (d["line"], d["column"])):
+            print(format_diagnostic(_display_path(path), diagnostic, dry_run))
+            if diagnostic["fixed"]:
+                fixed_count += 1
+            elif diagnostic["severity"] == "error":
+                remaining_errors += 1
+    total = sum(len(diagnostics) for diagnostics in results.values())
+    fixed_label = "修正できる" if dry_run else "修正済み"
+    print(f"\n{len(results)}ファイル / {total}件（{fixed_label}: {fixed_count}件 / 残りのエラー: {remaining_errors}件）")
+    return remaining_errors
+
+
+def main(filenames=None, rules=RULES, fix=False, templates_dir=TEMPLATES_DIR, dry_run=False,
+         workers=DEFAULT_WORKERS):
+    """確認して結果を表示する（修正されずにエラーが残ったら終了コード1）"""
+    results = run_lint(templates_dir, filenames, rules, fix or dry_run, workers=workers, dry_run=dry_run)
+    if print_diagnostics(results, dry_run):
+        sys.exit(1)
+    return results
+
+
+if __name__ == "__main__":
+    # 使い方: python template_lint.py [--fix] [--dry-run] [--rules=empty-spoiler,div-in-p,...] [--templates=ディレクトリ] [ファイル名...]
+    args = sys.argv[1:]
+    selected_rules = RULES
+    selected_dir = TEMPLATES_DIR
+    for arg in args:
+        if arg.startswith("--rules="):
+            selected_rules = tuple(arg.split("=", 1)[1].split(","))
+        elif arg.startswith("--templates="):
+            selected_dir = arg.split("=", 1)[1]
+    unknown = [rule for rule in selected_rules if rule not in RULE_CHECKS]
+    if unknown:
+        print(f"不明なルール: {', '.join(unknown)}（{', '.join(RULES)} から選択）")
+        sys.exit(1)
+    selected_files = [arg for arg in args if not arg.startswith("--")] or None
+    main(selected_files, selected_rules, fix="--fix" in args, templates_dir=selected_dir, dry_run="--dry-run" in args)
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+テンプレートが元ページと一致しているかを確認する検証エンジン
+
+verify_all_files / verify_21_files / verify_content_detail の確認をまとめたもの。
+- 対象はtemplates内のファイル（元ページのURLは問題データ questions.json から取得）
+- 元ページはディスクキャッシュ（http_cache）から並列に取得
+- 元ページの解析と比較はファイルごとにプロセスを分けて並列に実行
+- 結果は「テンプレート・元ページ・確認項目」のハッシュ値をキーにキャッシュし、変更がなければ再利用
+- 結果はJSON（verify_report.json）と、check.mdと同じ形式の表（verify_report.md）に書き出す
+
+確認項目:
+    questions: ファイル名の問題番号がテンプレートと元ページの両方にあるか
+    content:   問題ごとに問題文・選択肢・解答・解説が元ページと一致しているか
+               （文字の3-gramの出現回数の重み付きJaccard係数と長さの比で、切れや重複も検出）
+    spoiler:   解答・解説がspoilerの中に入っているか（空のspoilerや不正な構造がないか）
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+from fetcher import fetch_all
+from config import get_config
+from http_cache import cached_get
+from parser_backend import get_parser_name, set_parser_name
+from question_store import (
+    TEMPLATES_DIR, FILENAME_PATTERN, list_template_filenames, load_question_store, parse_template_filename,
+    parse_post_content, get_question_numbers,
+)
+from template_lint import lint_html
+from write_batch import write_text_atomic
+
+# 確認の処理を変更したら上げる（キャッシュした結果を使わなくなる）
+VERIFY_VERSION = "3"
+CHECKS = ("questions", "content", "spoiler")
+REPORT_JSON_FILENAME = "verify_report.json"
+REPORT_MD_FILENAME = "verify_report.md"
+DEFAULT_WORKERS = os.cpu_count() or 4
+
+# 状態（後ろほど重い。ファイル全体の状態は確認項目の中で最も重いもの）
+STATUS_ORDER = ["ok", "warning", "skipped", "error"]
+STATUS_LABELS = {
+    "ok": "✓ 完了",
+    "warning": "⚠ 要確認",
+    "skipped": "- 未確認",
+    "error": "✗ 要修正",
+}
+
+QUESTION_NUMBER = re.compile(r"問\s*(\d+)")
+# 内容を比較する部分（question_storeのレコードのキー）
+SECTIONS = [("body", "問題文"), ("choices", "選択肢"), ("answer", "解答"), ("explanation", "解説")]
+# 類似度の計算に使う文字のn-gramの長さ
+SHINGLE_SIZE = 3
+WHITESPACE = re.compile(r"\s+")
+# 部分ごとの長さ（元ページとの比）がこの範囲外なら、途中で切れているか重複しているとみなす
+MIN_LENGTH_RATIO = 0.7
+MAX_LENGTH_RATIO = 1.5
+# 部分ごとの類似度がこれ未満なら要確認
+MIN_SIMILARITY = 0.9
+# spoilerの構造の確認に使う template_lint のルール
+SPOILER_RULES = ("empty-spoiler", "div-in-p")
+
+
+def _worst(statuses):
+    return max(statuses, key=STATUS_ORDER.index, default="ok")
+
+
+def _hash(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _format_numbers(numbers):
+    return "、".join(f"問{n}" for n in numbers)
+
+
+def parse_source(source_html, filename):
+    """
+    元ページをテンプレートと同じ方法（new2の抽出 → question_storeの解析）で問題ごとのレコードにする
+
+    Returns:
+        tuple: (レコードのリスト, post_contentのテキスト)（post_contentがない場合は (None, None)）
+    """
+    import new2
+
+    exam_number, question_numbers = parse_template_filename(filename)
+    try:
+        # 抽出中の進捗の表示は並列実行だと混ざるので捨てる
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, post_content_html = new2.extract_post_content(source_html, source_name=filename)
+    except ValueError:
+        return None, None
+    post_content = BeautifulSoup(post_content_html, "html.parser").find("div", class_="post_content")
+    if post_content is None:
+        return None, None
+    records = parse_post_content(post_content, exam_number, question_numbers, None, filename)
+    return records, post_content.get_text("\n")
+
+
+def check_questions(expected, local_numbers, source_numbers):
+    """ファイル名の問題番号がテンプレートと元ページにあるか"""
+    messages = []
+    missing_local = [q for q in expected if q not in local_numbers]
+    if missing_local:
+        return {"status": "error", "messages": [f"テンプレートに不足: {_format_numbers(missing_local)}"]}
+    if source_numbers is None:
+        return {"status": "skipped", "messages": ["元ページを取得できませんでした"]}
+    missing_source = [q for q in expected if q not in source_numbers]
+    if missing_source:
+        messages.append(f"元ページに不足: {_format_numbers(missing_source)}（元ページの内容が不完全な可能性）")
+    return {"status": "warning" if messages else "ok", "messages": messages}
+
+
+def normalize_for_compare(text):
+    """比較用にテキストを正規化（全角英数字を半角に、空白を全て削除）"""
+    return WHITESPACE.sub("", unicodedata.normalize("NFKC", text or ""))
+
+
+def shingle_counts(text):
+    """文字のn-gram（n=SHINGLE_SIZE）の出現回数"""
+    if len(text) <= SHINGLE_SIZE:
+        return Counter([text]) if text else Counter()
+    return Counter(text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1))
+
+
+def shingle_similarity(source_text, local_text):
+    """
+    n-gramの出現回数による重み付きJaccard係数（0〜1）
+
+    集合ではなく出現回数で比べるので、内容が途中で切れている場合だけでなく
+    同じ内容が重複している場合も類似度が下がる（2回繰り返すと約0.5）。
+    """
+    source_counts = shingle_counts(source_text)
+    local_counts = shingle_counts(local_text)
+    if not source_counts and not local_counts:
+        return 1.0
+    intersection = sum((source_counts & local_counts).values())
+    union = sum((source_counts | local_counts).values())
+    return intersection / union
+
+
+def _section_text(record, section):
+    value = record.get(section)
+    return "\n".join(value) if isinstance(value, list) else (value or "")
+
+
+def compare_question_content(source_record, local_record):
+    """
+    1問分の内容を、問題文・選択肢・解答・解説ごとに比較
+
+    Returns:
+        tuple: (類似度 0〜1, {部分: {"similarity", "length_ratio"}}, 問題点のリスト)
+        類似度は部分ごとの類似度を元ページの長さで重み付けした平均
+    """
+    issues = []
+    sections = {}
+    weighted_total = 0.0
+    weight_total = 0
+    for section, label in SECTIONS:
+        source_text = normalize_for_compare(_section_text(source_record, section))
+        local_text = normalize_for_compare(_section_text(local_record, section))
+        if not source_text and not local_text:
+            continue
+        if not local_text:
+            issues.append(f"{label}が見つかりません")
+        similarity = shingle_similarity(source_text, local_text)
+        length_ratio = len(local_text) / len(source_text) if source_text else None
+        sections[section] = {"similarity": similarity, "length_ratio": length_ratio}
+        if local_text and length_ratio is not None:
+            if length_ratio < MIN_LENGTH_RATIO:
+                issues.append(f"{label}が短すぎます（元ページの{length_ratio * 100:.1f}%、途中で切れている可能性）")
+            elif length_ratio > MAX_LENGTH_RATIO:
+                issues.append(f"{label}が長すぎます（元ページの{length_ratio * 100:.1f}%、重複している可能性）")
+        weight = max(len(source_text), 1)
+        weighted_total += similarity * weight
+        weight_total += weight
+    similarity = weighted_total / weight_total if weight_total else 1.0
+    return similarity, sections, issues
+
+
+def check_content(expected, local_records, source_records):
+    """問題ごとに内容を比較（類似度は問題ごとの最小値）"""
+    if source_records is None:
+        return {"status": "skipped", "similarity": None, "questions": {}, "messages": ["元ページを取得できませんでした"]}
+    local_by_number = {r["question_number"]: r for r in local_records}
+    source_by_number = {r["question_number"]: r for r in source_records}
+    questions = {}
+    messages = []
+    statuses = []
+    for number in expected:
+        local_record = local_by_number.get(number)
+        source_record = source_by_number.get(number)
+        if local_record is None:
+            statuses.append("error")
+            messages.append(f"問{number}: テンプレートから問題を抽出できません")
+            continue
+        if source_record is None:
+            statuses.append("skipped")
+            messages.append(f"問{number}: 元ページから問題を抽出できません")
+            continue
+        similarity, sections, issues = compare_question_content(source_record, local_record)
+        questions[str(number)] = {"similarity": similarity, "sections": sections, "issues": issues}
+        low_sections = [
+            f"{label} {sections[section]['similarity'] * 100:.2f}%"
+            for section, label in SECTIONS
+            if section in sections and sections[section]["similarity"] < MIN_SIMILARITY
+        ]
+        if issues:
+            statuses.append("error")
+            messages.extend(f"問{number}: {issue}" for issue in issues)
+        elif low_sections:
+            statuses.append("warning")
+            messages.append(f"問{number}: 類似度 {similarity * 100:.2f}%（{'、'.join(low_sections)}）")
+        else:
+            statuses.append("ok")
+    similarities = [q["similarity"] for q in questions.values()]
+    return {
+        "status": _worst(statuses),
+        "similarity": min(similarities) if similarities else None,
+        "questions": questions,
+        "messages": messages,
+    }
+
+
+def check_spoiler(template_html, local_records, filename):
+    """解答・解説がspoilerの中にあるか"""
+    diagnostics, _ = lint_html(template_html, filename, SPOILER_RULES)
+    messages = [
+        f"{d['line']}行目: {d['message']}" for d in diagnostics if d["severity"] == "error"
+    ]
+    outside = [r["question_number"] for r in local_records if r["answer"] and not r["has_spoiler"]]
+    if outside:
+        messages.append(f"spoilerの外に解答があります: {_format_numbers(outside)}")
+    return {"status": "error" if messages else "ok", "messages": messages}
+
+
+def verify_template(task):
+    """
+    1つのテンプレートを確認する（プロセスプールから呼ばれる）
+
+    Args:
+        task: (ファイル名, テンプレートのHTML, 元ページのHTML or None, テンプレートのレコード, 確認項目)
+    """
+    filename, template_html, source_html, local_records, checks = task
+    _, expected = parse_template_filename(filename)
+    local_numbers = get_question_numbers(local_records)
+
+    source_records = None
+    source_numbers = None
+    if source_html is not None:
+        source_records, source_text = parse_source(source_html, filename)
+        if source_records is not None:
+            source_numbers = sorted(
+                set(get_question_numbers(source_records))
+                | {int(n) for n in QUESTION_NUMBER.findall(source_text)}
+            )
+
+    results = {}
+    if "questions" in checks:
+        results["questions"] = check_questions(expected, local_numbers, source_numbers)
+    if "content" in checks:
+        results["content"] = check_content(expected, local_records, source_records)
+    if "spoiler" in checks:
+        results["spoiler"] = check_spoiler(template_html, local_records, filename)
+    return {
+        "file": filename,
+        "url": next((r["url"] for r in local_records if r.get("url")), None),
+        "expected": expected,
+        "local": sorted(set(local_numbers)),
+        "source": source_numbers,
+        "checks": results,
+        "status": _worst(result["status"] for result in results.values()),
+    }
+
+
+def _fetch_source(url):
+    try:
+        return cached_get(url, timeout=30)
+    except Exception as e:
+        print(f"  ✗ URL取得エラー: {e}")
+        return None
+
+
+def _load_result_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_result_cache(path, cache):
+    """確認結果のキャッシュを保存（一時ファイル経由で置き換える）"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_text_atomic(path, json.dumps(cache, ensure_ascii=False, indent=1, sort_keys=True))
+
+
+def run_verification(templates_dir=TEMPLATES_DIR, filenames=None, checks=CHECKS,
+                     workers=DEFAULT_WORKERS, use_cache=True, fetch=_fetch_source, cache_path=None):
+    """
+    テンプレートを並列に確認する
+
+    Args:
+        templates_dir: テンプレートのディレクトリ
+        filenames: 確認するファイル名のリスト（省略時は全て）
+        checks: 確認項目（CHECKSの一部）
+        workers: 並列に実行するプロセス数
+        use_cache: 前回の結果を再利用するか
+        fetch: URLから元ページのHTMLを取得する関数（失敗時はNone）
+        cache_path: 結果のキャッシュの保存先（省略時は設定ファイルの paths.verify_cache）
+
+    Returns:
+        list: ファイルごとの結果（ファイル名順）
+    """
+    templates_dir = os.fspath(templates_dir)
+    checks = tuple(c for c in CHECKS if c in checks)
+    question_records = load_question_store(templates_dir)
+    if filenames is None:
+        filenames = sorted(f for f in question_records if FILENAME_PATTERN.match(f))
+
+    templates = {}
+    for filename in filenames:
+        try:
+            with open(os.path.join(templates_dir, filename), "r", encoding="utf-8") as f:
+                templates[filename] = f.read()
+        except FileNotFoundError:
+            templates[filename] = None
+
+    # 元ページはユニークなURLだけをまとめて並列に取得（キャッシュがあればそれを使う）
+    # 実際のリクエストはhttp_clientがホストごとに間隔を制御するので、キャッシュからの読み込みは待たない
+    urls = {
+        filename: next((r["url"] for r in question_records.get(filename, []) if r.get("url")), None)
+        for filename in filenames
+    }
+    unique_urls = sorted({url for url in urls.values() if url})
+    sources = dict(zip(unique_urls, fetch_all(unique_urls, fetch, host_interval=0)))
+
+    cache_path = cache_path or get_config()["paths"]["verify_cache"]
+    cache = _load_result_cache(cache_path) if use_cache else {}
+    results = {}
+    tasks = []
+    keys = {}
+    for filename in filenames:
+        if templates[filename] is None:
+            results[filename] = {
+                "file": filename, "url": urls[filename], "expected": parse_template_filename(filename)[1],
+                "local": [], "source": None, "checks": {},
+                "status": "error", "messages": ["ファイルが存在しません"],
+            }
+            continue
+        source_html = sources.get(urls[filename])
+        keys[filename] = _hash(VERIFY_VERSION, get_parser_name(), ",".join(checks), templates[filename], source_html)
+        cached = cache.get(filename)
+        if cached and cached.get("key") == keys[filename]:
+            results[filename] = cached["result"]
+            continue
+        tasks.append((filename, templates[filename], source_html, question_records.get(filename, []), checks))
+
+    if tasks:
+        # ワーカーは別プロセスなので、設定したパーサーを初期化時に渡す（spawnでも同じパーサーで解析する）
+        with ProcessPoolExecutor(
+            max_workers=max(1, min(workers, len(tasks))),
+            initializer=set_parser_name, initargs=(get_parser_name(),),
+        ) as executor:
+            for result in executor.map(verify_template, tasks):
+                results[result["file"]] = result
+                cache[result["file"]] = {"key": keys[result["file"]], "result": result}
+        if use_cache:
+            _save_result_cache(cache_path, cache)
+    return [results[filename] for filename in filenames]
+
+
+def format_markdown_report(results):
+    """check.mdと同じ形式の表"""
+    lines = [
+        "# 検証結果",
+        "",
+        f"{datetime.now():%Y-%m-%d %H:%M} / {len(results)}ファイル",
+        "",
+        "| ファイル名 | 問題番号 | 類似度 | Spoiler | 状態 |",
+        "|-----------|---------|--------|---------|------|",
+    ]
+    notes = []
+    for result in results:
+        numbers = result["local"] or result["expected"]
+        question_label = "問" + "-".join(str(n) for n in numbers) if numbers else "-"
+        content = result["checks"].get("content")
+        similarity = f"{content['similarity'] * 100:.2f}%" if content and content["similarity"] is not None else "-"
+        spoiler = result["checks"].get("spoiler")
+        spoiler_label = "-" if spoiler is None else ("✓ OK" if spoiler["status"] == "ok" else "✗ NG")
+        lines.append(
+            f"| {result['file']} | {question_label} | {similarity} | {spoiler_label} | {STATUS_LABELS[result['status']]} |"
+        )
+        messages = result.get("messages", []) + [
+            message for check in result["checks"].values() for message in check["messages"]
+        ]
+        if messages:
+            notes.append(f"- {result['file']}: " + "; ".join(messages))
+    if notes:
+        lines += ["", "### 備考"] + notes
+    return "\n".join(lines) + "\n"
+
+
+def write_reports(results, report_dir):
+    """JSONと表を書き出し、パスを返す"""
+    json_path = os.path.join(report_dir, REPORT_JSON_FILENAME)
+    md_path = os.path.join(report_dir, REPORT_MD_FILENAME)
+    summary = {status: sum(1 for r in results if r["status"] == status) for status in STATUS_ORDER}
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "results": results}, f, ensure_ascii=False, indent=1)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(format_markdown_report(results))
+    return json_path, md_path
+
+
+def print_summary(results):
+    print(f"\n{'=' * 80}")
+    print("確認結果まとめ")
+    print("=" * 80)
+    for result in results:
+        print(f"{STATUS_LABELS[result['status']]}: {result['file']}")
+        for message in result.get("messages", []) + [
+            message for check in result["checks"].values() for message in check["messages"]
+        ]:
+            print(f"    {message}")
+    print(f"\n{'=' * 80}")
+    for status in STATUS_ORDER:
+        count = sum(1 for r in results if r["status"] == status)
+        if count:
+            print(f"{STATUS_LABELS[status]}: {count}/{len(results)}件")
+    print("=" * 80)
+
+
+def main(filenames=None, checks=CHECKS, templates_dir=TEMPLATES_DIR, use_cache=True, workers=DEFAULT_WORKERS,
+         cache_path=None):
+    """確認してレポートを書き出す（レポートはtemplatesと同じ階層）"""
+    results = run_verification(
+        templates_dir, filenames, checks, workers=workers, use_cache=use_cache, cache_path=cache_path,
+    )
+    print_summary(results)
+    json_path, md_path = write_reports(results, os.path.dirname(os.fspath(templates_dir)))
+    print(f"レポート: {json_path}")
+    print(f"          {md_path}")
+    return results
+
+
+def get_multi_question_filenames(templates_dir=TEMPLATES_DIR):
+    """複数の問題をまとめたテンプレート（例: 102-250_251.html）のファイル名"""
+    return [f for f in list_template_filenames(templates_dir) if len(parse_template_filename(f)[1]) > 1]
+
+
+if __name__ == "__main__":
+    # 使い方: python verification.py [--multi] [--checks=questions,content,spoiler] [--no-cache] [ファイル名...]
+    args = sys.argv[1:]
+    selected_checks = CHECKS
+    for arg in args:
+        if arg.startswith("--checks="):
+            selected_checks = tuple(arg.split("=", 1)[1].split(","))
+    selected_files = [arg for arg in args if not arg.startswith("--")] or None
+    if "--multi" in args:
+        selected_files = get_multi_question_filenames()
+    main(selected_files, selected_checks, use_cache="--no-cache" not in args)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+テンプレートの書き込みをまとめて安全に行う
+
+- 内容は同じディレクトリの一時ファイルに書き出してから os.replace で置き換える
+  （途中で止まっても、書きかけのファイルが残らない）
+- 全てのファイルを一時ファイルに書き出してから、最後にまとめて置き換える
+  （書き出しの途中でエラーになったら、どのファイルも変更しない）
+- 内容が同じファイルは書き込まない（更新日時が変わらないので、後の処理で変更なしと判断できる）
+- dry_run=Trueなら書き込まずに、変更の差分（unified diff）を表示する
+"""
+
+import difflib
+import hashlib
+import os
+import sys
+import tempfile
+
+# 一時ファイルの名前の先頭（テンプレートの一覧やglobの対象にならないように「.」で始める）
+TEMP_PREFIX = ".tmp-"
+# 置き換えたファイルのパーミッション（新しく作るファイル）
+DEFAULT_FILE_MODE = 0o644
+# 差分の前後に表示する行数
+DIFF_CONTEXT = 3
+
+
+def _file_hash(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _stage(path, text):
+    """pathと同じディレクトリの一時ファイルに書き出し、そのパスを返す"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=TEMP_PREFIX, suffix=os.path.splitext(path)[1])
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = DEFAULT_FILE_MODE
+        os.chmod(temp_path, mode)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path
+
+
+def write_text_atomic(path, text):
+    """1つのファイルを一時ファイル経由で置き換える（JSONなどの保存用）"""
+    os.replace(_stage(path, text), path)
+
+
+def format_diff(path, text):
+    """現在のファイル（なければ空）とtextの差分（unified diff）"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            current = f.read()
+    except FileNotFoundError:
+        current = ""
+    name = os.path.basename(path)
+    lines = difflib.unified_diff(
+        current.splitlines(keepends=True), text.splitlines(keepends=True),
+        fromfile=f"a/{name}", tofile=f"b/{name}", n=DIFF_CONTEXT,
+    )
+    return "".join(line if line.endswith("\n") else line + "\n" for line in lines)
+
+
+class WriteBatch:
+    """
+    複数ファイルの書き込みをまとめて行う
+
+    write() は内容を覚えておくだけで、commit() で全てを一時ファイルに書き出してから、まとめて置き換える。
+
+    使い方:
+        with WriteBatch(dry_run) as batch:
+            batch.write(path, text)
+        # ブロックを抜けたときに置き換える（例外で抜けたら何も変更しない）
+        for path in batch.committed:
+            ...
+    """
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        # {書き込み先のパス: 内容}
+        self.pending = {}
+        # 内容が変わる（dry_runでは変わるはずの）ファイル
+        self.changed = []
+        # 内容が同じで書き込まなかったファイル
+        self.unchanged = []
+        # 実際に置き換えたファイル
+        self.committed = []
+
+    def read(self, path):
+        """予約した内容があればその内容、なければファイルの内容（同じファイルを続けて修正する場合）"""
+        path = os.fspath(path)
+        if path in self.pending:
+            return self.pending[path]
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def write(self, path, text):
+        """
+        書き込みを予約する（dry_runなら差分を表示する）
+
+        Returns:
+            bool: 内容が変わるならTrue（同じなら何もしない）
+        """
+        path = os.fspath(path)
+        if _file_hash(path) == hashlib.sha256(text.encode("utf-8")).hexdigest():
+            self.pending.pop(path, None)
+            self.unchanged.append(path)
+            return False
+        if self.dry_run:
+            sys.stdout.write(format_diff(path, text))
+        else:
+            self.pending[path] = text
+        if path not in self.changed:
+            self.changed.append(path)
+        return True
+
+    def commit(self):
+        """
+        予約した全てのファイルを置き換える
+
+        全ての一時ファイルを書き出せてから置き換えを始める（書き出しに失敗したら一時ファイルを削除して何も変更しない）。
+
+        Returns:
+            list: 置き換えたファイルのパス
+        """
+        staged = {}
+        try:
+            for path, text in self.pending.items():
+                staged[path] = _stage(path, text)
+        except BaseException:
+            for temp_path in staged.values():
+                os.remove(temp_path)
+            raise
+        for path, temp_path in staged.items():
+            os.replace(temp_path, path)
+            self.committed.append(path)
+        self.pending = {}
+        return self.committed
+
+    def rollback(self):
+        """予約を取り消す"""
+        self.pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def print_summary(self):
+        if self.dry_run:
+            print(f"  変更あり: {len(self.changed)}ファイル / 変更なし: {len(self.unchanged)}ファイル（--dry-run: 書き込みなし）")
+        else:
+            print(f"  書き込み: {len(self.committed)}ファイル / 変更なし: {len(self.unchanged)}ファイル")
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全ての処理の入り口（設定は yakugaku.toml、処理は yakugaku-251212/cli.py）
+
+例:
+    python yakugaku.py build            問題を取得してテンプレートとインデックスを作成
+    python yakugaku.py lint --fix       テンプレートの構造を確認して修正
+    python yakugaku.py verify --multi   複数問題ページを元ページと比較
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "yakugaku-251212"))
+from cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))